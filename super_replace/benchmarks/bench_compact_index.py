@@ -0,0 +1,74 @@
+"""
+Benchmark: memory retained by a full Index versus a CompactIndex.
+
+Indexes a generated module and measures, with tracemalloc, the memory still
+allocated once indexing is done: the tree plus the full Index (which keeps the
+tree alive), versus a CompactIndex alone. Also checks that both give the same
+binding info.
+
+Usage:
+    python benchmarks/bench_compact_index.py [--lines 20000] [--kind functions]
+"""
+
+import argparse
+import ast
+import gc
+import time
+import tracemalloc
+
+from generators import GENERATORS
+from super_replace.core.autonomous_replacer import ScopeBuilder, binding_info_from_index
+from super_replace.core.compact_index import CompactIndex
+
+
+def retained(build):
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    value = build()
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return value, current, peak, elapsed
+
+
+def full_index(code):
+    tree = ast.parse(code)
+    builder = ScopeBuilder()
+    builder.visit(tree)
+    return tree, builder.index
+
+
+def compact_index(code):
+    return CompactIndex.from_index(full_index(code)[1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lines", type=int, default=20000)
+    parser.add_argument("--kind", choices=sorted(GENERATORS), default="functions")
+    args = parser.parse_args()
+
+    code = GENERATORS[args.kind](args.lines)
+    (tree, index), full_current, full_peak, full_time = retained(lambda: full_index(code))
+    names = sum(len(index.defs.get(k, ())) + len(index.uses.get(k, ())) for k in index.binding_key_to_scope)
+    sample = max(index.names, key=lambda name: len(index.names[name]))
+    expected = binding_info_from_index(index, sample)
+    del tree, index
+
+    compact, compact_current, compact_peak, compact_time = retained(lambda: compact_index(code))
+    assert compact.binding_info(sample) == expected
+
+    print(f"module: {args.kind}, {code.count(chr(10))} lines, {compact.binding_count} bindings, {names} name references")
+    print(f"{'':<10}{'retained MiB':>14}{'peak MiB':>10}{'build s':>9}")
+    for label, current, peak, elapsed in (
+        ("full", full_current, full_peak, full_time),
+        ("compact", compact_current, compact_peak, compact_time),
+    ):
+        print(f"{label:<10}{current / 2**20:>14.1f}{peak / 2**20:>10.1f}{elapsed:>9.2f}")
+    print(f"retained memory reduced {full_current / compact_current:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Benchmark: context extraction, cold versus memoized.
+
+Extracts the full context of a generated module once (one parse and one walk),
+then again for the same code, which is served from the per-content-hash memo.
+
+Usage:
+    python benchmarks/bench_context_analyzer.py [--lines 20000] [--kind functions]
+"""
+
+import argparse
+import time
+
+from generators import GENERATORS
+from super_replace.core.context_analyzer import ContextAnalyzer, clear_context_cache
+
+
+def timed(function):
+    started = time.perf_counter()
+    value = function()
+    return value, time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lines", type=int, default=20000)
+    parser.add_argument("--kind", choices=sorted(GENERATORS), default="functions")
+    args = parser.parse_args()
+
+    code = GENERATORS[args.kind](args.lines)
+    clear_context_cache()
+    context, cold = timed(lambda: ContextAnalyzer(code).get_all_context())
+    again, warm = timed(lambda: ContextAnalyzer(code).get_all_context())
+    assert again == context
+
+    entries = sum(len(values) for values in context.values())
+    print(f"module: {args.kind}, {code.count(chr(10))} lines, {entries} context entries")
+    print(f"cold:     {cold * 1000:9.1f} ms")
+    print(f"memoized: {warm * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
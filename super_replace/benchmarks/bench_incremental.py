@@ -0,0 +1,57 @@
+"""
+Benchmark: incremental re-indexing of a single function edit.
+
+Edits one line in the middle of a generated module and times
+IncrementalIndexer.apply_edit against a full parse and ScopeBuilder pass.
+
+Usage:
+    python benchmarks/bench_incremental.py [--lines 10000] [--repeat 50]
+"""
+
+import argparse
+import ast
+import time
+
+from generators import functions as generate_module
+from super_replace.core.autonomous_replacer import ScopeBuilder
+from super_replace.core.incremental import IncrementalIndexer
+
+
+def time_full_build(code: str) -> float:
+    start = time.perf_counter()
+    builder = ScopeBuilder()
+    builder.visit(ast.parse(code))
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lines", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    code = generate_module(args.lines)
+    indexer = IncrementalIndexer(code)
+    lines = code.splitlines(keepends=True)
+    target = next(i for i in range(len(lines) // 2, len(lines)) if lines[i].strip() == "total = value") + 1
+
+    timings = []
+    for n in range(args.repeat):
+        # Alternate between growing and shrinking the function so positions keep moving.
+        new_lines = ["    total = value\n"] if n % 2 else ["    total = value\n", "    total += 1\n"]
+        end_line = target + (1 if n % 2 else 0)
+        start = time.perf_counter()
+        incremental = indexer.apply_edit(target, end_line, new_lines)
+        timings.append(time.perf_counter() - start)
+        assert incremental, "edit fell back to a full rebuild"
+
+    full = min(time_full_build(indexer.code) for _ in range(3))
+    timings.sort()
+    print(f"module lines:        {indexer.code.count(chr(10))}")
+    print(f"full rebuild:        {full * 1000:.2f} ms")
+    print(f"incremental (median): {timings[len(timings) // 2] * 1000:.3f} ms")
+    print(f"incremental (max):    {timings[-1] * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark: scope lookups in EnhancedReplaceTransformer.
+
+Renames a variable inside one function of generated modules of growing size,
+once with the node->scope maps recorded by ScopeBuilder and once with the
+previous linear scans over `index.scopes`, to show how both scale.
+
+Usage:
+    python benchmarks/bench_scope_lookup.py [--max-lines 20000] [--linear-max-lines 2500]
+"""
+
+import argparse
+import ast
+import time
+
+from generators import functions as generate_module
+from super_replace.core.autonomous_replacer import EnhancedReplaceTransformer, ScopeBuilder
+
+
+class LinearScanTransformer(EnhancedReplaceTransformer):
+    """The transformer with the previous O(#scopes) lookups, for comparison."""
+
+    def _find_scope_for_node(self, owner_node):
+        for sc in self.index.scopes:
+            if sc.node is owner_node:
+                return sc
+        return None
+
+    def _find_containing_function_scope(self, node):
+        return self._scan_for_containing_function_scope(node)
+
+
+def time_rename(code: str, transformer_cls) -> float:
+    tree = ast.parse(code)
+    builder = ScopeBuilder()
+    builder.visit(tree)
+    middle = len([s for s in builder.index.scopes if s.name.startswith("func_")]) // 2
+    start = time.perf_counter()
+    transformer = transformer_cls(
+        tree=tree,
+        index=builder.index,
+        target="value",
+        replacement="amount",
+        scope_filter="local",
+        target_functions=[f"func_{middle}"],
+    )
+    transformer.visit(tree)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--max-lines", type=int, default=20000)
+    parser.add_argument(
+        "--linear-max-lines", type=int, default=2500,
+        help="Largest module timed with linear scans (they are quadratic: ~90s at 5k lines)."
+    )
+    args = parser.parse_args()
+
+    sizes = []
+    lines = 1250
+    while lines <= args.max_lines:
+        sizes.append(lines)
+        lines *= 2
+
+    print(f"{'lines':>8} {'mapped (ms)':>12} {'linear (ms)':>12}")
+    for size in sizes:
+        code = generate_module(size)
+        mapped = time_rename(code, EnhancedReplaceTransformer)
+        linear = time_rename(code, LinearScanTransformer) if size <= args.linear_max_lines else None
+        linear_text = "-" if linear is None else f"{linear * 1000:.1f}"
+        print(f"{code.count(chr(10)):>8} {mapped * 1000:>12.1f} {linear_text:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Synthetic modules for the benchmarks.
+
+Each generator takes an approximate line count and returns valid Python source
+that stresses one part of the indexer: scope depth, comprehension and lambda
+scopes, or sheer size of a flat module.
+"""
+
+FUNCTION_TEMPLATE = '''
+def func_{i}(value, *args):
+    total = value
+    def helper_{i}(step):
+        nonlocal total
+        total += step
+        return total
+    items = [value * k for k in range(3)]
+    return helper_{i}(len(items)) + sum(map(lambda value: value + 1, items))
+'''
+
+
+def functions(lines: int) -> str:
+    """Functions with a closure, a comprehension and a lambda each."""
+    per_function = FUNCTION_TEMPLATE.count("\n")
+    return "".join(FUNCTION_TEMPLATE.format(i=i) for i in range(max(1, lines // per_function)))
+
+
+def deep_nesting(lines: int, depth: int = 60) -> str:
+    """Chains of nested functions, each reading names bound at every level above it."""
+    chunks = []
+    for chain in range(max(1, lines // (2 * depth + 1))):
+        out = []
+        for level in range(depth):
+            indent = "    " * level
+            out.append(f"{indent}def level_{chain}_{level}(arg_{level}):")
+            out.append(f"{indent}    value_{level} = arg_{level} + {'value_' + str(level - 1) if level else '0'}")
+        out.append("    " * depth + "return " + " + ".join(f"value_{level}" for level in range(0, depth, 7)))
+        chunks.append("\n".join(out))
+    return "\n\n".join(chunks) + "\n"
+
+
+def comprehensions(lines: int) -> str:
+    """Functions made of nested comprehensions, whose targets shadow outer names."""
+    body = []
+    for i in range(max(1, lines // 5)):
+        body.append(f"def comp_{i}(rows, x):")
+        body.append("    flat = [x for row in rows for x in row if x]")
+        body.append("    table = {x: [y * x for y in range(x)] for x in flat}")
+        body.append("    return sum(v for values in table.values() for v in values), {x % 7 for x in flat}")
+        body.append("")
+    return "\n".join(body)
+
+
+def lambdas(lines: int) -> str:
+    """Module-level and nested lambdas, including lambdas returning lambdas."""
+    body = []
+    for i in range(max(1, lines // 4)):
+        body.append(f"adder_{i} = lambda x, y=1: (lambda z: x + y + z)")
+        body.append(f"def apply_{i}(items, x):")
+        body.append(f"    return sorted(map(lambda item: adder_{i}(item)(x), items), key=lambda item: -item)")
+        body.append("")
+    return "\n".join(body)
+
+
+def flat(lines: int) -> str:
+    """A huge module of top-level assignments and calls, with no nested scopes."""
+    body = ["import os", "total = 0"]
+    for i in range(max(1, lines - 2)):
+        if i % 3 == 0:
+            body.append(f"name_{i} = os.path.join('a', str({i}))")
+        elif i % 3 == 1:
+            body.append(f"total = total + len(name_{i - 1})")
+        else:
+            body.append(f"print(name_{i - 2}, total)")
+    return "\n".join(body) + "\n"
+
+
+GENERATORS = {
+    "functions": functions,
+    "deep_nesting": deep_nesting,
+    "comprehensions": comprehensions,
+    "lambdas": lambdas,
+    "flat": flat,
+}
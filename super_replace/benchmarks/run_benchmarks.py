@@ -0,0 +1,170 @@
+"""
+Benchmark suite: parse, index, transform and unparse throughput.
+
+Runs every phase of a rename separately over synthetic modules (see
+generators.py) and real-world stdlib files, reporting the median time and the
+peak traced memory of each phase. Results can be saved as a baseline and later
+runs compared against it to catch regressions.
+
+Usage:
+    python benchmarks/run_benchmarks.py [--lines 5000] [--repeat 5] [--only flat,stdlib:ast.py]
+    python benchmarks/run_benchmarks.py --save-baseline benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --compare benchmarks/baseline.json [--tolerance 0.25]
+"""
+
+import argparse
+import ast
+import gc
+import json
+import platform
+import statistics
+import sys
+import sysconfig
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from generators import GENERATORS
+from super_replace.core.autonomous_replacer import ScopeBuilder, apply_rename, tree_to_source
+
+STDLIB_FILES = ["ast.py", "argparse.py", "inspect.py", "typing.py", "collections/__init__.py"]
+PHASES = ("parse", "index", "transform", "unparse")
+# Differences below this are noise, whatever the relative change.
+MIN_REGRESSION_SECONDS = 0.002
+
+
+def load_corpora(lines: int, only: List[str]) -> Dict[str, str]:
+    corpora = {name: generate(lines) for name, generate in GENERATORS.items()}
+    stdlib = Path(sysconfig.get_paths()["stdlib"])
+    for relative in STDLIB_FILES:
+        path = stdlib / relative
+        if path.exists():
+            corpora[f"stdlib:{relative}"] = path.read_text(encoding="utf-8")
+    if only:
+        corpora = {name: code for name, code in corpora.items() if name in only}
+    return corpora
+
+
+def pick_target(index) -> str:
+    """The bound name with the most uses, so the transform phase has real work to do."""
+    def weight(item: Tuple[str, Dict]) -> Tuple[int, str]:
+        name, keys = item
+        return sum(len(index.uses.get(key, ())) for key in keys), name
+    return max(index.names.items(), key=weight)[0]
+
+
+def run_phases(code: str, target: str) -> Dict[str, Callable[[], None]]:
+    """
+    Returns one callable per phase. Each phase works on fresh inputs prepared
+    outside the timed region, since the transform renames the tree in place.
+    """
+    state = {}
+
+    def parse():
+        state["tree"] = ast.parse(code)
+
+    def index():
+        builder = ScopeBuilder()
+        builder.visit(state["tree"])
+        state["index"] = builder.index
+
+    def transform():
+        state["tree"], _ = apply_rename(state["tree"], state["index"], target, f"{target}_renamed", {})
+
+    def unparse():
+        tree_to_source(state["tree"])
+
+    return {"parse": parse, "index": index, "transform": transform, "unparse": unparse}
+
+
+def measure(code: str, repeat: int) -> Tuple[str, Dict[str, Dict[str, float]]]:
+    tree = ast.parse(code)
+    builder = ScopeBuilder()
+    builder.visit(tree)
+    target = pick_target(builder.index)
+
+    seconds: Dict[str, List[float]] = {phase: [] for phase in PHASES}
+    for _ in range(repeat):
+        phases = run_phases(code, target)
+        for phase in PHASES:
+            gc.collect()
+            started = time.perf_counter()
+            phases[phase]()
+            seconds[phase].append(time.perf_counter() - started)
+
+    # Memory is traced in a separate run: tracemalloc slows allocation-heavy code down a lot.
+    peaks = {}
+    phases = run_phases(code, target)
+    for phase in PHASES:
+        gc.collect()
+        tracemalloc.start()
+        phases[phase]()
+        peaks[phase] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return target, {
+        phase: {"seconds": statistics.median(seconds[phase]), "peak_kib": peaks[phase] / 1024}
+        for phase in PHASES
+    }
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    regressions = []
+    for corpus, phases in results.items():
+        for phase, current in phases["phases"].items():
+            previous = baseline.get(corpus, {}).get("phases", {}).get(phase)
+            if previous is None:
+                continue
+            for metric, floor in (("seconds", MIN_REGRESSION_SECONDS), ("peak_kib", 64)):
+                old, new = previous[metric], current[metric]
+                if new > old * (1 + tolerance) and new - old > floor:
+                    regressions.append(f"{corpus} {phase} {metric}: {old:.4g} -> {new:.4g} (+{(new / old - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lines", type=int, default=5000, help="Approximate size of the synthetic modules.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", default="", help="Comma-separated corpus names to run.")
+    parser.add_argument("--save-baseline", type=Path)
+    parser.add_argument("--compare", type=Path, help="Baseline file to check the results against.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown (default 25%%).")
+    args = parser.parse_args()
+
+    corpora = load_corpora(args.lines, [name for name in args.only.split(",") if name])
+    results = {}
+    print(f"{'corpus':<32}{'lines':>7}  " + "".join(f"{phase + ' ms':>13}{'KiB':>9}" for phase in PHASES))
+    for name, code in corpora.items():
+        target, phases = measure(code, args.repeat)
+        results[name] = {"lines": code.count("\n"), "target": target, "phases": phases}
+        cells = "".join(f"{p['seconds'] * 1000:>13.2f}{p['peak_kib']:>9.0f}" for p in phases.values())
+        print(f"{name:<32}{code.count(chr(10)):>7}  {cells}")
+
+    if args.save_baseline:
+        args.save_baseline.write_text(json.dumps({
+            "python": platform.python_version(),
+            "lines": args.lines,
+            "results": results,
+        }, indent=2) + "\n")
+        print(f"\nBaseline written to {args.save_baseline}")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        if baseline.get("python") != platform.python_version():
+            print(f"\nNote: baseline was recorded with Python {baseline.get('python')}", file=sys.stderr)
+        if baseline.get("lines") != args.lines:
+            print(f"\nNote: baseline synthetic modules have {baseline.get('lines')} lines, not {args.lines}", file=sys.stderr)
+        regressions = compare(results, baseline["results"], args.tolerance)
+        if regressions:
+            print("\nRegressions:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("\nNo regressions against the baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,16 @@
 import click
 import difflib
+import json
+import time
 from pathlib import Path
 
-from super_replace.core.autonomous_replacer import super_replace_autonomous
-from super_replace.utils.formatter import format_code_with_black, lint_code_with_ruff
+from super_replace.core.autonomous_replacer import build_index, rename_edits, super_replace_autonomous
+from super_replace.core.batch_replacer import RenameConflictError, normalize_renames, super_replace_batch
+from super_replace.core.index_cache import CACHE_DIR_ENV_VAR, IndexCache
+from super_replace.core.project import super_replace_project
+from super_replace.core.source_patcher import apply_text_edits, iter_unified_diff
+from super_replace.utils.files import read_source
+from super_replace.utils.formatter import black_backend as resolved_black_backend, format_code_with_black, lint_code_with_ruff
 
 @click.group()
 def cli():
@@ -21,6 +28,10 @@ def cli():
 @click.option('--format', is_flag=True, help='Format the output code using Black.')
 @click.option('--lint', is_flag=True, help='Lint the output code using Ruff and display issues.')
 @click.option('--dry-run', is_flag=True, help='Show changes without modifying the file.')
+@click.option('--preserve-formatting', is_flag=True, help='Patch renamed identifiers in place instead of regenerating the code.')
+@click.option('--cache-dir', type=click.Path(file_okay=False, path_type=Path), envvar=CACHE_DIR_ENV_VAR, help='Directory of the persistent index cache.')
+@click.option('--black-backend', type=click.Choice(['auto', 'api', 'subprocess']), default='auto', help='Run Black through its Python API or as a subprocess (auto prefers the API).')
+@click.option('--timings', is_flag=True, help='Print the time spent replacing, formatting and linting to stderr.')
 def autonomous(
     target: str,
     replacement: str,
@@ -31,7 +42,11 @@ def autonomous(
     scope: str,
     format: bool,
     lint: bool,
-    dry_run: bool
+    dry_run: bool,
+    preserve_formatting: bool,
+    cache_dir: Path | None,
+    black_backend: str,
+    timings: bool
 ):
     """Perform autonomous (rule-based) code replacement.
 
@@ -50,14 +65,34 @@ def autonomous(
     elif code_string:
         original_code = code_string
 
-    context_rules = {'functions': list(functions), 'scope': scope}
-    modified_code = super_replace_autonomous(original_code, target, replacement, context_rules)
+    context_rules = {'functions': list(functions), 'scope': scope, 'preserve_formatting': preserve_formatting}
+    cache = IndexCache(cache_dir) if cache_dir else None
+    step_timings = {}
+    started = time.perf_counter()
+    if dry_run and preserve_formatting and not (format or lint):
+        # The diff follows from the edit list alone: hunks are printed as they are
+        # computed and the modified code is never built.
+        edits = rename_edits(original_code, target, replacement, context_rules, cache=cache)
+        click.echo("\n--- Dry Run: Proposed Changes (Diff) ---")
+        for hunk in iter_unified_diff(original_code, edits):
+            click.echo(hunk, nl=False)
+        click.echo("----------------------------------------")
+        step_timings['replace'] = time.perf_counter() - started
+        if timings:
+            click.echo(f"Timings: replace={step_timings['replace'] * 1000:.1f}ms", err=True)
+        return
+    modified_code = super_replace_autonomous(original_code, target, replacement, context_rules, cache=cache)
+    step_timings['replace'] = time.perf_counter() - started
 
     if format:
-        modified_code = format_code_with_black(modified_code)
+        modified_code = format_code_with_black(
+            modified_code, timings=step_timings, backend=black_backend, filename=str(input_file) if input_file else None
+        )
 
     if lint:
-        lint_output = lint_code_with_ruff(modified_code)
+        lint_output = lint_code_with_ruff(
+            modified_code, timings=step_timings, filename=str(input_file) if input_file else "code.py"
+        )
         if lint_output:
             click.echo("\n--- Ruff Linting Issues ---")
             click.echo(lint_output)
@@ -65,6 +100,76 @@ def autonomous(
         else:
             click.echo("\n--- Ruff Linting: No issues found ---")
 
+    if timings:
+        detail = " ".join(f"{step}={seconds * 1000:.1f}ms" for step, seconds in step_timings.items())
+        backend_note = f" (black: {resolved_black_backend(black_backend)})" if format else ""
+        click.echo(f"Timings: {detail}{backend_note}", err=True)
+
+    if dry_run:
+        click.echo("\n--- Dry Run: Proposed Changes (Diff) ---")
+        diff = difflib.unified_diff(
+            original_code.splitlines(keepends=True),
+            modified_code.splitlines(keepends=True),
+            fromfile='a/code',
+            tofile='b/code'
+        )
+        click.echo(''.join(diff))
+        click.echo("----------------------------------------")
+    elif output_file:
+        output_file.write_text(modified_code)
+        click.echo(f"Modified code written to {output_file}")
+    else:
+        click.echo(modified_code)
+
+@cli.command()
+@click.argument('code_string', required=False)
+@click.option('--rename', '-r', 'renames', multiple=True, metavar='TARGET=REPLACEMENT', help='A rename to apply (can be repeated).')
+@click.option('--renames-file', type=click.Path(exists=True, dir_okay=False, path_type=Path), help='JSON file mapping targets to replacements or to {"replacement", "scope", "functions"} objects.')
+@click.option('--input-file', '-i', type=click.Path(exists=True, dir_okay=False, path_type=Path), help='Path to the input Python file.')
+@click.option('--output-file', '-o', type=click.Path(dir_okay=False, path_type=Path), help='Path to the output file. If not provided, output is printed to stdout.')
+@click.option('--functions', '-f', multiple=True, help='Default functions to apply replacements within.')
+@click.option('--scope', type=click.Choice(['local', 'global', 'class'], case_sensitive=False), default='local', help='Default scope for replacements.')
+@click.option('--preserve-formatting', is_flag=True, help='Patch renamed identifiers in place instead of regenerating the code.')
+@click.option('--dry-run', is_flag=True, help='Show changes without modifying the file.')
+def batch(
+    code_string: str | None,
+    renames: tuple,
+    renames_file: Path | None,
+    input_file: Path | None,
+    output_file: Path | None,
+    functions: tuple,
+    scope: str,
+    preserve_formatting: bool,
+    dry_run: bool
+):
+    """Apply many renames with a single parse and traversal.
+
+    CODE_STRING: The code string to modify. Use this OR --input-file.
+    """
+    if code_string and input_file:
+        raise click.BadParameter("Cannot specify both CODE_STRING and --input-file.")
+    if not (code_string or input_file):
+        raise click.BadParameter("Must specify either CODE_STRING or --input-file.")
+
+    rename_entries = []
+    if renames_file:
+        loaded = json.loads(renames_file.read_text())
+        rename_entries.extend(normalize_renames(loaded, {'functions': list(functions), 'scope': scope}))
+    for rename in renames:
+        target, sep, replacement = rename.partition('=')
+        if not sep or not target or not replacement:
+            raise click.BadParameter(f"Expected TARGET=REPLACEMENT, got '{rename}'.", param_hint='--rename')
+        rename_entries.append({'target': target, 'replacement': replacement})
+    if not rename_entries:
+        raise click.BadParameter("Specify at least one --rename or a --renames-file.")
+
+    original_code = input_file.read_text() if input_file else code_string
+    context_rules = {'functions': list(functions), 'scope': scope, 'preserve_formatting': preserve_formatting}
+    try:
+        modified_code = super_replace_batch(original_code, rename_entries, context_rules)
+    except RenameConflictError as e:
+        raise click.ClickException(f"Conflicting renames: {e}")
+
     if dry_run:
         click.echo("\n--- Dry Run: Proposed Changes (Diff) ---")
         diff = difflib.unified_diff(
@@ -81,5 +186,391 @@ def autonomous(
     else:
         click.echo(modified_code)
 
+def _report_file_results(results, dry_run: bool) -> None:
+    """Prints one line per processed file, with its diff in dry runs and its lint issues."""
+    for result in results:
+        if result.skipped:
+            continue
+        if result.error:
+            click.echo(f"ERROR    {result.path}: {result.error}", err=True)
+            continue
+        status = "changed" if result.changed else "unchanged"
+        detail = " ".join(f"{step}={seconds * 1000:.1f}ms" for step, seconds in result.timings.items())
+        click.echo(f"{status:<9}{result.path} ({result.elapsed * 1000:.1f} ms: {detail})")
+        if dry_run and result.new_code is not None:
+            diff = difflib.unified_diff(
+                read_source(result.path).splitlines(keepends=True),
+                result.new_code.splitlines(keepends=True),
+                fromfile=f"a/{result.path}",
+                tofile=f"b/{result.path}"
+            )
+            click.echo(''.join(diff))
+        if result.lint_output:
+            click.echo(result.lint_output, nl=False)
+
+
+def _report_summary(results, wall_time: float) -> None:
+    changed = sum(1 for r in results if r.changed)
+    errors = sum(1 for r in results if r.error)
+    cpu_time = sum(r.elapsed for r in results)
+    click.echo(
+        f"\n{len(results)} files scanned, {changed} changed, {errors} errors "
+        f"in {wall_time:.2f}s (cumulative per-file time {cpu_time:.2f}s)"
+    )
+
+@cli.command()
+@click.argument('target')
+@click.argument('replacement')
+@click.argument('path', type=click.Path(exists=True, path_type=Path))
+@click.option('--functions', '-f', multiple=True, help='Specify functions to apply replacement within.')
+@click.option('--scope', type=click.Choice(['local', 'global', 'class'], case_sensitive=False), default='local', help='Specify the scope for replacement.')
+@click.option('--jobs', '-j', type=click.IntRange(min=1), default=None, help='Number of worker processes (defaults to the number of CPUs).')
+@click.option('--exclude', multiple=True, help='Directory name to skip (can be repeated).')
+@click.option('--dry-run', is_flag=True, help='Show changes without modifying the files.')
+@click.option('--preserve-formatting', is_flag=True, help='Patch renamed identifiers in place instead of regenerating the code.')
+@click.option('--cache-dir', type=click.Path(file_okay=False, path_type=Path), envvar=CACHE_DIR_ENV_VAR, help='Directory of the persistent index cache.')
+@click.option('--format', is_flag=True, help='Format the changed files using Black.')
+@click.option('--lint', is_flag=True, help='Lint the changed files using Ruff (one run for all files) and display issues.')
+@click.option('--black-backend', type=click.Choice(['auto', 'api', 'subprocess']), default='auto', help='Run Black through its Python API in the workers or as one subprocess for all files (auto prefers the API).')
+@click.option('--changed-since', metavar='REF', help='Only process files changed since this git revision, and the files importing them.')
+def project(
+    target: str,
+    replacement: str,
+    path: Path,
+    functions: tuple,
+    scope: str,
+    jobs: int | None,
+    exclude: tuple,
+    dry_run: bool,
+    preserve_formatting: bool,
+    cache_dir: Path | None,
+    format: bool,
+    lint: bool,
+    black_backend: str,
+    changed_since: str | None
+):
+    """Perform autonomous replacement in every Python file under PATH.
+
+    TARGET: The string to be replaced.
+    REPLACEMENT: The string to replace with.
+    PATH: The directory (or file) to process.
+    """
+    from super_replace.utils.files import DEFAULT_EXCLUDED_DIRS
+
+    context_rules = {'functions': list(functions), 'scope': scope, 'preserve_formatting': preserve_formatting}
+    excluded_dirs = DEFAULT_EXCLUDED_DIRS | set(exclude)
+    batch_timings = {}
+    started = time.perf_counter()
+    paths = None
+    if changed_since:
+        from super_replace.core.cross_module import find_importers
+        from super_replace.utils.git import GitError, changed_python_files
+
+        if not path.is_dir():
+            raise click.BadParameter("--changed-since needs PATH to be a directory.", param_hint='PATH')
+        try:
+            changed = changed_python_files(path, changed_since, excluded_dirs)
+        except GitError as e:
+            raise click.ClickException(str(e))
+        importers = find_importers(path, changed, excluded_dirs=excluded_dirs, cache_dir=cache_dir)
+        paths = sorted(set(changed) | set(importers))
+        click.echo(f"Changed since {changed_since}: {len(changed)} files, {len(importers)} importing files")
+    results = super_replace_project(
+        path, target, replacement, context_rules,
+        jobs=jobs, dry_run=dry_run, excluded_dirs=excluded_dirs, paths=paths, cache_dir=cache_dir,
+        format=format, lint=lint, black_backend_name=black_backend, batch_timings=batch_timings
+    )
+    wall_time = time.perf_counter() - started
+
+    _report_file_results(results, dry_run)
+    if lint:
+        lint_issues = sum(len(r.lint_output.splitlines()) for r in results if r.lint_output)
+        click.echo(f"\n--- Ruff Linting: {lint_issues} issues in changed files ---")
+    _report_summary(results, wall_time)
+    if batch_timings:
+        detail = " ".join(f"{step}={seconds * 1000:.1f}ms" for step, seconds in batch_timings.items())
+        click.echo(f"Batch stages: {detail}")
+
+@cli.command('rename-symbol')
+@click.argument('symbol', metavar='MODULE:NAME')
+@click.argument('replacement')
+@click.argument('root', type=click.Path(exists=True, file_okay=False, path_type=Path))
+@click.option('--jobs', '-j', type=click.IntRange(min=1), default=None, help='Number of worker processes (defaults to the number of CPUs).')
+@click.option('--exclude', multiple=True, help='Directory name to skip (can be repeated).')
+@click.option('--dry-run', is_flag=True, help='Show changes without modifying the files.')
+@click.option('--cache-dir', type=click.Path(file_okay=False, path_type=Path), envvar=CACHE_DIR_ENV_VAR, help='Directory of the persistent index cache.')
+def rename_symbol(
+    symbol: str,
+    replacement: str,
+    root: Path,
+    jobs: int | None,
+    exclude: tuple,
+    dry_run: bool,
+    cache_dir: Path | None
+):
+    """Rename a module-level function, class or variable in its module and all importers.
+
+    MODULE:NAME: The symbol, e.g. pkg.utils:helper (module names are relative to ROOT).
+    REPLACEMENT: The new name.
+    ROOT: The directory holding the top-level packages (e.g. src).
+    """
+    from super_replace.core.cross_module import rename_symbol_in_project
+    from super_replace.utils.files import DEFAULT_EXCLUDED_DIRS
+
+    module, sep, name = symbol.partition(':')
+    if not sep or not module or not name:
+        raise click.BadParameter(f"Expected MODULE:NAME, got '{symbol}'.", param_hint='MODULE:NAME')
+    started = time.perf_counter()
+    try:
+        results = rename_symbol_in_project(
+            root, module, name, replacement,
+            jobs=jobs, dry_run=dry_run, excluded_dirs=DEFAULT_EXCLUDED_DIRS | set(exclude), cache_dir=cache_dir
+        )
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    _report_file_results(results, dry_run)
+    _report_summary(results, time.perf_counter() - started)
+
+@cli.command()
+@click.argument('name')
+@click.argument('root', type=click.Path(exists=True, file_okay=False, path_type=Path), default='.')
+@click.option('--kind', 'kinds', type=click.Choice(['definition', 'use', 'attribute']), multiple=True, help='Only report this kind of site (can be repeated).')
+@click.option('--scope', help='Only report sites in this scope path (e.g. Widget.grow) or nested in it.')
+@click.option('--jobs', '-j', type=click.IntRange(min=1), default=None, help='Number of worker processes (defaults to the number of CPUs).')
+@click.option('--exclude', multiple=True, help='Directory name to skip (can be repeated).')
+@click.option('--cache-dir', type=click.Path(file_okay=False, path_type=Path), envvar=CACHE_DIR_ENV_VAR, help='Directory of the persistent index cache (holds the usage database).')
+@click.option('--json', 'as_json', is_flag=True, help='Print the sites as JSON.')
+def usages(
+    name: str,
+    root: Path,
+    kinds: tuple,
+    scope: str | None,
+    jobs: int | None,
+    exclude: tuple,
+    cache_dir: Path | None,
+    as_json: bool
+):
+    """List every definition and use of a name below a directory.
+
+    NAME: The name to look up.
+    ROOT: The project directory (defaults to the current directory).
+    """
+    import dataclasses
+    import os
+    from super_replace.core.usages import UsageIndex
+    from super_replace.utils.files import DEFAULT_EXCLUDED_DIRS
+
+    started = time.perf_counter()
+    with UsageIndex(cache_dir / "usages.sqlite" if cache_dir else None) as usage_index:
+        stats = usage_index.refresh(root, jobs=jobs, excluded_dirs=DEFAULT_EXCLUDED_DIRS | set(exclude))
+        found = usage_index.query(name, root, kinds, scope)
+    elapsed = time.perf_counter() - started
+    if as_json:
+        click.echo(json.dumps([dataclasses.asdict(usage) for usage in found], indent=2))
+    else:
+        for usage in found:
+            click.echo(f"{os.path.relpath(usage.path)}:{usage.line}:{usage.column}: {usage.kind} in {usage.scope}")
+    click.echo(
+        f"{len(found)} sites in {len({usage.path for usage in found})} files "
+        f"({stats.indexed} of {stats.files} files re-indexed, {stats.errors} unreadable; {elapsed * 1000:.0f}ms)",
+        err=True,
+    )
+
+@cli.command('rename-member')
+@click.argument('member', metavar='CLASS.MEMBER')
+@click.argument('replacement')
+@click.argument('code_string', required=False)
+@click.option('--input-file', '-i', type=click.Path(exists=True, dir_okay=False, path_type=Path), help='Path to the input Python file.')
+@click.option('--output-file', '-o', type=click.Path(dir_okay=False, path_type=Path), help='Path to the output file. If not provided, output is printed to stdout.')
+@click.option('--include-unresolved', is_flag=True, help='Also rename accesses on receivers of unknown type (obj.MEMBER).')
+@click.option('--dry-run', is_flag=True, help='Show changes without modifying the file.')
+@click.option('--cache-dir', type=click.Path(file_okay=False, path_type=Path), envvar=CACHE_DIR_ENV_VAR, help='Directory of the persistent index cache.')
+def rename_member_command(
+    member: str,
+    replacement: str,
+    code_string: str | None,
+    input_file: Path | None,
+    output_file: Path | None,
+    include_unresolved: bool,
+    dry_run: bool,
+    cache_dir: Path | None
+):
+    """Rename a method, class attribute or instance attribute across its class hierarchy.
+
+    CLASS.MEMBER: The member, e.g. Widget.size.
+    REPLACEMENT: The new name.
+    CODE_STRING: The code string to modify. Use this OR --input-file.
+    """
+    from super_replace.core.members import edits_for_member_references, find_member_references
+
+    if code_string and input_file:
+        raise click.BadParameter("Cannot specify both CODE_STRING and --input-file.")
+    if not (code_string or input_file):
+        raise click.BadParameter("Must specify either CODE_STRING or --input-file.")
+    class_name, sep, name = member.rpartition('.')
+    if not sep or not class_name or not name:
+        raise click.BadParameter(f"Expected CLASS.MEMBER, got '{member}'.", param_hint='CLASS.MEMBER')
+
+    original_code = input_file.read_text() if input_file else code_string
+    cache = IndexCache(cache_dir) if cache_dir else None
+    _, index = build_index(original_code, cache)
+    try:
+        references = find_member_references(index, class_name, name)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    edits = edits_for_member_references(original_code, references, name, replacement, include_unresolved)
+    if not include_unresolved:
+        unresolved = references.unresolved
+        if unresolved:
+            lines = ", ".join(str(node.lineno) for node in unresolved)
+            click.echo(
+                f"Left {len(unresolved)} access(es) on receivers of unknown type unchanged (lines {lines}); "
+                "use --include-unresolved to rename them too.",
+                err=True,
+            )
+
+    if dry_run:
+        click.echo("\n--- Dry Run: Proposed Changes (Diff) ---")
+        for hunk in iter_unified_diff(original_code, edits):
+            click.echo(hunk, nl=False)
+        click.echo("----------------------------------------")
+        return
+    modified_code = apply_text_edits(original_code, edits)
+    if output_file:
+        output_file.write_text(modified_code)
+        click.echo(f"Modified code written to {output_file}")
+    else:
+        click.echo(modified_code)
+
+@cli.command()
+@click.argument('path', type=click.Path(exists=True, file_okay=False, path_type=Path))
+@click.option('--rename', '-r', 'renames', multiple=True, metavar='TARGET=REPLACEMENT', help='A rename to apply (can be repeated).')
+@click.option('--renames-file', type=click.Path(exists=True, dir_okay=False, path_type=Path), help='JSON file mapping targets to replacements or to {"replacement", "scope", "functions"} objects.')
+@click.option('--rules', 'rules_file', type=click.Path(exists=True, dir_okay=False, path_type=Path), help='TOML, YAML or JSON rule file (see apply-rules).')
+@click.option('--functions', '-f', multiple=True, help='Default functions to apply replacements within.')
+@click.option('--scope', type=click.Choice(['local', 'global', 'class'], case_sensitive=False), default='local', help='Default scope for replacements.')
+@click.option('--exclude', multiple=True, help='Directory name to skip (can be repeated).')
+@click.option('--backend', type=click.Choice(['auto', 'inotify', 'poll']), default='auto', help='How to detect saves (auto uses inotify where available and polls otherwise).')
+@click.option('--debounce', type=click.FloatRange(min=0), default=0.3, show_default=True, help='Seconds without saves that end a burst.')
+@click.option('--poll-interval', type=click.FloatRange(min=0.05), default=1.0, show_default=True, help='Seconds between scans of the polling backend.')
+@click.option('--initial', is_flag=True, help='Apply the renames to every file once before watching.')
+@click.option('--dry-run', is_flag=True, help='Show changes without modifying the files.')
+def watch(
+    path: Path,
+    renames: tuple,
+    renames_file: Path | None,
+    rules_file: Path | None,
+    functions: tuple,
+    scope: str,
+    exclude: tuple,
+    backend: str,
+    debounce: float,
+    poll_interval: float,
+    initial: bool,
+    dry_run: bool
+):
+    """Re-apply renames to the Python files under PATH whenever they are saved.
+
+    Runs until interrupted. Renames patch the saved files in place, keeping their formatting.
+    """
+    from super_replace.core.watch import watch_and_apply
+    from super_replace.utils.files import DEFAULT_EXCLUDED_DIRS
+
+    defaults = {'functions': list(functions), 'scope': scope}
+    specs = []
+    if rules_file:
+        from super_replace.core.rules import RuleFileError, load_rules
+
+        try:
+            specs.extend(load_rules(rules_file).specs)
+        except RuleFileError as e:
+            raise click.ClickException(str(e))
+    if renames_file:
+        specs.extend(normalize_renames(json.loads(renames_file.read_text()), defaults))
+    for rename in renames:
+        target, sep, replacement = rename.partition('=')
+        if not sep or not target or not replacement:
+            raise click.BadParameter(f"Expected TARGET=REPLACEMENT, got '{rename}'.", param_hint='--rename')
+        specs.extend(normalize_renames([{'target': target, 'replacement': replacement}], defaults))
+    if not specs:
+        raise click.BadParameter("Specify at least one --rename, --renames-file or --rules file.")
+
+    click.echo(f"Watching {path} for {len(specs)} renames (Ctrl-C to stop)", err=True)
+    try:
+        watch_and_apply(
+            path, specs, lambda results: _report_file_results(results, dry_run),
+            excluded_dirs=DEFAULT_EXCLUDED_DIRS | set(exclude), backend=backend,
+            debounce=debounce, poll_interval=poll_interval, dry_run=dry_run, initial=initial
+        )
+    except OSError as e:
+        raise click.ClickException(f"Cannot watch {path}: {e}")
+    except KeyboardInterrupt:
+        pass
+
+@cli.command('apply-rules')
+@click.argument('rules_file', type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.argument('path', type=click.Path(exists=True, path_type=Path))
+@click.option('--jobs', '-j', type=click.IntRange(min=1), default=None, help='Number of worker processes (defaults to the number of CPUs).')
+@click.option('--exclude', multiple=True, help='Directory name to skip (can be repeated).')
+@click.option('--dry-run', is_flag=True, help='Show changes without modifying the files.')
+@click.option('--preserve-formatting', is_flag=True, help='Patch renamed identifiers in place, whatever the rule file says.')
+@click.option('--cache-dir', type=click.Path(file_okay=False, path_type=Path), envvar=CACHE_DIR_ENV_VAR, help='Directory of the persistent index cache.')
+def apply_rules_command(
+    rules_file: Path,
+    path: Path,
+    jobs: int | None,
+    exclude: tuple,
+    dry_run: bool,
+    preserve_formatting: bool,
+    cache_dir: Path | None
+):
+    """Apply every rename of a rule file to the Python files under PATH in one pass.
+
+    RULES_FILE: A TOML, YAML or JSON file with a `rules` list of
+    {name, target, replacement, scope, functions} entries and optional `defaults`.
+    PATH: The directory (or file) to process.
+    """
+    from super_replace.core.rules import RuleFileError, load_rules, run_rules
+    from super_replace.utils.files import DEFAULT_EXCLUDED_DIRS
+
+    try:
+        rule_set = load_rules(rules_file)
+    except RuleFileError as e:
+        raise click.ClickException(str(e))
+    if preserve_formatting:
+        rule_set.preserve_formatting = True
+    started = time.perf_counter()
+    results, stats = run_rules(
+        path, rule_set, jobs=jobs, dry_run=dry_run, excluded_dirs=DEFAULT_EXCLUDED_DIRS | set(exclude), cache_dir=cache_dir
+    )
+    wall_time = time.perf_counter() - started
+
+    _report_file_results(results, dry_run)
+    _report_summary(results, wall_time)
+    width = max(len(rule.name) for rule in stats)
+    click.echo(f"\n{'Rule':<{width}}  {'files':>6}  {'hits':>6}  {'select':>9}")
+    for rule in stats:
+        click.echo(f"{rule.name:<{width}}  {rule.files:>6}  {rule.hits:>6}  {rule.seconds * 1000:>7.1f}ms")
+
+@cli.command()
+@click.option('--socket', 'socket_path', type=click.Path(dir_okay=False), envvar='SUPER_REPLACE_SOCKET', help='Path of the Unix socket to listen on.')
+@click.option('--cache-dir', type=click.Path(file_okay=False, path_type=Path), envvar=CACHE_DIR_ENV_VAR, help='Directory of the persistent index cache.')
+def serve(socket_path: str | None, cache_dir: Path | None):
+    """Run a long-lived daemon answering requests over a Unix socket.
+
+    Clients connect with super_replace.client.DaemonClient (or
+    `python -m super_replace.client`) and send rename, batch_rename,
+    binding_info and check_safety requests as JSON-RPC.
+    """
+    from super_replace.client import default_socket_path
+    from super_replace.core.daemon import serve as serve_forever
+
+    socket_path = socket_path or default_socket_path()
+    click.echo(f"super_replace daemon listening on {socket_path}", err=True)
+    try:
+        serve_forever(socket_path, cache_dir)
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+
 if __name__ == '__main__':
     cli()
\ No newline at end of file
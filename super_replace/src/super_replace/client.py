@@ -0,0 +1,164 @@
+"""
+Module: client - thin client for the super_replace daemon
+
+Talks to a running `super_replace serve` process over its Unix socket using
+newline-delimited JSON-RPC 2.0. Only the standard library is imported here so
+that short-lived tools pay no import cost for the replacer itself.
+
+    from super_replace.client import DaemonClient
+
+    with DaemonClient() as client:
+        new_code = client.rename(code, "x", "new_x", {"scope": "local"})
+"""
+
+from __future__ import annotations
+import itertools
+import json
+import os
+import socket
+import sys
+import tempfile
+from typing import Any, Optional
+
+SOCKET_ENV_VAR = "SUPER_REPLACE_SOCKET"
+
+
+def default_socket_path() -> str:
+    env_path = os.environ.get(SOCKET_ENV_VAR)
+    if env_path:
+        return env_path
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return os.path.join(runtime_dir, f"super_replace-{os.getuid()}.sock")
+
+
+class DaemonError(RuntimeError):
+    """Raised when the daemon answers a request with an error."""
+
+    def __init__(self, code: int, message: str, data: Any = None) -> None:
+        super().__init__(message)
+        self.code = code
+        self.data = data
+
+
+class DaemonClient:
+    """
+    A connection to the daemon. Requests are sent one at a time over a single socket.
+    """
+
+    def __init__(self, socket_path: Optional[str] = None, timeout: Optional[float] = 30.0) -> None:
+        self.socket_path = socket_path or default_socket_path()
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.settimeout(timeout)
+        try:
+            self._sock.connect(self.socket_path)
+        except OSError:
+            self._sock.close()
+            raise
+        self._reader = self._sock.makefile("rb")
+        self._ids = itertools.count(1)
+
+    def __enter__(self) -> "DaemonClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._reader.close()
+        self._sock.close()
+
+    def call(self, method: str, **params: Any) -> Any:
+        """
+        Sends one request and returns its result.
+
+        Raises:
+            DaemonError: If the daemon reports an error.
+            ConnectionError: If the daemon closed the connection.
+        """
+        request_id = next(self._ids)
+        request = {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}
+        self._sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("The super_replace daemon closed the connection")
+        response = json.loads(line)
+        error = response.get("error")
+        if error is not None:
+            raise DaemonError(error.get("code", 0), error.get("message", ""), error.get("data"))
+        return response.get("result")
+
+    def ping(self) -> dict:
+        return self.call("ping")
+
+    def rename(self, code: str, target: str, replacement: str, context_rules: Optional[dict] = None) -> str:
+        return self.call("rename", code=code, target=target, replacement=replacement,
+                         context_rules=context_rules or {})["code"]
+
+    def rename_file(self, path: str, target: str, replacement: str, context_rules: Optional[dict] = None,
+                    write: bool = True) -> dict:
+        """
+        Renames inside a file read by the daemon. Returns `{"code": ..., "changed": ...}`.
+        """
+        return self.call("rename", path=os.path.abspath(path), target=target, replacement=replacement,
+                         context_rules=context_rules or {}, write=write)
+
+    def batch_rename(self, code: str, renames: Any, context_rules: Optional[dict] = None) -> str:
+        return self.call("batch_rename", code=code, renames=renames, context_rules=context_rules or {})["code"]
+
+    def binding_info(self, code: str, target: str) -> dict:
+        return self.call("binding_info", code=code, target=target)
+
+    def check_rename_safety(self, code: str, target: str, replacement: str,
+                            context_rules: Optional[dict] = None) -> tuple[bool, list[str]]:
+        result = self.call("check_safety", code=code, target=target, replacement=replacement,
+                           context_rules=context_rules or {})
+        return result["safe"], result["issues"]
+
+    def stats(self) -> dict:
+        return self.call("stats")
+
+    def shutdown(self) -> None:
+        self.call("shutdown")
+
+
+def main(argv: Optional[list] = None) -> int:
+    """
+    Minimal command line front end: `python -m super_replace.client rename TARGET REPLACEMENT < code.py`.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m super_replace.client", description="Send a request to the super_replace daemon.")
+    parser.add_argument("--socket", default=None, help="Path of the daemon socket.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    rename = commands.add_parser("rename", help="Rename TARGET to REPLACEMENT in the code read from stdin.")
+    rename.add_argument("target")
+    rename.add_argument("replacement")
+    rename.add_argument("--scope", default="local", choices=["local", "global", "class"])
+    rename.add_argument("--functions", "-f", action="append", default=[])
+    rename.add_argument("--preserve-formatting", action="store_true")
+    commands.add_parser("ping", help="Check that the daemon is running.")
+    commands.add_parser("stats", help="Show request and cache counters.")
+    commands.add_parser("shutdown", help="Stop the daemon.")
+    args = parser.parse_args(argv)
+
+    try:
+        with DaemonClient(args.socket) as client:
+            if args.command == "rename":
+                context_rules = {"scope": args.scope, "functions": args.functions,
+                                 "preserve_formatting": args.preserve_formatting}
+                sys.stdout.write(client.rename(sys.stdin.read(), args.target, args.replacement, context_rules))
+            elif args.command == "shutdown":
+                client.shutdown()
+            else:
+                print(json.dumps(client.call(args.command), indent=2))
+    except DaemonError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    except OSError as e:
+        print(f"error: cannot reach the daemon at {args.socket or default_socket_path()}: {e}", file=sys.stderr)
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -13,10 +13,14 @@ Key fixes:
 from __future__ import annotations
 import ast
 import astor
+import builtins
+import keyword
 from dataclasses import dataclass, field
 from enum import Enum, auto
 from typing import Dict, List, Optional, Set, Any, Union, Iterable
 
+from super_replace.core.source_patcher import TextEdit, apply_text_edits, edits_for_renames
+
 
 class ScopeKind(Enum):
     MODULE = auto()
@@ -26,7 +30,7 @@ class ScopeKind(Enum):
     LAMBDA = auto()
 
 
-@dataclass
+@dataclass(eq=False, slots=True)
 class Scope:
     kind: ScopeKind
     parent: Optional["Scope"]
@@ -36,6 +40,8 @@ class Scope:
     globals_decl: Set[str] = field(default_factory=set)
     nonlocals_decl: Set[str] = field(default_factory=set)
     name: str = ""
+    # Nearest function-like scope (FUNCTION or LAMBDA), this one included.
+    function: Optional["Scope"] = field(default=None, repr=False)
 
     def nearest_module(self) -> "Scope":
         s = self
@@ -57,13 +63,20 @@ class Scope:
         return self.parent
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class BindingKey:
     scope_id: int
     name: str
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
+class MemberKey:
+    """A class member reached through attribute access, e.g. `self.size` in a method of the class."""
+    class_scope_id: int
+    name: str
+
+
+@dataclass(slots=True)
 class Binding:
     key: BindingKey
     defining_nodes: List[ast.AST] = field(default_factory=list)
@@ -80,6 +93,25 @@ class Index:
     nonlocal_names: Dict[BindingKey, Set[ast.Nonlocal]] = field(default_factory=dict)
     node_to_binding: Dict[ast.AST, BindingKey] = field(default_factory=dict)
     binding_key_to_scope: Dict[BindingKey, Scope] = field(default_factory=dict)
+    # Inverted index: name -> keys of every binding of that name, in creation order.
+    # Values here and in `unresolved` are dicts used as ordered sets, so single entries can be
+    # dropped cheaply.
+    names: Dict[str, Dict[BindingKey, None]] = field(default_factory=dict)
+    unresolved: Dict[str, Dict[ast.AST, None]] = field(default_factory=dict)
+    # Owner node (FunctionDef, Lambda, comprehension, ...) -> the scope it opens.
+    scope_by_node: Dict[ast.AST, Scope] = field(default_factory=dict)
+    # Recorded definition/use node -> the scope it was visited in.
+    node_scope: Dict[ast.AST, Scope] = field(default_factory=dict)
+    # Member index. Every attribute node by attribute name, and the accesses through a method's
+    # first parameter (`self.x`, `cls.x`) by the member of the class they reach. Members defined
+    # in the class body itself are the class scope's bindings.
+    attributes: Dict[str, Dict[ast.Attribute, None]] = field(default_factory=dict)
+    member_accesses: Dict[MemberKey, Dict[ast.Attribute, None]] = field(default_factory=dict)
+    node_member: Dict[ast.Attribute, MemberKey] = field(default_factory=dict)
+    # First-parameter binding of a method -> id of the class scope it refers to.
+    receivers: Dict[BindingKey, int] = field(default_factory=dict)
+    # Scope ids are allocated from a counter: they stay unique when scopes are removed.
+    next_scope_id: int = 0
 
 
 def _collect_targets_from_target(node: ast.AST, collector: Set[str]) -> None:
@@ -94,18 +126,30 @@ def _collect_targets_from_target(node: ast.AST, collector: Set[str]) -> None:
 
 class ScopeBuilder(ast.NodeVisitor):
     
-    def __init__(self):
-        self.index = Index()
-        self.scope = self._new_scope(ScopeKind.MODULE, None, "module")
+    def __init__(self, index: Optional[Index] = None, scope: Optional[Scope] = None):
+        # With an existing index and scope, the builder indexes a subtree in place
+        # (see super_replace.core.incremental).
+        self.index = index if index is not None else Index()
+        self.scope = scope if scope is not None else self._new_scope(ScopeKind.MODULE, None, "module")
+        # Free names that could not be resolved inside function bodies. Function bodies
+        # run after the module body, so they are resolved once every binding is known.
+        self._deferred: List[tuple[Scope, ast.Name]] = []
 
     def _new_scope(self, kind: ScopeKind, parent: Optional[Scope], name: str = "") -> Scope:
-        s = Scope(kind=kind, parent=parent, id=len(self.index.scopes), name=name)
+        s = Scope(kind=kind, parent=parent, id=self.index.next_scope_id, name=name)
+        self.index.next_scope_id += 1
+        if kind in (ScopeKind.FUNCTION, ScopeKind.LAMBDA):
+            s.function = s
+        elif parent is not None:
+            s.function = parent.function
         self.index.scopes.append(s)
         return s
 
     def _enter(self, kind: ScopeKind, name: str = "", node: ast.AST = None) -> Scope:
         self.scope = self._new_scope(kind, self.scope, name)
         self.scope.node = node
+        if node is not None:
+            self.index.scope_by_node[node] = self.scope
         return self.scope
 
     def _exit(self):
@@ -121,20 +165,19 @@ class ScopeBuilder(ast.NodeVisitor):
                 owner = self.scope
         else:
             owner = self.scope
-            
+        return self._ensure_binding(owner, name)
+
+    def _ensure_binding(self, owner: Scope, name: str) -> BindingKey:
         if name not in owner.locals:
             binding = Binding(BindingKey(owner.id, name), scope=owner)
             owner.locals[name] = binding
             self.index.binding_key_to_scope[binding.key] = owner
+            self.index.names.setdefault(name, {})[binding.key] = None
         return owner.locals[name].key
 
     def _binding_key_by_lookup(self, name: str) -> Optional[BindingKey]:
         if name in self.scope.globals_decl:
-            mod = self.scope.nearest_module()
-            if name not in mod.locals:
-                mod.locals[name] = Binding(BindingKey(mod.id, name), scope=mod)
-                self.index.binding_key_to_scope[mod.locals[name].key] = mod
-            return mod.locals[name].key
+            return self._ensure_binding(self.scope.nearest_module(), name)
 
         if name in self.scope.nonlocals_decl:
             fn = self.scope.nearest_function_having(name)
@@ -151,7 +194,8 @@ class ScopeBuilder(ast.NodeVisitor):
 
         parent = self.scope.resolve_free_lookup_parent()
         while parent is not None:
-            if name in parent.locals:
+            # Class bodies are not visible from the functions and comprehensions nested in them.
+            if parent.kind is not ScopeKind.CLASS and name in parent.locals:
                 return parent.locals[name].key
             parent = parent.parent
 
@@ -159,32 +203,34 @@ class ScopeBuilder(ast.NodeVisitor):
 
     def _record_def(self, key: BindingKey, node: ast.AST):
         self.index.defs.setdefault(key, []).append(node)
-        scope = self.index.scopes[key.scope_id]
+        scope = self.index.binding_key_to_scope[key]
         if key.name in scope.locals:
             scope.locals[key.name].defining_nodes.append(node)
         self.index.node_to_binding[node] = key
+        self.index.node_scope[node] = self.scope
 
     def _record_use(self, key: BindingKey, node: ast.AST):
         self.index.uses.setdefault(key, []).append(node)
         self.index.node_to_binding[node] = key
+        self.index.node_scope[node] = self.scope
 
     def _record_assignment_targets(self, targets):
         for target in targets:
             for node in ast.walk(target):
                 if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store):
                     key = self._binding_key_for_assignment(node.id)
-                    self._record_def(key, node)
+                    if node.id in self.scope.globals_decl or node.id in self.scope.nonlocals_decl:
+                        # Rebinding a name declared global/nonlocal uses the outer binding.
+                        self._record_use(key, node)
+                    else:
+                        self._record_def(key, node)
 
     def visit_Global(self, node: ast.Global):
         for name in node.names:
             self.scope.globals_decl.add(name)
-            mod = self.scope.nearest_module()
-            if name not in mod.locals:
-                binding = Binding(BindingKey(mod.id, name), scope=mod)
-                mod.locals[name] = binding
-                self.index.binding_key_to_scope[binding.key] = mod
-            key = mod.locals[name].key
+            key = self._ensure_binding(self.scope.nearest_module(), name)
             self.index.global_names.setdefault(key, set()).add(node)
+        self.index.node_scope[node] = self.scope
         self.generic_visit(node)
 
     def visit_Nonlocal(self, node: ast.Nonlocal):
@@ -194,6 +240,7 @@ class ScopeBuilder(ast.NodeVisitor):
             if fn and name in fn.locals:
                 key = fn.locals[name].key
                 self.index.nonlocal_names.setdefault(key, set()).add(node)
+        self.index.node_scope[node] = self.scope
         self.generic_visit(node)
 
     def visit_FunctionDef(self, node: ast.FunctionDef):
@@ -201,7 +248,7 @@ class ScopeBuilder(ast.NodeVisitor):
             key = self._binding_key_for_assignment(node.name)
             self._record_def(key, node)
         self._enter(ScopeKind.FUNCTION, node.name, node)
-        for arg in node.args.args + node.args.kwonlyargs:
+        for arg in node.args.posonlyargs + node.args.args + node.args.kwonlyargs:
             if arg.arg:
                 key = self._binding_key_for_assignment(arg.arg)
                 self._record_def(key, arg)
@@ -211,11 +258,33 @@ class ScopeBuilder(ast.NodeVisitor):
         if node.args.kwarg:
             key = self._binding_key_for_assignment(node.args.kwarg.arg)
             self._record_def(key, node.args.kwarg)
+        self._record_receiver(node)
         self.generic_visit(node)
         self._exit()
 
     visit_AsyncFunctionDef = visit_FunctionDef
 
+    def _record_receiver(self, node: ast.AST):
+        # Called inside the function's scope: its parent is the class of a method.
+        owner = self.scope.parent
+        positional = node.args.posonlyargs + node.args.args
+        if owner.kind is not ScopeKind.CLASS or not positional:
+            return
+        if any(isinstance(d, ast.Name) and d.id == "staticmethod" for d in node.decorator_list):
+            return
+        self.index.receivers[self.scope.locals[positional[0].arg].key] = owner.id
+
+    def visit_Attribute(self, node: ast.Attribute):
+        self.generic_visit(node)
+        self.index.attributes.setdefault(node.attr, {})[node] = None
+        self.index.node_scope[node] = self.scope
+        if isinstance(node.value, ast.Name):
+            class_id = self.index.receivers.get(self.index.node_to_binding.get(node.value))
+            if class_id is not None:
+                key = MemberKey(class_id, node.attr)
+                self.index.member_accesses.setdefault(key, {})[node] = None
+                self.index.node_member[node] = key
+
     def visit_ClassDef(self, node: ast.ClassDef):
         if self.scope.parent is not None:
             key = self._binding_key_for_assignment(node.name)
@@ -226,7 +295,7 @@ class ScopeBuilder(ast.NodeVisitor):
 
     def visit_Lambda(self, node: ast.Lambda):
         self._enter(ScopeKind.LAMBDA, f"@L{node.lineno}", node)
-        for arg in node.args.args + node.args.kwonlyargs:
+        for arg in node.args.posonlyargs + node.args.args + node.args.kwonlyargs:
             if arg.arg:
                 key = self._binding_key_for_assignment(arg.arg)
                 self._record_def(key, arg)
@@ -325,13 +394,36 @@ class ScopeBuilder(ast.NodeVisitor):
             self._record_def(key, synthetic_name)
         self.generic_visit(node)
 
+    def visit_Module(self, node: ast.Module):
+        self.generic_visit(node)
+        self.resolve_deferred()
+
+    def resolve_deferred(self):
+        current = self.scope
+        deferred, self._deferred = self._deferred, []
+        for scope, node in deferred:
+            self.scope = scope
+            key = self._binding_key_by_lookup(node.id)
+            if key is not None:
+                self._record_use(key, node)
+            else:
+                # Builtins and names bound nowhere in the module.
+                self.index.unresolved.setdefault(node.id, {})[node] = None
+                self.index.node_scope[node] = scope
+        self.scope = current
+
     def visit_Name(self, node: ast.Name):
+        if isinstance(node.ctx, ast.Store):
+            return
         key = self._binding_key_by_lookup(node.id)
         if key is not None:
-            if isinstance(node.ctx, ast.Load):
-                self._record_use(key, node)
-            elif isinstance(node.ctx, ast.Del):
-                self._record_use(key, node)
+            self._record_use(key, node)
+        elif self.scope.function is not None:
+            self._deferred.append((self.scope, node))
+        else:
+            # Builtins and names bound nowhere in the module.
+            self.index.unresolved.setdefault(node.id, {})[node] = None
+            self.index.node_scope[node] = self.scope
 
 class EnhancedReplaceTransformer(ast.NodeTransformer):
     def __init__(
@@ -356,6 +448,9 @@ class EnhancedReplaceTransformer(ast.NodeTransformer):
         self.target_binding_key = target_binding_key
         self.debug = debug
         self._target_binding_keys: Optional[Set[Any]] = None
+        # Selected keys and their scopes, as used for parameters; computed once per traversal.
+        self._parameter_selection: Optional[tuple] = None
+        self.renamed_nodes: List[ast.AST] = []
 
     def _scope_kind_name(self, scope: Any) -> str:
         k = getattr(scope, "kind", None)
@@ -388,6 +483,24 @@ class EnhancedReplaceTransformer(ast.NodeTransformer):
             return True
         return True
 
+    def _declaration_mapping(self) -> Optional[Dict[Any, Set[ast.AST]]]:
+        f = (self.scope_filter or "").lower()
+        if f == "global":
+            return getattr(self.index, "global_names", {}) or {}
+        if f == "nonlocal":
+            return getattr(self.index, "nonlocal_names", {}) or {}
+        return None
+
+    def _declaring_function_names(self, declarations: Iterable[ast.AST]) -> Set[str]:
+        node_scope = getattr(self.index, "node_scope", {}) or {}
+        names = set()
+        for decl in declarations:
+            scope = node_scope.get(decl)
+            fn = getattr(scope, "function", None) if scope is not None else self._find_containing_function_scope(decl)
+            if fn is not None:
+                names.add(fn.name)
+        return names
+
     def _iter_arg_nodes(self, args: ast.arguments):
         for a in getattr(args, "posonlyargs", []) or []:
             if a: yield a
@@ -401,6 +514,9 @@ class EnhancedReplaceTransformer(ast.NodeTransformer):
             yield getattr(args, "kwarg")
 
     def _find_scope_for_node(self, owner_node):
+        scope_by_node = getattr(self.index, "scope_by_node", None)
+        if scope_by_node is not None:
+            return scope_by_node.get(owner_node)
         for sc in getattr(self.index, "scopes", []) or []:
             if getattr(sc, "node", None) is owner_node:
                 return sc
@@ -416,12 +532,16 @@ class EnhancedReplaceTransformer(ast.NodeTransformer):
         return scopes
 
     def _rename_parameters_in_arguments(self, args: ast.arguments, owner_node: ast.AST):
-        if self._target_binding_keys is None:
-            self._target_binding_keys = self._collect_target_binding_keys()
-        selected = self._target_binding_keys
+        if not any(a.arg == self.target for a in self._iter_arg_nodes(args)):
+            return
+        if self._parameter_selection is None:
+            if self._target_binding_keys is None:
+                self._target_binding_keys = self._collect_target_binding_keys()
+            selected_set = set(self._target_binding_keys)
+            self._parameter_selection = (selected_set, self._selected_scopes_from_keys(selected_set))
+        selected_set, selected_scopes = self._parameter_selection
 
         node2b = getattr(self.index, "node_to_binding", {}) or {}
-        selected_set = set(selected)
         renamed = False
 
         # 1) Chemin lié par l’index (ast.arg -> BindingKey)
@@ -431,19 +551,32 @@ class EnhancedReplaceTransformer(ast.NodeTransformer):
                 if self.debug:
                     print(f"[rename param] {a.arg}@{getattr(a,'lineno','?')}:{getattr(a,'col_offset','?')} -> {self.replacement} reason=lambda-param-bound")
                 a.arg = self.replacement
+                self.renamed_nodes.append(a)
                 renamed = True
 
         # 2) Fallback par portée
         if not renamed:
             owner_scope = self._find_scope_for_node(owner_node)
-            if owner_scope and owner_scope in self._selected_scopes_from_keys(selected):
+            if owner_scope and owner_scope in selected_scopes:
                 for a in self._iter_arg_nodes(args):
                     if a.arg == self.target:
                         if self.debug:
                             print(f"[rename param] {a.arg}@{getattr(a,'lineno','?')}:{getattr(a,'col_offset','?')} -> {self.replacement} reason=lambda-param-fallback")
                         a.arg = self.replacement
+                        self.renamed_nodes.append(a)
 
     def _find_containing_function_scope(self, node: ast.AST) -> Optional[Any]:
+        if node is None:
+            return None
+        # Constant-time path: owner nodes and recorded names know their scope.
+        scope = (getattr(self.index, "scope_by_node", None) or {}).get(node)
+        if scope is None:
+            scope = (getattr(self.index, "node_scope", None) or {}).get(node)
+        if scope is not None:
+            return scope.function
+        return self._scan_for_containing_function_scope(node)
+
+    def _scan_for_containing_function_scope(self, node: ast.AST) -> Optional[Any]:
         best = None
         for scope in getattr(self.index, "scopes", []) or []:
             if not self._is_function_like_scope(scope):
@@ -459,6 +592,16 @@ class EnhancedReplaceTransformer(ast.NodeTransformer):
                         best = scope
         return best
 
+    def _is_node_inside(self, container: Optional[ast.AST], node: Optional[ast.AST]) -> bool:
+        if container is None or node is None:
+            return False
+        return any(child is node for child in ast.walk(container))
+
+    def _collect_target_binding_keys(self) -> Set[Any]:
+        if self.target_binding_key is not None:
+            return {self.target_binding_key}
+        return self._selected_keys()
+
     def _binding_of(self, node: ast.AST) -> Optional[Any]:
         return getattr(self.index, "node_to_binding", {}).get(node)
 
@@ -480,19 +623,32 @@ class EnhancedReplaceTransformer(ast.NodeTransformer):
         fn = self._find_containing_function_scope(node)
         return fn is not None and fn.name in self.target_functions
 
+    def _candidate_keys(self) -> Iterable[Any]:
+        names = getattr(self.index, "names", None)
+        if names is not None:
+            return names.get(self.target, ())
+        b2s = getattr(self.index, "binding_key_to_scope", {}) or {}
+        return [key for key in b2s if getattr(key, "name", None) == self.target]
+
     def _selected_keys(self) -> Set[Any]:
         keys: Set[Any] = set()
         b2s = getattr(self.index, "binding_key_to_scope", {}) or {}
+        # global/nonlocal select by the binding's real origin: a binding declared
+        # global (resp. nonlocal) somewhere, owned by the module (resp. a function).
+        declarations = self._declaration_mapping()
 
-        for key, scope in b2s.items():
-            if getattr(key, "name", None) != self.target:
+        for key in self._candidate_keys():
+            scope = b2s.get(key)
+            if scope is None or not self._scope_matches_filter(scope):
                 continue
-            if not self._scope_matches_filter(scope):
+            if declarations is not None and key not in declarations:
                 continue
             if self.target_functions:
                 fn = self._find_containing_function_scope(getattr(scope, "node", None))
-                fn_name = getattr(fn, "name", None) if fn else None
-                if fn_name not in self.target_functions:
+                fn_names = {fn.name} if fn else set()
+                if declarations is not None:
+                    fn_names |= self._declaring_function_names(declarations[key])
+                if not fn_names & self.target_functions:
                     continue
             keys.add(key)
         return keys
@@ -527,34 +683,36 @@ class EnhancedReplaceTransformer(ast.NodeTransformer):
                 return True
         return False
 
+    # Nodes are renamed in place so that an Index built for the tree stays valid
+    # (its mappings are keyed by node identity) and can be updated incrementally.
     def visit_Name(self, node: ast.Name):
         if self._should_rename_node(node):
-            return ast.copy_location(ast.Name(id=self.replacement, ctx=node.ctx), node)
+            node.id = self.replacement
+            self.renamed_nodes.append(node)
         return node
 
     def visit_Global(self, node: ast.Global):
         if self.target in node.names:
             mapping = getattr(self.index, "global_names", {}) or {}
             if self._handler_matches_selection(mapping, node):
-                new_names = [self.replacement if n == self.target else n for n in node.names]
-                return ast.copy_location(ast.Global(names=new_names), node)
+                node.names = [self.replacement if n == self.target else n for n in node.names]
+                self.renamed_nodes.append(node)
         return node
 
     def visit_Nonlocal(self, node: ast.Nonlocal):
         if self.target in node.names:
             mapping = getattr(self.index, "nonlocal_names", {}) or {}
             if self._handler_matches_selection(mapping, node):
-                new_names = [self.replacement if n == self.target else n for n in node.names]
-                return ast.copy_location(ast.Nonlocal(names=new_names), node)
+                node.names = [self.replacement if n == self.target else n for n in node.names]
+                self.renamed_nodes.append(node)
         return node
 
     def visit_ExceptHandler(self, node: ast.ExceptHandler):
         if getattr(node, "name", None) == self.target:
             mapping = getattr(self.index, "except_names", {}) or {}
             if self._handler_matches_selection(mapping, node):
-                new_node = ast.copy_location(ast.ExceptHandler(type=node.type, name=self.replacement, body=node.body), node)
-                self.generic_visit(new_node)
-                return new_node
+                node.name = self.replacement
+                self.renamed_nodes.append(node)
         self.generic_visit(node)
         return node
 
@@ -581,13 +739,24 @@ class EnhancedReplaceTransformer(ast.NodeTransformer):
         origin_kind = self._scope_kind_name(origin) if origin else None
         print(f"[rename? {decision}] {getattr(node, 'id', '?')}@{getattr(node, 'lineno', '?')}:{getattr(node, 'col_offset', '?')} ctx={ctx} fn={fn_name} origin={origin_kind} reason={reason}")
 
-def super_replace_autonomous(code: str, target: str, replacement: str, context_rules: dict) -> str:
+_BUILTIN_NAMES = frozenset(dir(builtins))
+
+def build_index(code: str, cache: Any = None) -> tuple[ast.Module, Index]:
+    if cache is not None:
+        cached = cache.load(code)
+        if cached is not None:
+            return cached
     tree = ast.parse(code)
     builder = ScopeBuilder()
     builder.visit(tree)
+    if cache is not None:
+        cache.store(code, (tree, builder.index))
+    return tree, builder.index
+
+def apply_rename(tree: ast.AST, index: Index, target: str, replacement: str, context_rules: dict) -> tuple[ast.AST, List[ast.AST]]:
     transformer = EnhancedReplaceTransformer(
         tree=tree,
-        index=builder.index,
+        index=index,
         target=target,
         replacement=replacement,
         scope_filter=context_rules.get("scope"),
@@ -597,56 +766,262 @@ def super_replace_autonomous(code: str, target: str, replacement: str, context_r
     )
     new_tree = transformer.visit(tree)
     ast.fix_missing_locations(new_tree)
+    return new_tree, transformer.renamed_nodes
+
+def tree_to_source(tree: ast.AST) -> str:
     try:
-        return astor.to_source(new_tree)
+        return astor.to_source(tree)
     except Exception:
         try:
-            return ast.unparse(new_tree)
+            return ast.unparse(tree)
         except Exception as e:
             raise RuntimeError("Could not serialize AST back to source") from e
 
-def get_binding_info(code: str, target: str) -> dict:
-    tree = ast.parse(code)
-    builder = ScopeBuilder()
-    builder.visit(tree)
+def rename_source(code: str, tree: ast.AST, index: Index, target: str, replacement: str, context_rules: dict) -> tuple[str, List[ast.AST]]:
+    new_tree, renamed_nodes = apply_rename(tree, index, target, replacement, context_rules)
+    if context_rules.get("preserve_formatting"):
+        # Patch the original text at the renamed identifiers instead of regenerating it.
+        edits = edits_for_renames(code, ((node, target, replacement) for node in renamed_nodes))
+        return apply_text_edits(code, edits), renamed_nodes
+    return tree_to_source(new_tree), renamed_nodes
+
+def rename_edits(code: str, target: str, replacement: str, context_rules: dict, cache: Any = None) -> List[TextEdit]:
+    """
+    The text edits a formatting-preserving rename would apply to `code`, without applying them.
+    """
+    tree, index = build_index(code, cache)
+    _, renamed_nodes = apply_rename(tree, index, target, replacement, context_rules)
+    return edits_for_renames(code, ((node, target, replacement) for node in renamed_nodes))
+
+def super_replace_autonomous(code: str, target: str, replacement: str, context_rules: dict, cache: Any = None) -> str:
+    tree, index = build_index(code, cache)
+    new_code, _ = rename_source(code, tree, index, target, replacement, context_rules)
+    return new_code
+
+def qualified_scope_name(scope: Scope) -> str:
+    """
+    Returns the dotted path of the functions and classes enclosing a scope (`Widget.grow`), or
+    `<module>`. Comprehensions and lambdas add nothing to the path.
+    """
+    names = []
+    while scope is not None and scope.kind is not ScopeKind.MODULE:
+        if scope.kind in (ScopeKind.FUNCTION, ScopeKind.CLASS):
+            names.append(scope.name)
+        scope = scope.parent
+    return ".".join(reversed(names)) or "<module>"
+
+
+def binding_info_from_index(index: Index, target: str) -> dict:
     info = {'bindings': [], 'total_uses': 0, 'total_definitions': 0}
-    for scope in builder.index.scopes:
-        if target in scope.locals:
-            binding = scope.locals[target]
-            uses = len(builder.index.uses.get(binding.key, []))
-            defs = len(builder.index.defs.get(binding.key, []))
-            info['bindings'].append({
-                'scope_kind': scope.kind.name,
-                'scope_name': scope.name,
-                'scope_id': scope.id,
-                'uses': uses,
-                'definitions': defs,
-                'binding_key': binding.key
-            })
-            info['total_uses'] += uses
-            info['total_definitions'] += defs
+    for key in sorted(index.names.get(target, ()), key=lambda k: k.scope_id):
+        scope = index.binding_key_to_scope[key]
+        uses = len(index.uses.get(key, []))
+        defs = len(index.defs.get(key, []))
+        info['bindings'].append({
+            'scope_kind': scope.kind.name,
+            'scope_name': scope.name,
+            'scope_id': scope.id,
+            'uses': uses,
+            'definitions': defs,
+            'binding_key': key
+        })
+        info['total_uses'] += uses
+        info['total_definitions'] += defs
     return info
 
-def check_rename_safety(code: str, target: str, replacement: str, context_rules: dict) -> tuple[bool, list[str]]:
+@dataclass(frozen=True)
+class RenameConflict:
+    """
+    A reference whose resolution a rename would change.
+
+    `kind` is "existing" (the replacement is already bound where the renamed binding lives),
+    "capture" (a use of the renamed binding would resolve to another binding of the replacement)
+    or "shadow" (an existing reference to the replacement would resolve to the renamed binding).
+    """
+    kind: str
+    message: str
+    line: Optional[int] = None
+
+
+def _describe(scope: Optional[Scope]) -> str:
+    return "builtins" if scope is None else f"{scope.kind.name} '{scope.name}'"
+
+
+def renamed_binding_keys(index: Index, target: str, context_rules: dict) -> Set[BindingKey]:
+    """
+    The bindings apply_rename would rename, selected from the index alone.
+    """
+    selector = EnhancedReplaceTransformer(
+        tree=None,
+        index=index,
+        target=target,
+        replacement=target,
+        scope_filter=context_rules.get("scope"),
+        target_functions=context_rules.get("functions"),
+        target_binding_key=context_rules.get("target_binding_key"),
+    )
+    selected = selector._ensure_selected_keys()
+    return set(index.names.get(target, ())) if selected is None else set(selected)
+
+
+def rename_conflicts(index: Index, target: str, replacement: str, context_rules: dict) -> List[RenameConflict]:
+    """
+    Finds the references whose meaning renaming `target` to `replacement` would change.
+
+    Only scopes that can see a renamed binding are examined. Name lookup follows Python's
+    rules: the enclosing function scopes from the inside out (class bodies are skipped,
+    except for the class's own body), then the module, then builtins. `global`/`nonlocal`
+    declarations redirect lookup as usual.
+    """
+    renamed = renamed_binding_keys(index, target, context_rules)
+    if not renamed or replacement == target:
+        return []
+    module = index.scopes[0]
+    # Module-level def/class names are not bindings (see ScopeBuilder.visit_FunctionDef).
+    module_defs = {
+        s.name: s.node for s in index.scopes
+        if s.kind in (ScopeKind.FUNCTION, ScopeKind.CLASS) and s.parent is module
+    }
+    renamed_owners = {key.scope_id for key in renamed}
+
+    def bound_after(scope: Scope) -> bool:
+        return (
+            replacement in scope.locals
+            or scope.id in renamed_owners
+            or (scope is module and replacement in module_defs)
+        )
+
+    def declared_after(scope: Scope, declared: Set[str], owner: Optional[Scope]) -> bool:
+        if replacement in declared:
+            return True
+        return target in declared and owner is not None and owner.locals[target].key in renamed
+
+    def resolve_after(scope: Scope) -> Optional[Scope]:
+        if declared_after(scope, scope.globals_decl, module if target in module.locals else None):
+            return module
+        if declared_after(scope, scope.nonlocals_decl, scope.nearest_function_having(target)):
+            found = scope.parent
+            while found is not None and not (found.kind in (ScopeKind.FUNCTION, ScopeKind.LAMBDA) and bound_after(found)):
+                found = found.parent
+            return found
+        if bound_after(scope):
+            return scope
+        found = scope.parent
+        while found is not None:
+            if found.kind is not ScopeKind.CLASS and bound_after(found):
+                return found
+            found = found.parent
+        return None
+
+    conflicts: List[RenameConflict] = []
+    reported: Set[tuple] = set()
+
+    def report(kind: str, node: ast.AST, message: str, *dedupe) -> None:
+        if (kind, *dedupe) not in reported:
+            reported.add((kind, *dedupe))
+            conflicts.append(RenameConflict(kind, message, getattr(node, "lineno", None)))
+
+    for key in sorted(renamed, key=lambda k: k.scope_id):
+        owner = index.binding_key_to_scope[key]
+        existing = owner.locals[replacement].defining_nodes if replacement in owner.locals else None
+        if existing is None and owner is module and replacement in module_defs:
+            existing = [module_defs[replacement]]
+        if existing is not None:
+            node = existing[0] if existing else None
+            report("existing", node, f"Name '{replacement}' already exists in {_describe(owner)}", owner)
+        for node in index.uses.get(key, ()):
+            scope = index.node_scope.get(node)
+            found = resolve_after(scope) if scope is not None else owner
+            if found is not owner:
+                report(
+                    "capture", node,
+                    f"'{target}' at line {node.lineno} in {_describe(scope)} would refer to "
+                    f"'{replacement}' in {_describe(found)} instead of the renamed binding",
+                    scope, found,
+                )
+
+    # Existing references to the replacement, bound or not.
+    references = [
+        (node, index.binding_key_to_scope[key])
+        for key in index.names.get(replacement, ())
+        for node in index.uses.get(key, ())
+    ]
+    unbound_owner = module if replacement in module_defs else None
+    references.extend((node, unbound_owner) for node in index.unresolved.get(replacement, ()))
+    for node, before in references:
+        scope = index.node_scope.get(node)
+        if scope is None:
+            continue
+        found = resolve_after(scope)
+        if found is not before:
+            report(
+                "shadow", node,
+                f"'{replacement}' at line {node.lineno} in {_describe(scope)} would refer to "
+                f"the renamed binding in {_describe(found)} instead of {_describe(before)}",
+                scope, found,
+            )
+    return conflicts
+
+
+def _name_issues(replacement: str) -> list[str]:
     issues = []
+    if keyword.iskeyword(replacement):
+        issues.append(f"'{replacement}' is a Python keyword")
+    if replacement in _BUILTIN_NAMES:
+        issues.append(f"'{replacement}' shadows a builtin name")
+    return issues
+
+
+def rename_safety_issues(index: Index, target: str, replacement: str, context_rules: dict) -> list[str]:
+    issues = [conflict.message for conflict in rename_conflicts(index, target, replacement, context_rules)]
+    return issues + _name_issues(replacement)
+
+
+def suggest_safe_names(index: Index, target: str, replacement: str, context_rules: dict, limit: int = 3) -> list[str]:
+    """
+    Returns up to `limit` variants of `replacement` (`name_`, `name2`, `name3`, ...) that rename
+    `target` without conflicts, checked against the same Index.
+    """
+    suggestions: list[str] = []
+    candidates = [f"{replacement}_"] + [f"{replacement}{n}" for n in range(2, 100)]
+    for candidate in candidates:
+        if len(suggestions) >= limit:
+            break
+        if not _name_issues(candidate) and not rename_conflicts(index, target, candidate, context_rules):
+            suggestions.append(candidate)
+    return suggestions
+
+def get_binding_info(code: str, target: str, cache: Any = None, compact: bool = False) -> dict:
+    if compact:
+        # Keeps only flat tables (see compact_index); the result is the same.
+        from super_replace.core.compact_index import build_compact_index
+        return build_compact_index(code, cache).binding_info(target)
+    _, index = build_index(code, cache)
+    return binding_info_from_index(index, target)
+
+def analyze_rename_safety(
+    code: str, target: str, replacement: str, context_rules: dict, cache: Any = None, suggestions: int = 3
+) -> dict:
+    """
+    Like check_rename_safety, with the conflicts in detail and, if the rename is unsafe, up to
+    `suggestions` safe alternatives, all from one parse.
+
+    Returns:
+        A dict with `safe`, `issues` (as check_rename_safety), `conflicts` (RenameConflicts)
+        and `suggestions`.
+    """
+    _, index = build_index(code, cache)
+    conflicts = rename_conflicts(index, target, replacement, context_rules)
+    issues = [conflict.message for conflict in conflicts] + _name_issues(replacement)
+    alternatives = suggest_safe_names(index, target, replacement, context_rules, suggestions) if issues else []
+    return {"safe": not issues, "issues": issues, "conflicts": conflicts, "suggestions": alternatives}
+
+def check_rename_safety(code: str, target: str, replacement: str, context_rules: dict, cache: Any = None) -> tuple[bool, list[str]]:
     try:
-        tree = ast.parse(code)
-        builder = ScopeBuilder()
-        builder.visit(tree)
-        replacement_bindings = []
-        for scope in builder.index.scopes:
-            if replacement in scope.locals:
-                replacement_bindings.append((scope.kind.name, scope.name))
-        if replacement_bindings:
-            issues.append(f"Name '{replacement}' already exists in scopes: {replacement_bindings}")
-        import keyword
-        if keyword.iskeyword(replacement):
-            issues.append(f"'{replacement}' is a Python keyword")
-        import builtins
-        if replacement in dir(builtins):
-            issues.append(f"'{replacement}' shadows a builtin name")
+        _, index = build_index(code, cache)
+        issues = rename_safety_issues(index, target, replacement, context_rules)
     except Exception as e:
-        issues.append(f"Error analyzing code: {e}")
+        issues = [f"Error analyzing code: {e}"]
     return len(issues) == 0, issues
 
 if __name__ == "__main__":
@@ -0,0 +1,363 @@
+"""
+Module: batch_replacer - many renames in one pass
+
+Resolves every target->replacement pair to the set of bindings it selects
+(using the same selection rules as EnhancedReplaceTransformer), checks the pairs
+against each other for conflicts, then renames all selected bindings in a single
+traversal of the tree. Because renames are keyed by binding rather than by name,
+swaps (`a -> b`, `b -> a`) and chains (`a -> b`, `b -> c`) behave as expected.
+"""
+
+from __future__ import annotations
+import ast
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Set, Tuple, Union
+
+from super_replace.core.autonomous_replacer import (
+    BindingKey,
+    EnhancedReplaceTransformer,
+    Index,
+    Scope,
+    ScopeKind,
+    build_index,
+    tree_to_source,
+)
+from super_replace.core.source_patcher import apply_text_edits, edits_for_renames
+
+
+class RenameConflictError(ValueError):
+    """Raised when the pairs of a batch rename contradict each other."""
+
+    def __init__(self, conflicts: List[str]) -> None:
+        super().__init__("; ".join(conflicts))
+        self.conflicts = conflicts
+
+
+@dataclass(frozen=True)
+class RenameSpec:
+    target: str
+    replacement: str
+    scope: Optional[str] = None
+    functions: Tuple[str, ...] = ()
+    target_binding_key: Optional[BindingKey] = None
+
+
+RenameMapping = Union[Mapping[str, Union[str, Mapping[str, Any]]], Iterable[Union[RenameSpec, Mapping[str, Any]]]]
+
+
+def normalize_renames(renames: RenameMapping, context_rules: Optional[dict] = None) -> List[RenameSpec]:
+    """
+    Converts the accepted rename formats into RenameSpecs.
+
+    `renames` is either a mapping `{target: replacement}` / `{target: {"replacement": ..., "scope": ...,
+    "functions": [...]}}`, or a list of such dicts (each with a "target" key) or RenameSpecs, which
+    allows several filtered pairs for the same target. `context_rules` supplies the default
+    scope and functions of pairs that do not set their own.
+    """
+    defaults = context_rules or {}
+    if isinstance(renames, Mapping):
+        items = [
+            dict(value, target=target) if isinstance(value, Mapping) else {"target": target, "replacement": value}
+            for target, value in renames.items()
+        ]
+    else:
+        items = list(renames)
+
+    specs = []
+    for item in items:
+        if isinstance(item, RenameSpec):
+            specs.append(item)
+            continue
+        if "target" not in item or "replacement" not in item:
+            raise ValueError(f"Rename entry needs a 'target' and a 'replacement': {item!r}")
+        specs.append(RenameSpec(
+            target=item["target"],
+            replacement=item["replacement"],
+            scope=item.get("scope", defaults.get("scope")),
+            functions=tuple(item.get("functions", defaults.get("functions")) or ()),
+            target_binding_key=item.get("target_binding_key"),
+        ))
+    return specs
+
+
+def select_keys(tree: ast.AST, index: Index, spec: RenameSpec) -> List[BindingKey]:
+    selector = EnhancedReplaceTransformer(
+        tree=tree,
+        index=index,
+        target=spec.target,
+        replacement=spec.replacement,
+        scope_filter=spec.scope,
+        target_functions=spec.functions,
+        target_binding_key=spec.target_binding_key,
+    )
+    return sorted(selector._collect_target_binding_keys(), key=lambda k: (k.scope_id, k.name))
+
+
+def resolve_renames(
+    tree: ast.AST,
+    index: Index,
+    specs: Iterable[RenameSpec],
+    claimed_by: Optional[Dict[BindingKey, RenameSpec]] = None,
+    timings: Optional[Dict[RenameSpec, float]] = None,
+) -> Dict[BindingKey, str]:
+    """
+    Maps every selected binding to its new name.
+
+    Args:
+        claimed_by: If given, receives the first pair selecting each binding.
+        timings: If given, receives the time spent selecting the bindings of each pair.
+
+    Raises:
+        RenameConflictError: If a binding is claimed by pairs with different replacements, if
+            two bindings of the same scope would end up with the same name, or if a reference
+            would resolve to another binding after the renames (see capture_conflicts).
+    """
+    key_replacements: Dict[BindingKey, str] = {}
+    claimed_by = {} if claimed_by is None else claimed_by
+    conflicts = []
+    for spec in specs:
+        start = time.perf_counter()
+        keys = select_keys(tree, index, spec)
+        if timings is not None:
+            timings[spec] = timings.get(spec, 0.0) + time.perf_counter() - start
+        for key in keys:
+            previous = claimed_by.get(key)
+            if previous is not None:
+                if previous.replacement != spec.replacement:
+                    conflicts.append(
+                        f"'{key.name}' in scope {key.scope_id} is renamed to both "
+                        f"'{previous.replacement}' and '{spec.replacement}'"
+                    )
+                continue
+            claimed_by[key] = spec
+            key_replacements[key] = spec.replacement
+
+    # Final names must stay unique within every scope that gets a renamed binding.
+    affected_scopes = {key.scope_id: index.binding_key_to_scope[key] for key in key_replacements}
+    for _, scope in sorted(affected_scopes.items()):
+        final_names: Dict[str, str] = {}
+        for name, binding in scope.locals.items():
+            final = key_replacements.get(binding.key, name)
+            if final in final_names:
+                conflicts.append(
+                    f"'{final_names[final]}' and '{name}' would both be named '{final}' "
+                    f"in {scope.kind.name.lower()} scope '{scope.name}'"
+                )
+            else:
+                final_names[final] = name
+    conflicts.extend(capture_conflicts(index, key_replacements))
+    if conflicts:
+        raise RenameConflictError(conflicts)
+    return key_replacements
+
+
+def capture_conflicts(index: Index, key_replacements: Dict[BindingKey, str]) -> List[str]:
+    """
+    Finds the references that would resolve to another binding once every key is renamed.
+
+    The references of the renamed bindings and every reference to one of the new names are
+    resolved before and after the renames, with the lookup rules of rename_conflicts: the
+    enclosing scopes from the inside out (class bodies skipped, except the class's own), then
+    builtins, with `global`/`nonlocal` declarations (renamed along with their bindings)
+    redirecting the lookup. A reference that changes binding is a conflict, whether a pair
+    captures another pair's binding (`a -> c`, `b -> c` in `a + b`) or an existing one.
+    """
+    if not key_replacements:
+        return []
+    module = index.scopes[0]
+    # Module-level def/class names are not bindings (see ScopeBuilder.visit_FunctionDef).
+    module_defs = {
+        s.name for s in index.scopes if s.kind in (ScopeKind.FUNCTION, ScopeKind.CLASS) and s.parent is module
+    }
+    renamed_locals: Dict[int, Dict[str, BindingKey]] = {}
+    for key in key_replacements:
+        if key.scope_id not in renamed_locals:
+            scope = index.binding_key_to_scope[key]
+            renamed_locals[key.scope_id] = {
+                key_replacements.get(binding.key, name): binding.key for name, binding in scope.locals.items()
+            }
+
+    def final(key: BindingKey) -> str:
+        return key_replacements.get(key, key.name)
+
+    def lookup(scope: Scope, name: str, after: bool):
+        if after and scope.id in renamed_locals:
+            found = renamed_locals[scope.id].get(name)
+        else:
+            binding = scope.locals.get(name)
+            found = binding.key if binding is not None else None
+        if found is None and scope is module and name in module_defs:
+            return ("def", name)
+        return found
+
+    def declared(scope: Scope, names: Set[str], owner, name: str, after: bool) -> bool:
+        if not after:
+            return name in names
+        for declared_name in names:
+            owner_scope = owner(scope, declared_name)
+            binding = owner_scope.locals.get(declared_name) if owner_scope is not None else None
+            if (final(binding.key) if binding is not None else declared_name) == name:
+                return True
+        return False
+
+    def resolve(scope: Scope, name: str, after: bool):
+        if declared(scope, scope.globals_decl, lambda s, n: module, name, after):
+            return lookup(module, name, after)
+        if declared(scope, scope.nonlocals_decl, Scope.nearest_function_having, name, after):
+            found = scope.parent
+            while found is not None:
+                if found.kind in (ScopeKind.FUNCTION, ScopeKind.LAMBDA) and lookup(found, name, after) is not None:
+                    return lookup(found, name, after)
+                found = found.parent
+            return None
+        found = lookup(scope, name, after)
+        parent = scope.parent
+        while found is None and parent is not None:
+            if parent.kind is not ScopeKind.CLASS:
+                found = lookup(parent, name, after)
+            parent = parent.parent
+        return found
+
+    def describe(found, after: bool) -> str:
+        if found is None:
+            return "no binding (a builtin or undefined name)"
+        if isinstance(found, tuple):
+            return f"the module-level definition '{found[1]}'"
+        scope = index.binding_key_to_scope[found]
+        renamed = f" (renamed '{final(found)}')" if after and found in key_replacements else ""
+        return f"'{found.name}'{renamed} in {scope.kind.name.lower()} scope '{scope.name}'"
+
+    references = [(node, key.name, final(key)) for key in key_replacements for node in index.uses.get(key, ())]
+    for name in sorted(set(key_replacements.values())):
+        for key in index.names.get(name, ()):
+            if key not in key_replacements:
+                references.extend((node, name, name) for node in index.uses.get(key, ()))
+        references.extend((node, name, name) for node in index.unresolved.get(name, ()))
+
+    conflicts = []
+    reported = set()
+    for node, old, new in sorted(references, key=lambda r: (getattr(r[0], "lineno", 0), getattr(r[0], "col_offset", 0))):
+        scope = index.node_scope.get(node)
+        if scope is None:
+            continue
+        before, after = resolve(scope, old, False), resolve(scope, new, True)
+        if before != after and (scope.id, old, before, after) not in reported:
+            reported.add((scope.id, old, before, after))
+            conflicts.append(
+                f"'{old}' at line {node.lineno} would refer to {describe(after, True)} "
+                f"instead of {describe(before, False)}"
+            )
+    return conflicts
+
+
+class BatchReplaceTransformer(ast.NodeTransformer):
+    """
+    Renames every binding of `key_replacements` in one traversal.
+    Like EnhancedReplaceTransformer, nodes are renamed in place.
+    """
+
+    def __init__(self, *, tree: ast.AST, index: Index, key_replacements: Dict[BindingKey, str]) -> None:
+        super().__init__()
+        self.tree = tree
+        self.index = index
+        self.key_replacements = key_replacements
+        self.renames: List[Tuple[ast.AST, str, str]] = []
+        # The number of renamed sites of each binding.
+        self.hits: Dict[BindingKey, int] = {}
+        # Declarations (global/nonlocal/except) map to the selected keys they mention.
+        self._declared: Dict[ast.AST, List[BindingKey]] = {}
+        for mapping in (index.global_names, index.nonlocal_names, index.except_names):
+            for key in key_replacements:
+                for node in mapping.get(key, ()):
+                    self._declared.setdefault(node, []).append(key)
+
+    def _record(self, node: ast.AST, key: BindingKey, new: str) -> None:
+        self.renames.append((node, key.name, new))
+        self.hits[key] = self.hits.get(key, 0) + 1
+
+    def _rename(self, node: ast.AST, old: str) -> Optional[str]:
+        key = self.index.node_to_binding.get(node)
+        new = self.key_replacements.get(key) if key is not None else None
+        if new is not None and key.name == old:
+            self._record(node, key, new)
+        return new
+
+    def visit_Name(self, node: ast.Name):
+        new = self._rename(node, node.id)
+        if new is not None:
+            node.id = new
+        return node
+
+    def visit_arg(self, node: ast.arg):
+        new = self._rename(node, node.arg)
+        if new is not None:
+            node.arg = new
+        return self.generic_visit(node)
+
+    def _declared_keys(self, node: ast.AST) -> Dict[str, BindingKey]:
+        return {key.name: key for key in self._declared.get(node, ())}
+
+    def _visit_declaration(self, node: Union[ast.Global, ast.Nonlocal]):
+        keys = self._declared_keys(node)
+        if keys:
+            for old in node.names:
+                if old in keys:
+                    self._record(node, keys[old], self.key_replacements[keys[old]])
+            node.names = [self.key_replacements[keys[n]] if n in keys else n for n in node.names]
+        return node
+
+    visit_Global = _visit_declaration
+    visit_Nonlocal = _visit_declaration
+
+    def visit_ExceptHandler(self, node: ast.ExceptHandler):
+        key = self._declared_keys(node).get(node.name)
+        if key is not None:
+            new = self.key_replacements[key]
+            self._record(node, key, new)
+            node.name = new
+        return self.generic_visit(node)
+
+
+def batch_rename_source(
+    code: str,
+    tree: ast.AST,
+    index: Index,
+    specs: Iterable[RenameSpec],
+    preserve_formatting: bool = False,
+) -> Tuple[str, List[Tuple[ast.AST, str, str]]]:
+    """
+    Applies a batch of renames to an already indexed module.
+
+    Returns:
+        The modified code and the `(node, old, new)` renames that were performed.
+    """
+    key_replacements = resolve_renames(tree, index, list(specs))
+    transformer = BatchReplaceTransformer(tree=tree, index=index, key_replacements=key_replacements)
+    new_tree = transformer.visit(tree)
+    if not transformer.renames:
+        return code, []
+    if preserve_formatting:
+        return apply_text_edits(code, edits_for_renames(code, transformer.renames)), transformer.renames
+    ast.fix_missing_locations(new_tree)
+    return tree_to_source(new_tree), transformer.renames
+
+
+def super_replace_batch(code: str, renames: RenameMapping, context_rules: Optional[dict] = None, cache: Any = None) -> str:
+    """
+    Performs many renames with a single parse, index and traversal.
+
+    Args:
+        code: The code to modify.
+        renames: The target->replacement pairs (see normalize_renames for the accepted formats).
+        context_rules: Default `scope`/`functions` for the pairs, and `preserve_formatting`.
+        cache: An optional IndexCache.
+
+    Returns:
+        The modified code.
+    """
+    context_rules = context_rules or {}
+    tree, index = build_index(code, cache)
+    specs = normalize_renames(renames, context_rules)
+    new_code, _ = batch_rename_source(code, tree, index, specs, context_rules.get("preserve_formatting", False))
+    return new_code
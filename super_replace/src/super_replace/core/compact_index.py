@@ -0,0 +1,154 @@
+"""
+Module: compact_index - memory-lean, read-only form of an Index
+
+An Index keeps its tree alive: every mapping is keyed by `ast.AST` objects and
+each binding carries dicts and lists of nodes. CompactIndex keeps only what
+queries need, in flat `array`s indexed by integer ids:
+
+- scopes are numbered 0..n-1 in creation order, with parallel arrays for their
+  kind, parent and original scope id;
+- bindings are numbered the same way, with their owning scope and name;
+- definitions and uses are stored per binding in CSR layout (an offsets array
+  plus parallel line/column arrays), so a node id is a position in those arrays.
+
+Once built, the tree and the full Index can be dropped. The result of
+`binding_info` is identical to binding_info_from_index on the source Index.
+"""
+
+from __future__ import annotations
+import ast
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from super_replace.core.autonomous_replacer import BindingKey, Index, ScopeKind, build_index
+
+_KINDS = list(ScopeKind)
+_KIND_CODES = {kind: code for code, kind in enumerate(_KINDS)}
+_NO_POSITION = -1
+
+
+def _positions(nodes: Iterable[ast.AST], lines: array, cols: array) -> None:
+    for node in nodes:
+        # Synthetic nodes (e.g. the name bound by an except handler) have no position.
+        lines.append(getattr(node, "lineno", _NO_POSITION))
+        cols.append(getattr(node, "col_offset", _NO_POSITION))
+
+
+class CompactIndex:
+    """
+    Read-only scope and binding tables built from an Index.
+    """
+
+    __slots__ = (
+        "scope_ids", "scope_kinds", "scope_parents", "scope_names",
+        "binding_scopes", "binding_names", "names",
+        "def_offsets", "def_lines", "def_cols",
+        "use_offsets", "use_lines", "use_cols",
+    )
+
+    def __init__(self) -> None:
+        self.scope_ids = array("i")
+        self.scope_kinds = array("b")
+        self.scope_parents = array("i")  # -1 for the module scope
+        self.scope_names: List[str] = []
+        self.binding_scopes = array("i")
+        self.binding_names: List[str] = []
+        # name -> binding ids of that name, in creation order.
+        self.names: Dict[str, array] = {}
+        self.def_offsets = array("i", [0])
+        self.def_lines = array("i")
+        self.def_cols = array("i")
+        self.use_offsets = array("i", [0])
+        self.use_lines = array("i")
+        self.use_cols = array("i")
+
+    @classmethod
+    def from_index(cls, index: Index) -> "CompactIndex":
+        compact = cls()
+        positions = {}
+        for position, scope in enumerate(index.scopes):
+            positions[scope] = position
+            compact.scope_ids.append(scope.id)
+            compact.scope_kinds.append(_KIND_CODES[scope.kind])
+            compact.scope_names.append(scope.name)
+        for scope in index.scopes:
+            compact.scope_parents.append(positions[scope.parent] if scope.parent is not None else -1)
+
+        binding_ids: Dict[BindingKey, int] = {}
+        for scope in index.scopes:
+            for name, binding in scope.locals.items():
+                key = binding.key
+                binding_ids[key] = len(compact.binding_names)
+                compact.binding_scopes.append(positions[scope])
+                compact.binding_names.append(name)
+                _positions(index.defs.get(key, ()), compact.def_lines, compact.def_cols)
+                compact.def_offsets.append(len(compact.def_lines))
+                _positions(index.uses.get(key, ()), compact.use_lines, compact.use_cols)
+                compact.use_offsets.append(len(compact.use_lines))
+        for name, keys in index.names.items():
+            compact.names[name] = array("i", (binding_ids[key] for key in keys))
+        return compact
+
+    @property
+    def scope_count(self) -> int:
+        return len(self.scope_ids)
+
+    @property
+    def binding_count(self) -> int:
+        return len(self.binding_names)
+
+    def binding_key(self, binding_id: int) -> BindingKey:
+        return BindingKey(self.scope_ids[self.binding_scopes[binding_id]], self.binding_names[binding_id])
+
+    def scope_kind(self, scope_position: int) -> ScopeKind:
+        return _KINDS[self.scope_kinds[scope_position]]
+
+    def bindings_of(self, name: str) -> array:
+        return self.names.get(name, array("i"))
+
+    def definition_count(self, binding_id: int) -> int:
+        return self.def_offsets[binding_id + 1] - self.def_offsets[binding_id]
+
+    def use_count(self, binding_id: int) -> int:
+        return self.use_offsets[binding_id + 1] - self.use_offsets[binding_id]
+
+    def definitions(self, binding_id: int) -> Iterator[Tuple[int, int]]:
+        """
+        Yields the `(line, col)` of each definition; `(-1, -1)` for synthetic nodes.
+        """
+        for node_id in range(self.def_offsets[binding_id], self.def_offsets[binding_id + 1]):
+            yield self.def_lines[node_id], self.def_cols[node_id]
+
+    def uses(self, binding_id: int) -> Iterator[Tuple[int, int]]:
+        for node_id in range(self.use_offsets[binding_id], self.use_offsets[binding_id + 1]):
+            yield self.use_lines[node_id], self.use_cols[node_id]
+
+    def binding_info(self, target: str) -> dict:
+        """
+        Same result as binding_info_from_index on the Index this was built from.
+        """
+        info = {'bindings': [], 'total_uses': 0, 'total_definitions': 0}
+        binding_ids = sorted(self.bindings_of(target), key=lambda b: self.scope_ids[self.binding_scopes[b]])
+        for binding_id in binding_ids:
+            scope = self.binding_scopes[binding_id]
+            uses = self.use_count(binding_id)
+            defs = self.definition_count(binding_id)
+            info['bindings'].append({
+                'scope_kind': self.scope_kind(scope).name,
+                'scope_name': self.scope_names[scope],
+                'scope_id': self.scope_ids[scope],
+                'uses': uses,
+                'definitions': defs,
+                'binding_key': self.binding_key(binding_id)
+            })
+            info['total_uses'] += uses
+            info['total_definitions'] += defs
+        return info
+
+
+def build_compact_index(code: str, cache: Optional[object] = None) -> CompactIndex:
+    """
+    Parses and indexes `code`, keeping only the compact tables; the tree and full Index are released.
+    """
+    _, index = build_index(code, cache)
+    return CompactIndex.from_index(index)
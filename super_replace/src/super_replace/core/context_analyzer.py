@@ -1,96 +1,111 @@
 import ast
-from typing import List, Dict, Any
+import copy
+import hashlib
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional
+
+# Extracted context per content hash, shared by all analyzers. Entries hold only
+# plain dicts and strings, never tree nodes, so they do not keep trees alive.
+_MEMO_ENTRIES = 32
+_memo: "OrderedDict[str, Dict[str, List[Dict[str, Any]]]]" = OrderedDict()
+
+
+def _unparse(node: Optional[ast.AST]) -> str:
+    if node is None or not hasattr(ast, 'unparse'):
+        return ""
+    return ast.unparse(node)
+
+
+def clear_context_cache() -> None:
+    """
+    Drops the memoized context of every analyzed module.
+    """
+    _memo.clear()
+
 
 class ContextAnalyzer:
     """
     Analyzes Python code to extract context relevant for LLM-driven refactoring.
-    This is a placeholder for more sophisticated analysis.
+
+    One walk of the tree collects the function, class, assignment and import
+    nodes together. A category is turned into dicts (unparsing bases, values and
+    annotations) only when it is first requested, and the result is memoized per
+    content hash, so analyzing the same code again skips the parse as well.
     """
 
     def __init__(self, code: str):
         self.code = code
-        self.tree = ast.parse(code)
+        self.key = hashlib.sha256(code.encode("utf-8", "surrogatepass")).hexdigest()
+        self._tree: Optional[ast.Module] = None
+        self._nodes: Optional[Dict[str, List[ast.AST]]] = None
+        self._context = _memo.get(self.key)
+        if self._context is None:
+            self._tree = ast.parse(code)  # Invalid code is reported here, as before.
+            self._context = {}
+            _memo[self.key] = self._context
+            while len(_memo) > _MEMO_ENTRIES:
+                _memo.popitem(last=False)
+        else:
+            _memo.move_to_end(self.key)
+
+    @property
+    def tree(self) -> ast.Module:
+        if self._tree is None:
+            self._tree = ast.parse(self.code)
+        return self._tree
+
+    def _collect(self) -> Dict[str, List[ast.AST]]:
+        """
+        Collects the nodes of every category in a single walk, in `ast.walk` order.
+        """
+        if self._nodes is None:
+            nodes = {"functions": [], "classes": [], "assignments": [], "imports": []}
+            for node in ast.walk(self.tree):
+                if isinstance(node, ast.FunctionDef):
+                    nodes["functions"].append(node)
+                elif isinstance(node, ast.ClassDef):
+                    nodes["classes"].append(node)
+                elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+                    nodes["assignments"].append(node)
+                elif isinstance(node, (ast.Import, ast.ImportFrom)):
+                    nodes["imports"].append(node)
+            self._nodes = nodes
+        return self._nodes
+
+    def _category(self, name: str, describe) -> List[Dict[str, Any]]:
+        entries = self._context.get(name)
+        if entries is None:
+            entries = []
+            for node in self._collect()[name]:
+                entries.extend(describe(node))
+            self._context[name] = entries
+        # Callers may modify what they get, nested `args`/`bases` lists included; the memoized
+        # entries must stay intact.
+        return copy.deepcopy(entries)
 
     def get_function_definitions(self) -> List[Dict[str, Any]]:
         """
         Extracts basic information about function definitions.
         """
-        functions = []
-        for node in ast.walk(self.tree):
-            if isinstance(node, ast.FunctionDef):
-                functions.append({
-                    "name": node.name,
-                    "lineno": node.lineno,
-                    "col_offset": node.col_offset,
-                    "args": [arg.arg for arg in node.args.args],
-                    "docstring": ast.get_docstring(node)
-                })
-        return functions
+        return self._category("functions", _describe_function)
 
     def get_class_definitions(self) -> List[Dict[str, Any]]:
         """
         Extracts basic information about class definitions.
         """
-        classes = []
-        for node in ast.walk(self.tree):
-            if isinstance(node, ast.ClassDef):
-                classes.append({
-                    "name": node.name,
-                    "lineno": node.lineno,
-                    "col_offset": node.col_offset,
-                    "bases": [ast.unparse(base) for base in node.bases] if hasattr(ast, 'unparse') else [],
-                    "docstring": ast.get_docstring(node)
-                })
-        return classes
+        return self._category("classes", _describe_class)
 
     def get_variable_assignments(self) -> List[Dict[str, Any]]:
         """
         Extracts basic information about variable assignments.
         """
-        assignments = []
-        for node in ast.walk(self.tree):
-            if isinstance(node, ast.Assign):
-                for target in node.targets:
-                    if isinstance(target, ast.Name):
-                        assignments.append({
-                            "name": target.id,
-                            "lineno": node.lineno,
-                            "col_offset": node.col_offset,
-                            "value": ast.unparse(node.value) if hasattr(ast, 'unparse') else ""
-                        })
-            elif isinstance(node, ast.AnnAssign):
-                if isinstance(node.target, ast.Name):
-                    assignments.append({
-                        "name": node.target.id,
-                        "lineno": node.lineno,
-                        "col_offset": node.col_offset,
-                        "annotation": ast.unparse(node.annotation) if hasattr(ast, 'unparse') else "",
-                        "value": ast.unparse(node.value) if node.value and hasattr(ast, 'unparse') else ""
-                    })
-        return assignments
+        return self._category("assignments", _describe_assignment)
 
     def get_imports(self) -> List[Dict[str, Any]]:
         """
         Extracts basic information about import statements.
         """
-        imports = []
-        for node in ast.walk(self.tree):
-            if isinstance(node, ast.Import):
-                for alias in node.names:
-                    imports.append({
-                        "module": alias.name,
-                        "asname": alias.asname,
-                        "lineno": node.lineno
-                    })
-            elif isinstance(node, ast.ImportFrom):
-                for alias in node.names:
-                    imports.append({
-                        "module": node.module,
-                        "name": alias.name,
-                        "asname": alias.asname,
-                        "lineno": node.lineno
-                    })
-        return imports
+        return self._category("imports", _describe_import)
 
     def get_all_context(self) -> Dict[str, Any]:
         """
@@ -103,6 +118,65 @@ class ContextAnalyzer:
             "imports": self.get_imports()
         }
 
+
+def _describe_function(node: ast.FunctionDef) -> List[Dict[str, Any]]:
+    return [{
+        "name": node.name,
+        "lineno": node.lineno,
+        "col_offset": node.col_offset,
+        "args": [arg.arg for arg in node.args.args],
+        "docstring": ast.get_docstring(node)
+    }]
+
+
+def _describe_class(node: ast.ClassDef) -> List[Dict[str, Any]]:
+    return [{
+        "name": node.name,
+        "lineno": node.lineno,
+        "col_offset": node.col_offset,
+        "bases": [_unparse(base) for base in node.bases] if hasattr(ast, 'unparse') else [],
+        "docstring": ast.get_docstring(node)
+    }]
+
+
+def _describe_assignment(node: ast.AST) -> List[Dict[str, Any]]:
+    if isinstance(node, ast.AnnAssign):
+        if not isinstance(node.target, ast.Name):
+            return []
+        return [{
+            "name": node.target.id,
+            "lineno": node.lineno,
+            "col_offset": node.col_offset,
+            "annotation": _unparse(node.annotation),
+            "value": _unparse(node.value)
+        }]
+    names = [target.id for target in node.targets if isinstance(target, ast.Name)]
+    if not names:
+        return []
+    value = _unparse(node.value)  # Once for all targets of `a = b = value`.
+    return [{
+        "name": name,
+        "lineno": node.lineno,
+        "col_offset": node.col_offset,
+        "value": value
+    } for name in names]
+
+
+def _describe_import(node: ast.AST) -> List[Dict[str, Any]]:
+    if isinstance(node, ast.Import):
+        return [{
+            "module": alias.name,
+            "asname": alias.asname,
+            "lineno": node.lineno
+        } for alias in node.names]
+    return [{
+        "module": node.module,
+        "name": alias.name,
+        "asname": alias.asname,
+        "lineno": node.lineno
+    } for alias in node.names]
+
+
 if __name__ == "__main__":
     sample_code = """
 import os
@@ -127,4 +201,4 @@ y = calculate_sum(x, 20)
     analyzer = ContextAnalyzer(sample_code)
     context = analyzer.get_all_context()
     import json
-    print(json.dumps(context, indent=2))
\ No newline at end of file
+    print(json.dumps(context, indent=2))
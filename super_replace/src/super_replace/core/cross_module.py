@@ -0,0 +1,489 @@
+"""
+Module: cross_module - renames of module-level symbols across a project
+
+A rename of `pkg.mod:func` has to reach every file that refers to it:
+
+- in `pkg/mod.py`, the `def`/`class` name (or module-level binding), every
+  reference resolving to it, and its entry in `__all__`;
+- `from pkg.mod import func` (the imported name, and the local binding's uses
+  unless it is aliased with `as`), with relative imports resolved;
+- attribute accesses through module imports: `pkg.mod.func`, `m.func` after
+  `import pkg.mod as m`, `mod.func` after `from pkg import mod`;
+- modules that re-export the name with a module-level `from pkg.mod import
+  func`, whose own importers are then renamed the same way.
+
+The project symbol table is built from a cheap per-file summary (the imports of
+each module, from one `ast.parse`), computed in a process pool and cached per
+file content, so a second run only re-parses changed files. Only the defining
+module and its dependents are then fully indexed and patched; the edits are
+applied to the original text, so formatting and comments are preserved.
+"""
+
+from __future__ import annotations
+import ast
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from super_replace.core.autonomous_replacer import BindingKey, Index, build_index
+from super_replace.core.index_cache import IndexCache, worker_cache
+from super_replace.core.project import FileResult
+from super_replace.core.source_patcher import TextEdit, apply_text_edits, edits_for_renames, split_lines
+from super_replace.utils.files import atomic_write_text, iter_python_files, read_source
+from super_replace.utils.pool import run_tasks
+
+# (module, name) -> new name
+SymbolRenames = Dict[Tuple[str, str], str]
+
+_DEFINITION_TYPES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+
+
+def module_name_for(path: Path, root: Path) -> Tuple[str, bool]:
+    """
+    Returns the dotted module name of a file below `root`, and whether it is a package `__init__`.
+    """
+    relative = Path(path).resolve().relative_to(Path(root).resolve()).with_suffix("")
+    parts = list(relative.parts)
+    is_package = parts[-1] == "__init__"
+    if is_package:
+        parts.pop()
+    return ".".join(parts), is_package
+
+
+def import_root_for(path: Path) -> Path:
+    """
+    Returns the directory a file is imported from: the parent of its outermost regular package,
+    e.g. `src` for `src/pkg/sub/mod.py` when `pkg` and `pkg/sub` have an `__init__.py`.
+    """
+    directory = Path(path).resolve().parent
+    while (directory / "__init__.py").is_file() and directory.parent != directory:
+        directory = directory.parent
+    return directory
+
+
+def resolve_import_from(module_name: str, is_package: bool, level: int, module: Optional[str]) -> Optional[str]:
+    """
+    Returns the absolute module named by `from <level dots><module> import ...`, or None if it
+    climbs above the root.
+    """
+    if level == 0:
+        return module
+    package = module_name.split(".") if module_name else []
+    if not is_package:
+        package = package[:-1]
+    if level - 1 > len(package):
+        return None
+    base = package[:len(package) - (level - 1)]
+    if module:
+        base.append(module)
+    return ".".join(base)
+
+
+@dataclass
+class ModuleSummary:
+    """What the symbol table needs to know about one module."""
+    name: str
+    is_package: bool
+    # Every module the file imports from or accesses through an import.
+    imported_modules: Set[str] = field(default_factory=set)
+    # Module-level `from X import name` without `as`: names this module re-exports.
+    reexports: List[Tuple[str, str]] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+def _iter_statements(tree: ast.Module):
+    # Imports are statements, so expressions never need to be visited.
+    pending = list(tree.body)
+    while pending:
+        node = pending.pop()
+        yield node
+        pending.extend(
+            child for child in ast.iter_child_nodes(node)
+            if isinstance(child, (ast.stmt, ast.excepthandler, ast.match_case))
+        )
+
+
+def summarize_module(code: str, module_name: str, is_package: bool) -> ModuleSummary:
+    summary = ModuleSummary(module_name, is_package)
+    tree = ast.parse(code)
+    module_level = set(map(id, tree.body))
+    for node in _iter_statements(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                summary.imported_modules.add(alias.name)
+        elif isinstance(node, ast.ImportFrom):
+            base = resolve_import_from(module_name, is_package, node.level, node.module)
+            if base is None:
+                continue
+            summary.imported_modules.add(base)
+            for alias in node.names:
+                # `from pkg import mod` may import a submodule.
+                summary.imported_modules.add(f"{base}.{alias.name}")
+                if alias.asname is None and alias.name != "*" and id(node) in module_level:
+                    summary.reexports.append((base, alias.name))
+    return summary
+
+
+class ProjectSymbols:
+    """
+    Module summaries of every file below a root, and the import graph between them.
+    """
+
+    def __init__(self, root: Path, files: Dict[str, Path], summaries: Dict[str, ModuleSummary]) -> None:
+        self.root = root
+        self.files = files
+        self.summaries = summaries
+        self._importers: Dict[str, Set[str]] = {}
+        for name, summary in summaries.items():
+            for imported in summary.imported_modules:
+                self._importers.setdefault(imported, set()).add(name)
+
+    def importers_of(self, module: str) -> Set[str]:
+        return set(self._importers.get(module, ()))
+
+    def affected_renames(self, module: str, name: str, replacement: str) -> SymbolRenames:
+        """
+        The rename of `module:name` plus the re-exports it implies, transitively.
+        """
+        renames = {(module, name): replacement}
+        pending = [(module, name)]
+        while pending:
+            source = pending.pop()
+            for importer in self.importers_of(source[0]):
+                if source in self.summaries[importer].reexports and (importer, source[1]) not in renames:
+                    renames[(importer, source[1])] = replacement
+                    pending.append((importer, source[1]))
+        return renames
+
+    def dependents(self, renames: SymbolRenames) -> Set[str]:
+        """
+        The modules defining or importing any renamed symbol: the only ones that need indexing.
+        """
+        modules = set()
+        for module, _ in renames:
+            if module in self.files:
+                modules.add(module)
+            modules |= self.importers_of(module)
+        return modules
+
+
+@dataclass(frozen=True)
+class _SummaryTask:
+    path: Path
+    module: str
+    is_package: bool
+    cache_dir: Optional[Path]
+
+
+# One cache per worker process, created on first use.
+_summary_caches: Dict[Path, IndexCache] = {}
+
+
+def _summary_cache(cache_dir: Optional[Path]) -> Optional[IndexCache]:
+    if cache_dir is None:
+        return None
+    if cache_dir not in _summary_caches:
+        # Summaries live apart from index entries, which are keyed by the same content hashes.
+        # They are small, and a project has one per file, so the entry limit is much higher.
+        _summary_caches[cache_dir] = IndexCache(cache_dir / "symbols", max_entries=100_000, memory_entries=0)
+    return _summary_caches[cache_dir]
+
+
+def _summarize_file(task: _SummaryTask) -> ModuleSummary:
+    try:
+        code = read_source(task.path)
+    except (OSError, UnicodeDecodeError) as e:
+        return ModuleSummary(task.module, task.is_package, error=f"Could not read file: {e}")
+    cache = _summary_cache(task.cache_dir)
+    # Relative imports resolve differently under another module name, so it is part of the key.
+    cache_key = f"{task.module}:{task.is_package}\n{code}"
+    if cache is not None:
+        cached = cache.load(cache_key)
+        if cached is not None:
+            return cached
+    try:
+        summary = summarize_module(code, task.module, task.is_package)
+    except (SyntaxError, ValueError) as e:
+        return ModuleSummary(task.module, task.is_package, error=f"Could not parse file: {e}")
+    if cache is not None:
+        cache.store(cache_key, summary)
+    return summary
+
+
+def build_project_symbols(
+    root: Path,
+    *,
+    jobs: Optional[int] = None,
+    excluded_dirs: Optional[Iterable[str]] = None,
+    cache_dir: Optional[Path] = None,
+) -> ProjectSymbols:
+    """
+    Summarizes every Python file below `root` (module names are relative to it).
+    """
+    root = Path(root)
+    files: Dict[str, Path] = {}
+    tasks = []
+    for path in iter_python_files(root, excluded_dirs):
+        module, is_package = module_name_for(path, root)
+        files[module] = path
+        tasks.append(_SummaryTask(path, module, is_package, cache_dir))
+    summaries = {task.module: summary for task, summary in zip(tasks, run_tasks(_summarize_file, tasks, jobs))}
+    return ProjectSymbols(root, files, summaries)
+
+
+def find_importers(
+    root: Path,
+    paths: Iterable[Path],
+    *,
+    jobs: Optional[int] = 1,
+    excluded_dirs: Optional[Iterable[str]] = None,
+    cache_dir: Optional[Path] = None,
+) -> List[Path]:
+    """
+    Returns the Python files below `root` that import any of `paths`, other than `paths` themselves.
+
+    Module names are taken relative to each file's import root (see import_root_for) rather than
+    to `root`, so a repository with a `src` layout can be searched from its top directory. A
+    changed file is also matched by its name relative to `root`, for namespace packages.
+
+    A file can only import `pkg.mod` if its text mentions `mod`, so the files are first filtered
+    with a plain substring test and only the remaining candidates are summarized.
+    """
+    root = Path(root).resolve()
+    import_roots: Dict[Path, Path] = {}
+
+    def module_name(path: Path) -> Tuple[str, bool]:
+        if path.parent not in import_roots:
+            import_roots[path.parent] = import_root_for(path)
+        return module_name_for(path, import_roots[path.parent])
+
+    changed = {Path(path).resolve() for path in paths}
+    modules = {module_name(path)[0] for path in changed}
+    modules |= {module_name_for(path, root)[0] for path in changed if path.is_relative_to(root)}
+    needles = {module.rsplit(".", 1)[-1].encode("utf-8") for module in modules if module}
+    if not needles:
+        return []
+    tasks = []
+    for path in iter_python_files(root, excluded_dirs):
+        if path in changed:
+            continue
+        try:
+            data = path.read_bytes()
+        except OSError:
+            continue
+        if any(needle in data for needle in needles):
+            tasks.append(_SummaryTask(path, *module_name(path), cache_dir))
+    return [
+        task.path for task, summary in zip(tasks, run_tasks(_summarize_file, tasks, jobs))
+        if summary.imported_modules & modules
+    ]
+
+
+def _binding_renames(index: Index, key: BindingKey, old: str, new: str) -> List[tuple]:
+    renames = [(node, old, new) for node in [*index.defs.get(key, ()), *index.uses.get(key, ())]
+               if getattr(node, "lineno", None) is not None]
+    for mapping in (index.except_names, index.global_names, index.nonlocal_names):
+        renames.extend((node, old, new) for node in mapping.get(key, ()))
+    return renames
+
+
+def _module_level_nodes(tree: ast.Module):
+    """
+    Yields the module-level statements, descending into `if`/`try`/`with` blocks but not into
+    function or class bodies.
+    """
+    pending = list(tree.body)
+    while pending:
+        node = pending.pop()
+        yield node
+        if not isinstance(node, _DEFINITION_TYPES):
+            pending.extend(child for child in ast.iter_child_nodes(node) if isinstance(child, ast.stmt))
+
+
+def _all_entry_edits(code_lines: List[bytes], node: ast.AST, old: str, new: str) -> List[TextEdit]:
+    # String entries of a module-level `__all__ = [...]`, for plain single-line literals.
+    if not (isinstance(node, ast.Assign) and any(isinstance(t, ast.Name) and t.id == "__all__" for t in node.targets)):
+        return []
+    if not isinstance(node.value, (ast.List, ast.Tuple)):
+        return []
+    edits = []
+    for element in node.value.elts:
+        if isinstance(element, ast.Constant) and element.value == old and element.lineno == element.end_lineno:
+            literal = code_lines[element.lineno - 1][element.col_offset:element.end_col_offset]
+            if literal[:1] in (b"'", b'"') and literal[1:-1] == old.encode("utf-8"):
+                edits.append(TextEdit(element.lineno, element.col_offset + 1, old, new))
+    return edits
+
+
+def _dotted_target(node: ast.AST, index: Index, module_aliases: Dict[BindingKey, str]) -> Optional[str]:
+    """
+    The module an expression refers to through imports (`pkg.mod`, `m`, ...), or None.
+    """
+    if isinstance(node, ast.Name):
+        key = index.node_to_binding.get(node)
+        return module_aliases.get(key) if key is not None else None
+    if isinstance(node, ast.Attribute):
+        base = _dotted_target(node.value, index, module_aliases)
+        return f"{base}.{node.attr}" if base is not None else None
+    return None
+
+
+def symbol_rename_edits(code: str, module_name: str, is_package: bool, renames: SymbolRenames,
+                        cache: Optional[IndexCache] = None) -> List[TextEdit]:
+    """
+    The edits that apply `renames` to one module: definitions of its own renamed symbols and
+    every reference to renamed symbols of other modules.
+    """
+    tree, index = build_index(code, cache)
+    lines = split_lines(code)
+    module_scope = index.scopes[0]
+    triples: List[tuple] = []
+    extra_edits: List[TextEdit] = []
+
+    own = {name: new for (module, name), new in renames.items() if module == module_name}
+    if own:
+        defined = set(module_scope.locals)
+        for node in _module_level_nodes(tree):
+            if isinstance(node, _DEFINITION_TYPES) and node.name in own:
+                triples.append((node, node.name, own[node.name]))
+                defined.add(node.name)
+        for name, new in own.items():
+            if name in module_scope.locals:
+                triples.extend(_binding_renames(index, module_scope.locals[name].key, name, new))
+            if name in defined:
+                # Free names that resolve to nothing in the module refer to the module-level def.
+                triples.extend((node, name, new) for node in index.unresolved.get(name, ()))
+            for node in tree.body:
+                extra_edits.extend(_all_entry_edits(lines, node, name, new))
+
+    module_aliases: Dict[BindingKey, str] = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                key = index.node_to_binding.get(alias)
+                if key is not None:
+                    module_aliases[key] = alias.name if alias.asname else alias.name.split(".")[0]
+        elif isinstance(node, ast.ImportFrom):
+            base = resolve_import_from(module_name, is_package, node.level, node.module)
+            if base is None:
+                continue
+            for alias in node.names:
+                key = index.node_to_binding.get(alias)
+                if key is not None:
+                    module_aliases[key] = f"{base}.{alias.name}"
+                new = renames.get((base, alias.name))
+                if new is None:
+                    continue
+                triples.append((alias, alias.name, new))
+                if alias.asname is None and key is not None:
+                    triples.extend(_binding_renames(index, key, alias.name, new))
+
+    if module_aliases:
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Attribute):
+                base = _dotted_target(node.value, index, module_aliases)
+                new = renames.get((base, node.attr)) if base is not None else None
+                if new is not None:
+                    triples.append((node, node.attr, new))
+
+    return sorted(set(edits_for_renames(code, triples, lines)) | set(extra_edits))
+
+
+@dataclass(frozen=True)
+class _RewriteTask:
+    path: Path
+    module: str
+    is_package: bool
+    renames: tuple  # SymbolRenames items, hashable for the frozen dataclass
+    write: bool
+    keep_output: bool
+    cache_dir: Optional[Path] = None
+
+
+def _rewrite_file(task: _RewriteTask) -> FileResult:
+    result = FileResult(path=task.path)
+    timings = result.timings
+    start = time.perf_counter()
+    try:
+        code = read_source(task.path)
+    except (OSError, UnicodeDecodeError) as e:
+        result.error = f"Could not read file: {e}"
+        return result
+    timings["read"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    try:
+        edits = symbol_rename_edits(code, task.module, task.is_package, dict(task.renames), worker_cache(task.cache_dir))
+        new_code = apply_text_edits(code, edits)
+    except (SyntaxError, ValueError) as e:
+        result.error = f"Could not rename in file: {e}"
+        return result
+    timings["transform"] = time.perf_counter() - start
+
+    result.changed = bool(edits)
+    if result.changed and task.keep_output:
+        result.new_code = new_code
+    if result.changed and task.write:
+        start = time.perf_counter()
+        atomic_write_text(task.path, new_code)
+        timings["write"] = time.perf_counter() - start
+    return result
+
+
+def rename_symbol_in_project(
+    root: Path,
+    module: str,
+    name: str,
+    replacement: str,
+    *,
+    jobs: Optional[int] = None,
+    dry_run: bool = False,
+    excluded_dirs: Optional[Iterable[str]] = None,
+    cache_dir: Optional[Path] = None,
+    symbols: Optional[ProjectSymbols] = None,
+) -> List[FileResult]:
+    """Renames a module-level symbol in its module and in every module importing it.
+
+    Args:
+        root: The directory module names are relative to (e.g. `src`).
+        module: The dotted name of the defining module.
+        name: The module-level name to rename.
+        replacement: The new name.
+        jobs: Number of worker processes. Defaults to the number of CPUs; 1 runs inline.
+        dry_run: If True, files are not written and FileResult.new_code holds the output.
+        excluded_dirs: Directory names to skip while walking `root`.
+        cache_dir: Directory of the persistent IndexCache; module summaries are cached below it.
+        symbols: A ProjectSymbols already built for `root`, to skip the summary pass.
+
+    Returns:
+        One FileResult per module that was examined (the defining module and its importers),
+        plus one with an error for each module whose summary could not be built.
+
+    Raises:
+        ValueError: If `module` is not a module below `root`.
+    """
+    if symbols is None:
+        symbols = build_project_symbols(root, jobs=jobs, excluded_dirs=excluded_dirs, cache_dir=cache_dir)
+    if module not in symbols.files:
+        raise ValueError(f"No module named '{module}' below {root}")
+
+    renames = symbols.affected_renames(module, name, replacement)
+    results = [
+        FileResult(path=symbols.files[m], error=s.error)
+        for m, s in sorted(symbols.summaries.items()) if s.error is not None
+    ]
+    tasks = [
+        _RewriteTask(
+            path=symbols.files[m],
+            module=m,
+            is_package=symbols.summaries[m].is_package,
+            renames=tuple(sorted(renames.items())),
+            write=not dry_run,
+            keep_output=dry_run,
+            cache_dir=cache_dir,
+        )
+        for m in sorted(symbols.dependents(renames))
+        if m in symbols.files and symbols.summaries[m].error is None
+    ]
+    return results + run_tasks(_rewrite_file, tasks, jobs)
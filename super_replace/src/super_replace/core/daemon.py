@@ -0,0 +1,308 @@
+"""
+Module: daemon - long-running super_replace server
+
+Keeps one warm process with an in-memory IndexCache and answers requests over a
+Unix socket, so callers issuing many small renames pay neither interpreter
+startup nor import cost. The protocol is JSON-RPC 2.0 with one message per line
+(newlines inside code are escaped by JSON); see super_replace.client for the
+matching client.
+
+Methods:
+    rename(code | path, target, replacement, context_rules, write=False) -> {"code", "changed"}
+    batch_rename(code | path, renames, context_rules, write=False) -> {"code", "changed"}
+    binding_info(code | path, target) -> binding info, with binding keys as objects
+    check_safety(code | path, target, replacement, context_rules) -> {"safe", "issues", "suggestions"}
+    ping() -> {"pid", "version"}
+    stats() -> request and cache counters
+    shutdown() -> null, then the server stops
+"""
+
+from __future__ import annotations
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from super_replace.client import default_socket_path
+from super_replace.core.autonomous_replacer import (
+    BindingKey,
+    analyze_rename_safety,
+    get_binding_info,
+    super_replace_autonomous,
+)
+from super_replace.core.batch_replacer import RenameConflictError, super_replace_batch
+from super_replace.core.index_cache import IndexCache
+from super_replace.utils.files import atomic_write_text, read_source
+
+PROTOCOL_VERSION = 1
+
+# JSON-RPC 2.0 error codes.
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+SOURCE_ERROR = -32000  # The code (or file) could not be read or parsed.
+RENAME_CONFLICT = -32001
+
+
+class RequestError(Exception):
+    def __init__(self, code: int, message: str, data: Any = None) -> None:
+        super().__init__(message)
+        self.code = code
+        self.data = data
+
+
+def _binding_key_from_json(value: Any) -> Optional[BindingKey]:
+    if value is None or isinstance(value, BindingKey):
+        return value
+    try:
+        return BindingKey(int(value["scope_id"]), str(value["name"]))
+    except (KeyError, TypeError, ValueError):
+        raise RequestError(INVALID_PARAMS, "target_binding_key must be {\"scope_id\": int, \"name\": str}")
+
+
+def _context_rules(params: dict) -> dict:
+    rules = params.get("context_rules") or {}
+    if not isinstance(rules, dict):
+        raise RequestError(INVALID_PARAMS, "context_rules must be an object")
+    rules = dict(rules)
+    if "target_binding_key" in rules:
+        rules["target_binding_key"] = _binding_key_from_json(rules["target_binding_key"])
+    return rules
+
+
+def _required(params: dict, name: str) -> str:
+    value = params.get(name)
+    if not isinstance(value, str) or not value:
+        raise RequestError(INVALID_PARAMS, f"Missing or invalid parameter '{name}'")
+    return value
+
+
+class RequestDispatcher:
+    """
+    Executes decoded requests against a shared IndexCache.
+
+    Requests are handled one at a time: the work is CPU bound, and the cache is
+    not safe for concurrent use.
+    """
+
+    def __init__(self, cache: Optional[IndexCache] = None) -> None:
+        self.cache = cache if cache is not None else IndexCache(memory_entries=256)
+        self.requests = 0
+        self.errors = 0
+        self.busy_time = 0.0
+        self.shutdown_requested = threading.Event()
+        self._lock = threading.Lock()
+        self._methods: Dict[str, Callable[[dict], Any]] = {
+            "rename": self._rename,
+            "batch_rename": self._batch_rename,
+            "binding_info": self._binding_info,
+            "check_safety": self._check_safety,
+            "ping": self._ping,
+            "stats": self._stats,
+            "shutdown": self._shutdown,
+        }
+
+    def handle_line(self, line: bytes) -> Optional[bytes]:
+        """
+        Handles one request line and returns the encoded response line (None for notifications).
+        """
+        request_id = None
+        try:
+            try:
+                request = json.loads(line)
+            except ValueError as e:
+                raise RequestError(PARSE_ERROR, f"Invalid JSON: {e}")
+            if not isinstance(request, dict) or not isinstance(request.get("method"), str):
+                raise RequestError(INVALID_REQUEST, "Expected an object with a 'method'")
+            request_id = request.get("id")
+            params = request.get("params") or {}
+            if not isinstance(params, dict):
+                raise RequestError(INVALID_PARAMS, "Only named parameters are supported")
+            method = self._methods.get(request["method"])
+            if method is None:
+                raise RequestError(METHOD_NOT_FOUND, f"Unknown method '{request['method']}'")
+            with self._lock:
+                started = time.perf_counter()
+                try:
+                    result = method(params)
+                finally:
+                    self.requests += 1
+                    self.busy_time += time.perf_counter() - started
+            if "id" not in request:
+                return None
+            response = {"jsonrpc": "2.0", "id": request_id, "result": result}
+        except RequestError as e:
+            self.errors += 1
+            error = {"code": e.code, "message": str(e)}
+            if e.data is not None:
+                error["data"] = e.data
+            response = {"jsonrpc": "2.0", "id": request_id, "error": error}
+        except Exception as e:
+            self.errors += 1
+            response = {"jsonrpc": "2.0", "id": request_id,
+                        "error": {"code": INTERNAL_ERROR, "message": f"{type(e).__name__}: {e}"}}
+        return json.dumps(response).encode("utf-8") + b"\n"
+
+    # -- methods --------------------------------------------------------------
+
+    def _source(self, params: dict) -> tuple[str, Optional[Path]]:
+        if isinstance(params.get("code"), str):
+            return params["code"], None
+        if isinstance(params.get("path"), str):
+            path = Path(params["path"])
+            try:
+                return read_source(path), path
+            except (OSError, UnicodeDecodeError) as e:
+                raise RequestError(SOURCE_ERROR, f"Cannot read {path}: {e}")
+        raise RequestError(INVALID_PARAMS, "Either 'code' or 'path' is required")
+
+    def _transformed(self, params: dict, transform: Callable[[str], str]) -> dict:
+        code, path = self._source(params)
+        try:
+            new_code = transform(code)
+        except SyntaxError as e:
+            raise RequestError(SOURCE_ERROR, f"Cannot parse the code: {e}")
+        changed = new_code != code
+        if changed and params.get("write"):
+            if path is None:
+                raise RequestError(INVALID_PARAMS, "'write' needs a 'path'")
+            atomic_write_text(path, new_code)
+        return {"code": new_code, "changed": changed}
+
+    def _rename(self, params: dict) -> dict:
+        target, replacement = _required(params, "target"), _required(params, "replacement")
+        rules = _context_rules(params)
+        return self._transformed(
+            params, lambda code: super_replace_autonomous(code, target, replacement, rules, cache=self.cache)
+        )
+
+    def _batch_rename(self, params: dict) -> dict:
+        renames = params.get("renames")
+        if not isinstance(renames, (dict, list)) or not renames:
+            raise RequestError(INVALID_PARAMS, "'renames' must be a non-empty object or list")
+        rules = _context_rules(params)
+        try:
+            return self._transformed(
+                params, lambda code: super_replace_batch(code, renames, rules, cache=self.cache)
+            )
+        except RenameConflictError as e:
+            raise RequestError(RENAME_CONFLICT, str(e), data=e.conflicts)
+        except ValueError as e:
+            raise RequestError(INVALID_PARAMS, str(e))
+
+    def _binding_info(self, params: dict) -> dict:
+        target = _required(params, "target")
+        code, _ = self._source(params)
+        try:
+            info = get_binding_info(code, target, cache=self.cache)
+        except SyntaxError as e:
+            raise RequestError(SOURCE_ERROR, f"Cannot parse the code: {e}")
+        for binding in info["bindings"]:
+            key = binding["binding_key"]
+            binding["binding_key"] = {"scope_id": key.scope_id, "name": key.name}
+        return info
+
+    def _check_safety(self, params: dict) -> dict:
+        target, replacement = _required(params, "target"), _required(params, "replacement")
+        code, _ = self._source(params)
+        try:
+            result = analyze_rename_safety(code, target, replacement, _context_rules(params), cache=self.cache)
+        except Exception as e:
+            # As check_rename_safety: unanalyzable code is reported as an issue.
+            return {"safe": False, "issues": [f"Error analyzing code: {e}"], "suggestions": []}
+        return {"safe": result["safe"], "issues": result["issues"], "suggestions": result["suggestions"]}
+
+    def _ping(self, params: dict) -> dict:
+        return {"pid": os.getpid(), "version": PROTOCOL_VERSION}
+
+    def _stats(self, params: dict) -> dict:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "busy_time": self.busy_time,
+            "cache_hits": self.cache.hits,
+            "cache_misses": self.cache.misses,
+        }
+
+    def _shutdown(self, params: dict) -> None:
+        self.shutdown_requested.set()
+        return None
+
+
+class _ConnectionHandler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        dispatcher: RequestDispatcher = self.server.dispatcher
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            response = dispatcher.handle_line(line)
+            if response is not None:
+                self.wfile.write(response)
+                self.wfile.flush()
+            if dispatcher.shutdown_requested.is_set():
+                # shutdown() blocks until serve_forever returns, so it must not run on this thread.
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+                return
+
+
+class DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Unix socket server; each connection gets a thread, requests are serialized by the dispatcher.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: Optional[str] = None, cache: Optional[IndexCache] = None) -> None:
+        self.socket_path = socket_path or default_socket_path()
+        _remove_stale_socket(self.socket_path)
+        self.dispatcher = RequestDispatcher(cache)
+        old_umask = os.umask(0o177)  # The socket is only usable by its owner.
+        try:
+            super().__init__(self.socket_path, _ConnectionHandler)
+        finally:
+            os.umask(old_umask)
+
+    def server_close(self) -> None:
+        super().server_close()
+        try:
+            os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+
+
+def _remove_stale_socket(socket_path: str) -> None:
+    """
+    Removes a socket file left behind by a daemon that is no longer running.
+
+    Raises:
+        RuntimeError: If another daemon is listening on the socket.
+    """
+    if not os.path.exists(socket_path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except (ConnectionRefusedError, FileNotFoundError):
+        os.unlink(socket_path)
+    else:
+        raise RuntimeError(f"A super_replace daemon is already listening on {socket_path}")
+    finally:
+        probe.close()
+
+
+def serve(socket_path: Optional[str] = None, cache_dir: Optional[Path] = None) -> None:
+    """
+    Runs the daemon until a `shutdown` request arrives or the process is interrupted.
+    """
+    cache = IndexCache(cache_dir, memory_entries=256)
+    with DaemonServer(socket_path, cache) as server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
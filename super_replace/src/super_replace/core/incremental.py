@@ -0,0 +1,342 @@
+"""
+Module: incremental - incremental re-indexing for editors and daemons
+
+IncrementalIndexer keeps a module's tree and Index up to date as the text is
+edited. When an edit falls inside a single function (top-level, or a method of
+a top-level class), only that function is re-parsed: its old subtree is removed
+from the Index and the new one is indexed in place, under the same parent scope.
+Anything else (module-level statements, class bodies, `global` declarations,
+renamed definitions) triggers a full rebuild.
+
+Function bodies are resolved against the final module bindings (see
+ScopeBuilder.resolve_deferred), so re-indexing one function in isolation gives
+the same bindings as a full pass.
+
+Line numbers of the statements after an edit are shifted lazily: each top-level
+statement carries a pending line delta that is applied only when its nodes are
+needed again. Apart from the edited function, an update only touches a few flat
+lists (statement line ranges and lambda scope labels).
+"""
+
+from __future__ import annotations
+import ast
+import bisect
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from super_replace.core.autonomous_replacer import Index, Scope, ScopeBuilder, ScopeKind
+
+_FUNCTION_TYPES = (ast.FunctionDef, ast.AsyncFunctionDef)
+
+
+def _first_line(node: ast.AST) -> int:
+    decorators = getattr(node, "decorator_list", None) or []
+    return min([node.lineno] + [d.lineno for d in decorators])
+
+
+def _changed_line_range(old: Sequence[str], new: Sequence[str]) -> Tuple[int, int, int]:
+    """
+    Returns `(start, old_end, new_end)` such that old[start:old_end] was replaced by
+    new[start:new_end] (0-based, end-exclusive).
+    """
+    limit = min(len(old), len(new))
+    start = 0
+    while start < limit and old[start] == new[start]:
+        start += 1
+    old_end, new_end = len(old), len(new)
+    while old_end > start and new_end > start and old[old_end - 1] == new[new_end - 1]:
+        old_end -= 1
+        new_end -= 1
+    return start, old_end, new_end
+
+
+class IncrementalIndexer:
+    """
+    Maintains the tree and Index of a module across edits.
+    """
+
+    def __init__(self, code: str) -> None:
+        self.lines: List[str] = code.splitlines(keepends=True)
+        self.full_rebuilds = 0
+        self.incremental_updates = 0
+        self._rebuild()
+        self.full_rebuilds = 0
+
+    @property
+    def code(self) -> str:
+        return "".join(self.lines)
+
+    @property
+    def tree(self) -> ast.Module:
+        """
+        The module tree, with every pending line shift applied.
+        """
+        for position in range(len(self._tree.body)):
+            self._flush_shift(position)
+        return self._tree
+
+    @property
+    def index(self) -> Index:
+        return self._index
+
+    # -- public API -----------------------------------------------------------
+
+    def update(self, new_code: str) -> bool:
+        """
+        Replaces the whole text, re-indexing only what changed.
+
+        Returns:
+            True if the update was applied incrementally, False if a full rebuild was needed.
+        """
+        new_lines = new_code.splitlines(keepends=True)
+        start, old_end, new_end = _changed_line_range(self.lines, new_lines)
+        if start == old_end == new_end:
+            return True
+        return self.apply_edit(start + 1, old_end, new_lines[start:new_end])
+
+    def apply_edit(self, start_line: int, end_line: int, new_lines: Sequence[str]) -> bool:
+        """
+        Replaces lines `start_line..end_line` (1-based, inclusive; `end_line = start_line - 1`
+        inserts before `start_line`) with `new_lines`, like an LSP incremental change.
+
+        Returns:
+            True if the edit was applied incrementally, False if a full rebuild was needed.
+
+        Raises:
+            SyntaxError: If the edited code does not parse. The previous tree and Index are kept,
+                and the next edit triggers a full rebuild.
+        """
+        new_lines = list(new_lines)
+        delta = len(new_lines) - (end_line - start_line + 1)
+        self.lines[start_line - 1:end_line] = new_lines
+
+        if not self._needs_rebuild and self._try_incremental(start_line, end_line, delta):
+            self.incremental_updates += 1
+            return True
+        self._rebuild()
+        return False
+
+    # -- full rebuild ---------------------------------------------------------
+
+    def _rebuild(self) -> None:
+        self._needs_rebuild = True
+        self._tree = ast.parse(self.code)
+        builder = ScopeBuilder()
+        builder.visit(self._tree)
+        self._index = builder.index
+        self._starts = [_first_line(stmt) for stmt in self._tree.body]
+        self._ends = [stmt.end_lineno for stmt in self._tree.body]
+        self._pending_shift = [0] * len(self._tree.body)
+        # Lambda scope -> current line of its label.
+        self._lambdas: Dict[Scope, int] = {
+            s: s.node.lineno for s in self._index.scopes if s.kind is ScopeKind.LAMBDA
+        }
+        self._needs_rebuild = False
+        self.full_rebuilds += 1
+
+    # -- incremental path -----------------------------------------------------
+
+    def _flush_shift(self, position: int) -> None:
+        shift = self._pending_shift[position]
+        if shift:
+            ast.increment_lineno(self._tree.body[position], shift)
+            self._pending_shift[position] = 0
+
+    def _locate(self, start_line: int, end_line: int) -> Optional[Tuple[List[ast.stmt], int, Scope, int, int, int]]:
+        """
+        Finds the function whose lines contain the edited range.
+
+        Returns:
+            `(body, position, parent_scope, top, first, last)`: the statement list holding the
+            function, its position there, the scope it is defined in, the position of its top-level
+            statement, and its current first/last lines. None if the edit is not contained in a
+            single function.
+        """
+        top = bisect.bisect_right(self._starts, start_line) - 1
+        if top < 0 or end_line > self._ends[top]:
+            return None
+        stmt = self._tree.body[top]
+        if isinstance(stmt, _FUNCTION_TYPES):
+            return self._tree.body, top, self._index.scopes[0], top, self._starts[top], self._ends[top]
+        if not isinstance(stmt, ast.ClassDef):
+            return None
+
+        self._flush_shift(top)
+        class_scope = self._index.scope_by_node.get(stmt)
+        for position, member in enumerate(stmt.body):
+            if isinstance(member, _FUNCTION_TYPES) and _first_line(member) <= start_line and end_line <= member.end_lineno:
+                if class_scope is None:
+                    return None
+                return stmt.body, position, class_scope, top, _first_line(member), member.end_lineno
+        return None
+
+    def _parse_function(self, first_line: int, last_line: int, indented: bool) -> Optional[ast.stmt]:
+        """
+        Parses the lines of a single function, positioned as in the module.
+        Returns None if they do not hold exactly one function, or if it declares a global.
+        """
+        segment = "".join(self.lines[first_line - 1:last_line])
+        try:
+            if indented:
+                module = ast.parse("if 1:\n" + segment)
+                if len(module.body) != 1:
+                    return None  # Dedented lines left the class body.
+                body = module.body[0].body
+                offset = first_line - 2
+            else:
+                module = ast.parse(segment)
+                body = module.body
+                offset = first_line - 1
+        except SyntaxError:
+            return None
+        if len(body) != 1 or not isinstance(body[0], _FUNCTION_TYPES):
+            return None
+        if "global" in segment and _contains_global(body[0]):
+            return None
+        ast.increment_lineno(body[0], offset)
+        return body[0]
+
+    def _try_incremental(self, start_line: int, end_line: int, delta: int) -> bool:
+        # Pure insertions belong to the function holding the line above them; re-parsing
+        # tells whether the inserted lines really extend it.
+        anchor = start_line if end_line >= start_line else start_line - 1
+        located = self._locate(anchor, max(end_line, anchor))
+        if located is None:
+            return False
+        body, position, parent_scope, top, first, last = located
+        is_method = body is not self._tree.body
+
+        old_node = body[position]
+        new_node = self._parse_function(first, last + delta, indented=is_method)
+        if new_node is None or new_node.name != old_node.name:
+            return False
+        if self._declares_global(old_node):
+            return False  # Re-indexing it could drop module-level bindings.
+
+        self._remove_subtree(old_node)
+        if delta:
+            self._relabel_lambdas(last, delta)
+        first_new_scope = len(self._index.scopes)
+        builder = ScopeBuilder(index=self._index, scope=parent_scope)
+        builder.visit(new_node)
+        builder.resolve_deferred()
+        for scope in self._index.scopes[first_new_scope:]:
+            if scope.kind is ScopeKind.LAMBDA:
+                self._lambdas[scope] = scope.node.lineno
+        body[position] = new_node
+
+        if is_method:
+            # Later members of the class move with the edit; the class itself grows or shrinks.
+            for member in body[position + 1:]:
+                ast.increment_lineno(member, delta)
+            class_node = self._tree.body[top]
+            class_node.end_lineno += delta
+            if position == len(body) - 1:
+                class_node.end_col_offset = new_node.end_col_offset
+        else:
+            self._pending_shift[top] = 0
+        self._ends[top] += delta
+        if delta:
+            following = slice(top + 1, None)
+            self._starts[following] = [line + delta for line in self._starts[following]]
+            self._ends[following] = [line + delta for line in self._ends[following]]
+            self._pending_shift[following] = [shift + delta for shift in self._pending_shift[following]]
+        return True
+
+    def _declares_global(self, function: ast.AST) -> bool:
+        # Global declarations are rare, so checking each one beats walking the function.
+        function_scope = self._index.scope_by_node.get(function)
+        for declarations in self._index.global_names.values():
+            for declaration in declarations:
+                scope = self._index.node_scope.get(declaration)
+                while scope is not None:
+                    if scope is function_scope:
+                        return True
+                    scope = scope.parent
+        return False
+
+    def _relabel_lambdas(self, after_line: int, delta: int) -> None:
+        # Lambda scopes are labelled by line ("@L12"); keep the labels of moved lambdas current.
+        lambdas = self._lambdas
+        for scope, line in lambdas.items():
+            if line > after_line:
+                lambdas[scope] = line + delta
+                scope.name = f"@L{line + delta}"
+
+    def _remove_subtree(self, root: ast.AST) -> None:
+        index = self._index
+        root_scope = index.scope_by_node.get(root)
+        nodes = list(ast.walk(root))
+        removed_scopes: Set[Scope] = set()
+        for node in nodes:
+            scope = index.scope_by_node.pop(node, None)
+            if scope is not None:
+                removed_scopes.add(scope)
+
+        for node in nodes:
+            index.node_scope.pop(node, None)
+            if isinstance(node, ast.Attribute):
+                _discard(index.attributes, node.attr, node)
+                member = index.node_member.pop(node, None)
+                if member is not None:
+                    _discard(index.member_accesses, member, node)
+                continue
+            key = index.node_to_binding.pop(node, None)
+            if key is None:
+                if isinstance(node, ast.Name):
+                    _discard(index.unresolved, node.id, node)
+                continue
+            if index.binding_key_to_scope.get(key) in removed_scopes:
+                continue  # The whole binding goes away below.
+            for mapping in (index.defs, index.uses):
+                entries = mapping.get(key)
+                if entries is not None and node in entries:
+                    entries.remove(node)
+            binding = index.binding_key_to_scope[key].locals.get(key.name)
+            if binding is not None and node in binding.defining_nodes:
+                binding.defining_nodes.remove(node)
+
+        for scope in removed_scopes:
+            for name, binding in scope.locals.items():
+                key = binding.key
+                # Also covers synthetic except-handler names, which are not tree nodes.
+                for node in index.defs.get(key, ()):
+                    index.node_scope.pop(node, None)
+                    index.node_to_binding.pop(node, None)
+                index.binding_key_to_scope.pop(key, None)
+                index.receivers.pop(key, None)
+                for mapping in (index.defs, index.uses, index.except_names, index.global_names, index.nonlocal_names):
+                    mapping.pop(key, None)
+                keys = index.names.get(name)
+                if keys is not None:
+                    keys.pop(key, None)
+                    if not keys:
+                        del index.names[name]
+        _remove_scopes(index.scopes, root_scope, removed_scopes)
+        for scope in removed_scopes:
+            self._lambdas.pop(scope, None)
+
+
+def _discard(mapping: Dict, key, node: ast.AST) -> None:
+    # Removes `node` from the ordered set `mapping[key]`, dropping the set once empty.
+    entries = mapping.get(key)
+    if entries is not None:
+        entries.pop(node, None)
+        if not entries:
+            del mapping[key]
+
+
+def _contains_global(node: ast.AST) -> bool:
+    return any(isinstance(child, ast.Global) for child in ast.walk(node))
+
+
+def _remove_scopes(scopes: List[Scope], root: Optional[Scope], removed: Set[Scope]) -> None:
+    # The scopes of a subtree are created together, so they usually form one run of the list
+    # starting at the subtree's own scope.
+    if root is None or not removed:
+        return
+    start = scopes.index(root)
+    end = start + len(removed)
+    if all(scope in removed for scope in scopes[start:end]):
+        del scopes[start:end]
+    else:
+        scopes[:] = [s for s in scopes if s not in removed]
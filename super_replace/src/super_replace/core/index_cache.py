@@ -0,0 +1,172 @@
+"""
+Module: index_cache - persistent cache of ScopeBuilder results
+
+Stores the parsed tree and its Index, keyed by a hash of the source code, so
+repeated queries against unchanged code skip `ast.parse` and the visitor pass.
+Entries are kept in a small in-memory LRU and, optionally, in a cache directory
+with least-recently-used eviction (recency is tracked through file mtimes).
+"""
+
+from __future__ import annotations
+import hashlib
+import os
+import pickle
+import sys
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# Bump when the layout of Scope/Binding/Index changes so stale entries are ignored.
+CACHE_FORMAT_VERSION = 6
+CACHE_DIR_ENV_VAR = "SUPER_REPLACE_CACHE_DIR"
+_ENTRY_SUFFIX = ".idx"
+
+
+def default_cache_dir() -> Path:
+    env_dir = os.environ.get(CACHE_DIR_ENV_VAR)
+    if env_dir:
+        return Path(env_dir)
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "super_replace" / "index"
+
+
+class IndexCache:
+    """
+    Content-hash keyed cache of `(tree, index)` pairs.
+
+    Values are stored pickled, both in memory and on disk, so every lookup
+    returns a fresh copy that callers are free to transform in place.
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = None, max_entries: int = 512, memory_entries: int = 64) -> None:
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        if self.cache_dir is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key_for(code: str) -> str:
+        """
+        Returns the cache key of a source string.
+        The Python version is part of the key since AST layouts differ between releases.
+        """
+        digest = hashlib.sha256()
+        digest.update(f"{CACHE_FORMAT_VERSION}:{sys.version_info[0]}.{sys.version_info[1]}:".encode())
+        digest.update(code.encode("utf-8", "surrogatepass"))
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}{_ENTRY_SUFFIX}"
+
+    def _remember(self, key: str, payload: bytes) -> None:
+        self._memory[key] = payload
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _read_payload(self, key: str) -> Optional[bytes]:
+        payload = self._memory.get(key)
+        if payload is not None:
+            self._memory.move_to_end(key)
+            return payload
+        if self.cache_dir is None:
+            return None
+        path = self._entry_path(key)
+        try:
+            payload = path.read_bytes()
+            os.utime(path)  # Mark the entry as recently used.
+        except OSError:
+            return None
+        self._remember(key, payload)
+        return payload
+
+    def load(self, code: str) -> Optional[Any]:
+        """
+        Returns the cached value for a source string, or None on a miss.
+        """
+        key = self.key_for(code)
+        payload = self._read_payload(key)
+        if payload is not None:
+            try:
+                value = pickle.loads(payload)
+            except Exception:
+                self._discard(key)
+            else:
+                self.hits += 1
+                return value
+        self.misses += 1
+        return None
+
+    def store(self, code: str, value: Any) -> None:
+        """
+        Caches a value for a source string.
+        Values that cannot be pickled (e.g. pathologically deep trees) are silently not cached.
+        """
+        try:
+            payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except (RecursionError, pickle.PicklingError, TypeError):
+            return
+        key = self.key_for(code)
+        self._remember(key, payload)
+        if self.cache_dir is None:
+            return
+        path = self._entry_path(key)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        try:
+            tmp_path.write_bytes(payload)
+            os.replace(tmp_path, path)
+        except OSError:
+            tmp_path.unlink(missing_ok=True)
+            return
+        self._evict()
+
+    def _discard(self, key: str) -> None:
+        self._memory.pop(key, None)
+        if self.cache_dir is not None:
+            self._entry_path(key).unlink(missing_ok=True)
+
+    def _evict(self) -> None:
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(_ENTRY_SUFFIX):
+                try:
+                    entries.append((entry.stat().st_mtime, entry.path))
+                except OSError:
+                    continue
+        excess = len(entries) - self.max_entries
+        if excess <= 0:
+            return
+        entries.sort()
+        for _, path in entries[:excess]:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass  # Already evicted by a concurrent process.
+
+    def clear(self) -> None:
+        self._memory.clear()
+        if self.cache_dir is None:
+            return
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(_ENTRY_SUFFIX):
+                Path(entry.path).unlink(missing_ok=True)
+
+
+# One cache per process and directory, created on first use.
+_worker_caches: Dict[Path, IndexCache] = {}
+
+
+def worker_cache(cache_dir: Optional[Path]) -> Optional[IndexCache]:
+    """
+    Returns this process's IndexCache for `cache_dir` (None without one), so the files a pool
+    worker handles share a cache without it being pickled along with every task.
+    """
+    if cache_dir is None:
+        return None
+    if cache_dir not in _worker_caches:
+        _worker_caches[cache_dir] = IndexCache(cache_dir)
+    return _worker_caches[cache_dir]
@@ -0,0 +1,145 @@
+"""
+Module: llm_backends - pluggable model backends for LLMIntegrator
+
+A backend turns prompt texts into responses. Backends that can answer several
+prompts in one call (a batch endpoint, or a local model taking a batch) set
+`supports_batching` and override `complete_batch`; LLMIntegrator then sends all
+uncached requests of a batch in as few calls as `max_batch_size` allows.
+
+`acomplete` is the coroutine used by the concurrent fan-out; by default it runs
+`complete` in a worker thread, which suits blocking HTTP clients.
+"""
+
+from __future__ import annotations
+import asyncio
+import hashlib
+import json
+import urllib.error
+import urllib.request
+from abc import ABC, abstractmethod
+from typing import Callable, List, Optional, Sequence
+
+
+class BackendError(RuntimeError):
+    """
+    A failed backend request. `retryable` marks transient failures (rate limits, server
+    errors, dropped connections); `retry_after` is the delay the server asked for, if any.
+    """
+
+    def __init__(self, message: str, retryable: bool = False, retry_after: Optional[float] = None) -> None:
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+class LLMBackend(ABC):
+    """
+    Interface of the model behind LLMIntegrator.
+    """
+
+    # Part of the response cache key, so responses of different models are kept apart.
+    name: str = "backend"
+    supports_batching: bool = False
+    # Largest batch a single complete_batch call accepts (None: unlimited).
+    max_batch_size: Optional[int] = None
+
+    @abstractmethod
+    def complete(self, prompt: str) -> str:
+        """
+        Returns the model's response to one prompt.
+        """
+
+    def complete_batch(self, prompts: Sequence[str]) -> List[str]:
+        """
+        Returns the responses to several prompts, in order. The default sends them one by one.
+        """
+        return [self.complete(prompt) for prompt in prompts]
+
+    async def acomplete(self, prompt: str) -> str:
+        """
+        Coroutine version of complete; the default runs it in a worker thread.
+        """
+        return await asyncio.to_thread(self.complete, prompt)
+
+
+def _default_response(prompt: str) -> str:
+    digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+    return f"Suggestion {digest}: consider a more descriptive name based on the provided context."
+
+
+class FakeBackend(LLMBackend):
+    """
+    Local, deterministic backend for tests and offline use.
+
+    Every backend call is recorded in `calls` as the list of prompts it received,
+    so tests can check how requests were cached and batched.
+    """
+
+    name = "fake"
+
+    def __init__(
+        self,
+        responder: Optional[Callable[[str], str]] = None,
+        supports_batching: bool = True,
+        max_batch_size: Optional[int] = None,
+    ) -> None:
+        self.responder = responder or _default_response
+        self.supports_batching = supports_batching
+        self.max_batch_size = max_batch_size
+        self.calls: List[List[str]] = []
+
+    def complete(self, prompt: str) -> str:
+        self.calls.append([prompt])
+        return self.responder(prompt)
+
+    def complete_batch(self, prompts: Sequence[str]) -> List[str]:
+        if not self.supports_batching:
+            return super().complete_batch(prompts)
+        self.calls.append(list(prompts))
+        return [self.responder(prompt) for prompt in prompts]
+
+
+def _retry_after(headers) -> Optional[float]:
+    value = headers.get("Retry-After") if headers is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None  # An HTTP date; fall back to the normal backoff.
+
+
+class HTTPBackend(LLMBackend):
+    """
+    Minimal JSON-over-HTTP backend using only the standard library.
+
+    Each request POSTs `{"prompt": ...}` to `url` and expects `{"response": ...}` back.
+    HTTP 429 and 5xx answers, timeouts and connection errors raise a retryable
+    BackendError; other failures are not retried.
+    """
+
+    name = "http"
+
+    def __init__(self, url: str, api_key: Optional[str] = None, timeout: float = 60.0) -> None:
+        self.url = url
+        self.api_key = api_key
+        self.timeout = timeout
+
+    def complete(self, prompt: str) -> str:
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        request = urllib.request.Request(
+            self.url, data=json.dumps({"prompt": prompt}).encode("utf-8"), headers=headers, method="POST"
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as reply:
+                body = json.loads(reply.read())
+        except urllib.error.HTTPError as e:
+            retryable = e.code == 429 or e.code >= 500
+            raise BackendError(f"HTTP {e.code} from {self.url}", retryable, _retry_after(e.headers)) from e
+        except (urllib.error.URLError, TimeoutError, ConnectionError) as e:
+            raise BackendError(f"Cannot reach {self.url}: {e}", retryable=True) from e
+        except ValueError as e:
+            raise BackendError(f"Invalid JSON from {self.url}: {e}") from e
+        if not isinstance(body, dict) or not isinstance(body.get("response"), str):
+            raise BackendError(f"Unexpected reply from {self.url}: missing 'response'")
+        return body["response"]
@@ -1,14 +1,84 @@
-from typing import Dict, Any
+import asyncio
+import json
+import logging
+from dataclasses import dataclass
+from typing import Dict, Any, AsyncIterator, List, Optional, Sequence, Tuple
+
+from super_replace.core.llm_backends import FakeBackend, LLMBackend
+from super_replace.core.prompt_context import (
+    DEFAULT_TOKEN_BUDGET,
+    build_rename_context,
+    estimate_tokens,
+    format_rename_context,
+)
+from super_replace.core.rate_limit import TokenBucket, retry_async
+from super_replace.core.response_cache import ResponseCache
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SuggestionResult:
+    """One answered request of stream_refactoring_suggestions."""
+    index: int  # Position of the request in the input sequence.
+    response: Optional[str] = None
+    error: Optional[Exception] = None
+    cached: bool = False
 
 class LLMIntegrator:
     """
     Integrates with a Language Model (LLM) for code refactoring suggestions.
-    This is a placeholder for actual LLM API calls.
+
+    Requests go to a pluggable LLMBackend (a local FakeBackend by default). With a
+    ResponseCache, a request whose normalized context and prompt were seen before is
+    answered from disk; the remaining requests of a batch are sent together when the
+    backend supports batching.
     """
 
-    def __init__(self, llm_api_key: str = "") -> None: # llm_api_key is a placeholder
+    def __init__(
+        self,
+        llm_api_key: str = "", # llm_api_key is a placeholder
+        token_budget: int = DEFAULT_TOKEN_BUDGET,
+        backend: Optional[LLMBackend] = None,
+        cache: Optional[ResponseCache] = None,
+    ) -> None:
         self.llm_api_key = llm_api_key
-        # Initialize LLM client here (e.g., OpenAI, Gemini, etc.)
+        self.token_budget = token_budget
+        self.backend = backend if backend is not None else FakeBackend()
+        self.cache = cache
+
+    def build_prompt(self, context: Dict[str, Any], prompt: str) -> str:
+        """
+        Renders the context and the task into the text sent to the LLM.
+
+        Contexts from build_rename_context are rendered as numbered snippets; any other
+        dict (e.g. from ContextAnalyzer) is serialized as compact JSON.
+        """
+        if "snippets" in context:
+            rendered = format_rename_context(context)
+        else:
+            rendered = json.dumps(context, separators=(",", ":"), default=str) + "\n"
+        return f"{rendered}\n{prompt}\n"
+
+    def get_rename_suggestion(self, code: str, target: str, replacement: Optional[str] = None, prompt: str = "") -> str:
+        """
+        Asks for a rename suggestion, sending only the scopes that reference `target`.
+
+        The context is built by build_rename_context and trimmed to `self.token_budget`.
+        """
+        context = build_rename_context(code, target, replacement, token_budget=self.token_budget)
+        if not prompt:
+            prompt = f"Suggest a descriptive name for '{target}'." if replacement is None else \
+                f"Is renaming '{target}' to '{replacement}' safe and clear?"
+        return self.get_refactoring_suggestion(context, prompt)
+
+    def request_key(self, context: Dict[str, Any], prompt: str) -> str:
+        """
+        Cache key of a request: the backend name plus the context and prompt, normalized so
+        that dict ordering and whitespace differences map to the same entry.
+        """
+        normalized_context = json.dumps(context, sort_keys=True, separators=(",", ":"), default=str)
+        return ResponseCache.key_for(self.backend.name, normalized_context, " ".join(prompt.split()))
 
     def get_refactoring_suggestion(self, context: Dict[str, Any], prompt: str) -> str:
         """
@@ -21,17 +91,126 @@ class LLMIntegrator:
         Returns:
             A string containing the LLM's refactoring suggestion or response.
         """
-        # In a real implementation, this would involve:
-        # 1. Formatting the context and prompt into a suitable input for the LLM.
-        # 2. Making an API call to the LLM.
-        # 3. Parsing the LLM's response.
-        
-        # Placeholder implementation:
-        print(f"[LLM Integrator] Received context: {context}")
-        print(f"[LLM Integrator] Received prompt: {prompt}")
-        
-        mock_suggestion = f"LLM Suggestion for '{prompt}': Consider using a more descriptive variable name or extracting this logic into a separate function based on the provided context."
-        return mock_suggestion
+        return self.get_refactoring_suggestions([(context, prompt)])[0]
+
+    def get_refactoring_suggestions(self, requests: Sequence[Tuple[Dict[str, Any], str]]) -> List[str]:
+        """
+        Answers several `(context, prompt)` requests, in order.
+
+        Cached responses are reused, identical requests are sent once, and the rest go to the
+        backend in batches of at most `backend.max_batch_size` when it supports batching.
+        """
+        responses, pending, texts = self._prepare(requests)
+        keys = list(pending)
+        if self.backend.supports_batching:
+            size = self.backend.max_batch_size or len(keys) or 1
+            batches = [keys[start:start + size] for start in range(0, len(keys), size)]
+        else:
+            batches = [[key] for key in keys]
+        for batch in batches:
+            if len(batch) == 1:
+                answers = [self.backend.complete(texts[batch[0]])]
+            else:
+                answers = self.backend.complete_batch([texts[key] for key in batch])
+            for key, answer in zip(batch, answers):
+                if self.cache is not None:
+                    self.cache.put(key, answer)
+                for position in pending[key]:
+                    responses[position] = answer
+        return responses
+
+    def _prepare(self, requests: Sequence[Tuple[Dict[str, Any], str]]):
+        """
+        Splits requests into cached responses and the unique prompts still to send.
+
+        Returns:
+            `(responses, pending, texts)`: the cached response of each position (None if
+            missing), the positions waiting for each request key, and the prompt text per key.
+        """
+        responses: List[Optional[str]] = [None] * len(requests)
+        pending: Dict[str, List[int]] = {}  # key -> positions waiting for that response
+        texts: Dict[str, str] = {}
+        for position, (context, prompt) in enumerate(requests):
+            key = self.request_key(context, prompt)
+            cached = self.cache.get(key) if self.cache is not None and key not in pending else None
+            if cached is not None:
+                responses[position] = cached
+                continue
+            if key not in pending:
+                texts[key] = self.build_prompt(context, prompt)
+                logger.debug("Prompt: %d estimated tokens", estimate_tokens(texts[key]))
+            pending.setdefault(key, []).append(position)
+        return responses, pending, texts
+
+    async def stream_refactoring_suggestions(
+        self,
+        requests: Sequence[Tuple[Dict[str, Any], str]],
+        concurrency: int = 8,
+        rate: Optional[float] = None,
+        burst: Optional[float] = None,
+        max_retries: int = 3,
+        backoff: float = 0.5,
+    ) -> AsyncIterator[SuggestionResult]:
+        """
+        Answers `(context, prompt)` requests concurrently, yielding each result as it completes.
+
+        Cached responses are yielded first. Identical requests are sent once. At most
+        `concurrency` requests are in flight, and with a `rate` (requests per second, bursts
+        of up to `burst`) every attempt, retries included, waits for a token-bucket slot.
+        Transient backend errors are retried with exponential backoff; a request that still
+        fails is yielded with its `error` set instead of stopping the others.
+        """
+        responses, pending, texts = self._prepare(requests)
+        for position, response in enumerate(responses):
+            if response is not None:
+                yield SuggestionResult(position, response, cached=True)
+        if not pending:
+            return
+
+        semaphore = asyncio.Semaphore(concurrency)
+        bucket = TokenBucket(rate, burst) if rate else None
+
+        async def attempt(key: str) -> str:
+            if bucket is not None:
+                await bucket.acquire()
+            return await self.backend.acomplete(texts[key])
+
+        async def run(key: str) -> Tuple[str, Optional[str], Optional[Exception]]:
+            async with semaphore:
+                try:
+                    return key, await retry_async(lambda: attempt(key), max_retries, backoff), None
+                except Exception as e:
+                    return key, None, e
+
+        tasks = [asyncio.ensure_future(run(key)) for key in pending]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                key, response, error = await finished
+                if error is None and self.cache is not None:
+                    self.cache.put(key, response)
+                for position in pending[key]:
+                    yield SuggestionResult(position, response, error)
+        finally:
+            # Reached early when the caller stops iterating.
+            for task in tasks:
+                task.cancel()
+
+    async def aget_refactoring_suggestions(self, requests: Sequence[Tuple[Dict[str, Any], str]], **options) -> List[str]:
+        """
+        Like get_refactoring_suggestions, but concurrent (see stream_refactoring_suggestions).
+
+        Raises:
+            Exception: The error of the first failed request, after all requests have finished.
+        """
+        responses: List[Optional[str]] = [None] * len(requests)
+        errors = []
+        async for result in self.stream_refactoring_suggestions(requests, **options):
+            if result.error is not None:
+                errors.append(result)
+            responses[result.index] = result.response
+        if errors:
+            raise min(errors, key=lambda r: r.index).error
+        return responses
 
 if __name__ == "__main__":
     # Example Usage
@@ -0,0 +1,196 @@
+"""
+Module: members - renames of class members
+
+A member of a class is defined in the class body (a method, a nested class,
+a class attribute) or through a method's first parameter (`self.x = ...`).
+ScopeBuilder records both: the former are bindings of the class scope, the
+latter are kept in the member index (Index.member_accesses), together with
+every attribute node by attribute name (Index.attributes). A member rename
+therefore looks up its sites instead of rescanning the file.
+
+A rename applies to every class connected to the class by inheritance within
+the module, so overrides stay overrides. It covers:
+
+- the definitions and class-body references in each class of the hierarchy;
+- `self.x` / `cls.x` accesses in their methods (nested functions included);
+- `Class.x` accesses on a class of the hierarchy, and `super().x` inside it.
+
+Accesses on other receivers (`obj.x`) cannot be attributed to a class without
+type information. They are reported as unresolved and only renamed on request;
+accesses known to reach an unrelated class are never renamed.
+"""
+
+from __future__ import annotations
+import ast
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Set
+
+from super_replace.core.autonomous_replacer import BindingKey, Index, MemberKey, Scope, ScopeKind, build_index
+from super_replace.core.source_patcher import TextEdit, apply_text_edits, edits_for_renames
+
+
+@dataclass
+class MemberReferences:
+    """The sites of one member across a class hierarchy, in source order."""
+    definitions: List[ast.AST] = field(default_factory=list)
+    uses: List[ast.AST] = field(default_factory=list)
+    # Accesses through receivers of unknown type.
+    unresolved: List[ast.Attribute] = field(default_factory=list)
+
+
+def _position(node: ast.AST) -> tuple:
+    return getattr(node, "lineno", 0), getattr(node, "col_offset", 0)
+
+
+def class_scopes(index: Index, class_name: str) -> List[Scope]:
+    """
+    Returns the scopes of every class named `class_name`, nested classes included.
+    """
+    return [s for s in index.scopes if s.kind is ScopeKind.CLASS and s.name == class_name]
+
+
+def class_hierarchy(index: Index, classes: List[Scope]) -> List[Scope]:
+    """
+    Returns `classes` with every class connected to them by inheritance within the module.
+
+    Siblings are included: renaming a member of a base class must rename its overrides in all
+    subclasses. Bases are matched by name (`class B(A)`), which is what the module alone can tell.
+    """
+    by_name: Dict[str, List[Scope]] = {}
+    for scope in index.scopes:
+        if scope.kind is ScopeKind.CLASS:
+            by_name.setdefault(scope.name, []).append(scope)
+    related: Dict[Scope, List[Scope]] = {}
+    for scopes in by_name.values():
+        for scope in scopes:
+            for base in scope.node.bases:
+                if isinstance(base, ast.Name):
+                    for base_scope in by_name.get(base.id, ()):
+                        related.setdefault(scope, []).append(base_scope)
+                        related.setdefault(base_scope, []).append(scope)
+
+    family = set(classes)
+    pending = list(classes)
+    while pending:
+        for scope in related.get(pending.pop(), ()):
+            if scope not in family:
+                family.add(scope)
+                pending.append(scope)
+    return sorted(family, key=lambda s: s.id)
+
+
+def _enclosing_class(scope: Scope) -> Scope:
+    while scope is not None and scope.kind is not ScopeKind.CLASS:
+        scope = scope.parent
+    return scope
+
+
+def _names_class_in(index: Index, name: ast.Name, family: Set[Scope]) -> bool:
+    # `Class.x`: module-level classes are not bindings, so the name is unresolved; a class nested
+    # in a function is a binding whose definition is the ClassDef.
+    key = index.node_to_binding.get(name)
+    if key is None:
+        return any(scope.name == name.id and scope.parent.kind is ScopeKind.MODULE for scope in family)
+    return any(index.scope_by_node.get(node) in family for node in index.defs.get(key, ()))
+
+
+def _is_super_call(node: ast.AST) -> bool:
+    return isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == "super"
+
+
+def find_member_references(index: Index, class_name: str, member: str) -> MemberReferences:
+    """
+    Collects the sites of `class_name.member` and of the same member in its class hierarchy.
+
+    Raises:
+        ValueError: If no class named `class_name` is defined in the module.
+    """
+    classes = class_scopes(index, class_name)
+    if not classes:
+        raise ValueError(f"No class named '{class_name}'")
+    family = class_hierarchy(index, classes)
+    family_set = set(family)
+    other_classes = {s.name for s in index.scopes if s.kind is ScopeKind.CLASS} - {s.name for s in family}
+
+    references = MemberReferences()
+    found: Set[ast.AST] = set()
+    for scope in family:
+        key = BindingKey(scope.id, member)
+        for node in index.defs.get(key, ()):
+            references.definitions.append(node)
+        for node in index.uses.get(key, ()):
+            references.uses.append(node)
+        for node in index.member_accesses.get(MemberKey(scope.id, member), ()):
+            (references.definitions if isinstance(node.ctx, ast.Store) else references.uses).append(node)
+            found.add(node)
+
+    for node in index.attributes.get(member, ()):
+        if node in found or node in index.node_member:
+            continue  # Already collected, or a `self.x` of a class outside the hierarchy.
+        receiver = node.value
+        if isinstance(receiver, ast.Name) and _names_class_in(index, receiver, family_set):
+            references.uses.append(node)
+        elif _is_super_call(receiver) and _enclosing_class(index.node_scope.get(node)) in family_set:
+            references.uses.append(node)
+        elif isinstance(receiver, ast.Name) and receiver.id in other_classes:
+            continue  # `Other.x` on a class outside the hierarchy.
+        else:
+            references.unresolved.append(node)
+
+    for nodes in (references.definitions, references.uses, references.unresolved):
+        nodes.sort(key=_position)
+    return references
+
+
+def member_rename_edits(
+    code: str,
+    class_name: str,
+    member: str,
+    replacement: str,
+    include_unresolved: bool = False,
+    cache: Any = None,
+) -> List[TextEdit]:
+    """
+    The text edits renaming `class_name.member` to `replacement` in `code`.
+
+    Args:
+        include_unresolved: Also rename accesses through receivers of unknown type (`obj.member`).
+        cache: An optional IndexCache.
+
+    Raises:
+        ValueError: If no class named `class_name` is defined in `code`.
+    """
+    _, index = build_index(code, cache)
+    references = find_member_references(index, class_name, member)
+    return edits_for_member_references(code, references, member, replacement, include_unresolved)
+
+
+def edits_for_member_references(
+    code: str,
+    references: MemberReferences,
+    member: str,
+    replacement: str,
+    include_unresolved: bool = False,
+) -> List[TextEdit]:
+    """
+    The text edits renaming the sites in `references`, found by find_member_references.
+    """
+    nodes = references.definitions + references.uses
+    if include_unresolved:
+        nodes += references.unresolved
+    return edits_for_renames(code, ((node, member, replacement) for node in nodes))
+
+
+def rename_member(
+    code: str,
+    class_name: str,
+    member: str,
+    replacement: str,
+    include_unresolved: bool = False,
+    cache: Any = None,
+) -> str:
+    """
+    Renames `class_name.member` to `replacement`, preserving the formatting of `code`.
+    """
+    edits = member_rename_edits(code, class_name, member, replacement, include_unresolved, cache)
+    return apply_text_edits(code, edits)
@@ -0,0 +1,186 @@
+"""
+Module: project - project-wide renaming
+
+Applies the autonomous replacer to every Python file below a directory tree.
+Files are parsed, indexed and transformed in a process pool; each worker writes
+its own result atomically so only small FileResult records cross process
+boundaries.
+
+Formatting and linting of the changed files run as a batch stage: Black's API
+formats inside the workers when it is importable, otherwise one `black` run
+formats every output in the main process; Ruff always lints all outputs in one
+run. Files are then written by the main process.
+"""
+
+from __future__ import annotations
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from super_replace.core.autonomous_replacer import build_index, rename_source
+from super_replace.core.index_cache import worker_cache
+from super_replace.utils.files import atomic_write_text, iter_python_files, read_source
+from super_replace.utils.formatter import black_backend, format_code_with_black, format_codes_with_black, lint_codes_with_ruff
+from super_replace.utils.pool import MIN_PARALLEL_FILES, run_tasks
+
+
+@dataclass
+class FileResult:
+    path: Path
+    changed: bool = False
+    skipped: bool = False
+    error: Optional[str] = None
+    new_code: Optional[str] = None
+    lint_output: Optional[str] = None
+    timings: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def elapsed(self) -> float:
+        return sum(self.timings.values())
+
+
+@dataclass(frozen=True)
+class _FileTask:
+    path: Path
+    target: str
+    replacement: str
+    context_rules: dict
+    write: bool
+    keep_output: bool
+    cache_dir: Optional[Path] = None
+    format_in_worker: bool = False
+
+
+def _rename_file(task: _FileTask) -> FileResult:
+    result = FileResult(path=task.path)
+    timings = result.timings
+    start = time.perf_counter()
+    try:
+        original_code = read_source(task.path)
+    except (OSError, UnicodeDecodeError) as e:
+        result.error = f"Could not read file: {e}"
+        return result
+    timings["read"] = time.perf_counter() - start
+
+    # Cheap pre-filter: a file that never mentions the target cannot change.
+    if task.target not in original_code:
+        result.skipped = True
+        return result
+
+    start = time.perf_counter()
+    try:
+        tree, index = build_index(original_code, worker_cache(task.cache_dir))
+    except (SyntaxError, ValueError) as e:
+        result.error = f"Could not parse file: {e}"
+        return result
+    timings["index"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    try:
+        modified_code, renamed_nodes = rename_source(
+            original_code, tree, index, task.target, task.replacement, task.context_rules
+        )
+        # Untouched files are left alone: regenerating them would only reformat.
+        result.changed = bool(renamed_nodes)
+    except Exception as e:
+        result.error = f"Could not transform file: {e}"
+        return result
+    timings["transform"] = time.perf_counter() - start
+
+    if result.changed and task.format_in_worker:
+        modified_code = format_code_with_black(modified_code, timings=timings, backend="api", filename=str(task.path))
+    if result.changed and task.keep_output:
+        result.new_code = modified_code
+    if result.changed and task.write:
+        start = time.perf_counter()
+        atomic_write_text(task.path, modified_code)
+        timings["write"] = time.perf_counter() - start
+    return result
+
+
+def super_replace_project(
+    root: Path,
+    target: str,
+    replacement: str,
+    context_rules: dict,
+    *,
+    jobs: Optional[int] = None,
+    dry_run: bool = False,
+    excluded_dirs: Optional[Iterable[str]] = None,
+    paths: Optional[Iterable[Path]] = None,
+    cache_dir: Optional[Path] = None,
+    format: bool = False,
+    lint: bool = False,
+    black_backend_name: str = "auto",
+    batch_timings: Optional[Dict[str, float]] = None,
+) -> List[FileResult]:
+    """Renames a symbol in every Python file below a directory.
+
+    Args:
+        root: The directory (or single file) to process.
+        target: The name to be replaced.
+        replacement: The name to replace with.
+        context_rules: The same rules accepted by super_replace_autonomous.
+        jobs: Number of worker processes. Defaults to the number of CPUs, or inline for a
+            handful of files; 1 runs inline.
+        dry_run: If True, files are not written and FileResult.new_code holds the output.
+        excluded_dirs: Directory names to skip while walking `root`.
+        paths: An explicit list of files to process instead of walking `root`.
+        cache_dir: Directory of a persistent IndexCache shared by the workers.
+        format: Format the changed files with Black.
+        lint: Lint the changed files with Ruff; the report is stored in FileResult.lint_output.
+        black_backend_name: "auto", "api" or "subprocess" (see format_code_with_black).
+        batch_timings: If given, receives the time of the batch "format"/"lint" stages, which
+            are not attributed to single files.
+
+    Returns:
+        One FileResult per file, in path order.
+    """
+    files = list(paths) if paths is not None else list(iter_python_files(root, excluded_dirs))
+    format_in_worker = format and black_backend(black_backend_name) == "api"
+    # Batch stages need every output before anything is written.
+    batch_stage = (format and not format_in_worker) or lint
+    tasks = [
+        _FileTask(
+            path=path,
+            target=target,
+            replacement=replacement,
+            context_rules=dict(context_rules),
+            write=not dry_run and not batch_stage,
+            keep_output=dry_run or batch_stage,
+            cache_dir=cache_dir,
+            format_in_worker=format_in_worker,
+        )
+        for path in files
+    ]
+    if not tasks:
+        return []
+
+    if jobs is None and len(tasks) < MIN_PARALLEL_FILES:
+        jobs = 1  # Starting workers would take longer than the files themselves.
+    results = run_tasks(_rename_file, tasks, jobs)
+
+    if batch_stage:
+        _run_batch_stage(results, format and not format_in_worker, lint, write=not dry_run,
+                         timings=batch_timings if batch_timings is not None else {})
+    return results
+
+
+def _run_batch_stage(results: List[FileResult], format: bool, lint: bool, write: bool, timings: Dict[str, float]) -> None:
+    """Formats and/or lints the changed outputs with one process per tool, then writes them."""
+    changed = {str(result.path): result for result in results if result.changed and result.new_code is not None}
+    if format:
+        formatted = format_codes_with_black({name: r.new_code for name, r in changed.items()}, timings, "subprocess")
+        for name, code in formatted.items():
+            changed[name].new_code = code
+    if lint:
+        reports = lint_codes_with_ruff({name: r.new_code for name, r in changed.items()}, timings)
+        for name, report in reports.items():
+            changed[name].lint_output = report
+    if write:
+        for result in changed.values():
+            start = time.perf_counter()
+            atomic_write_text(result.path, result.new_code)
+            result.timings["write"] = time.perf_counter() - start
+            result.new_code = None
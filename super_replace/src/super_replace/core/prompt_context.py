@@ -0,0 +1,238 @@
+"""
+Module: prompt_context - token-budgeted context for LLM prompts
+
+Instead of sending a whole module (or the full ContextAnalyzer dict) to a
+model, build_rename_context uses the ScopeBuilder index to find the scopes
+that define or use the rename target and keeps only those:
+
+- every scope with a reference contributes the numbered lines holding the
+  references, ranked by how many references it has (definitions weigh more);
+  a module-level def/class of the target, which is not a binding, contributes
+  its header with the weight of a definition;
+- when the budget allows, a scope's lines are upgraded to its full source,
+  highest ranked first;
+- existing bindings of the replacement name in the same scopes (possible
+  collisions) and the headers of enclosing functions/classes fill what is left.
+
+Token counts are estimated (about four characters per token), which is close
+enough to keep prompts within a budget without a tokenizer dependency.
+"""
+
+from __future__ import annotations
+import ast
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set
+
+from super_replace.core.autonomous_replacer import Scope, ScopeKind, binding_info_from_index, build_index, qualified_scope_name
+
+DEFAULT_TOKEN_BUDGET = 2000
+
+# Ranking weights.
+_DEFINITION_WEIGHT = 3
+_USE_WEIGHT = 1
+_COLLISION_SCORE = 2
+_HEADER_SCORE = 0
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count of `text`: about four characters per token.
+    """
+    return (len(text) + 3) // 4
+
+
+@dataclass
+class _Region:
+    """The references to the target inside one function, class or module scope."""
+    scope: Scope
+    score: int = 0
+    lines: Set[int] = field(default_factory=set)
+
+
+def _snippet_scope(scope: Scope) -> Scope:
+    # Comprehensions and lambdas are shown as part of the function or class holding them.
+    while scope.kind not in (ScopeKind.FUNCTION, ScopeKind.CLASS, ScopeKind.MODULE) and scope.parent is not None:
+        scope = scope.parent
+    return scope
+
+
+def _line_range(scope: Scope) -> tuple:
+    node = scope.node
+    decorators = getattr(node, "decorator_list", None) or []
+    first = min([node.lineno] + [d.lineno for d in decorators])
+    return first, node.end_lineno
+
+
+def _numbered(lines: List[str], line_numbers) -> str:
+    return "".join(f"{n:>5}| {lines[n - 1].rstrip()}\n" for n in line_numbers)
+
+
+def build_rename_context(
+    code: str,
+    target: str,
+    replacement: Optional[str] = None,
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+    cache: Any = None,
+) -> Dict[str, Any]:
+    """
+    Collects the parts of `code` relevant to renaming `target`, within a token budget.
+
+    Args:
+        code: The module source.
+        target: The name to be renamed.
+        replacement: The new name, if known; its existing bindings are reported as possible collisions.
+        token_budget: Maximum estimated tokens of the returned snippets.
+        cache: An optional IndexCache.
+
+    Returns:
+        A dict with the `target`, `replacement`, a summary of the target's `bindings`, the selected
+        `snippets` (each `{"scope", "lineno", "kind", "text"}`, in source order), the estimated
+        `tokens` used, the `token_budget` and the number of `omitted` scopes that did not fit.
+    """
+    _, index = build_index(code, cache)
+    lines = code.splitlines()
+
+    regions: Dict[Scope, _Region] = {}
+
+    def add_reference(node: ast.AST, weight: int) -> None:
+        scope = index.node_scope.get(node)
+        line = getattr(node, "lineno", None)
+        if scope is None or line is None:
+            return  # Synthetic nodes, e.g. the name bound by an except handler.
+        scope = _snippet_scope(scope)
+        region = regions.setdefault(scope, _Region(scope))
+        region.score += weight
+        region.lines.add(line)
+
+    for key in index.names.get(target, ()):
+        for node in index.defs.get(key, ()):
+            add_reference(node, _DEFINITION_WEIGHT)
+        for node in index.uses.get(key, ()):
+            add_reference(node, _USE_WEIGHT)
+    # References the Index resolved to no binding (index.unresolved): uses of module-level
+    # def/class names, builtins, and names from star imports or defined nowhere.
+    for node in index.unresolved.get(target, ()):
+        add_reference(node, _USE_WEIGHT)
+    # Module-level definitions are not bindings (see ScopeBuilder.visit_FunctionDef).
+    module_definitions = [
+        scope for scope in index.scopes
+        if scope.kind in (ScopeKind.FUNCTION, ScopeKind.CLASS)
+        and scope.parent.kind is ScopeKind.MODULE and scope.name == target
+    ]
+    for scope in module_definitions:
+        region = regions.setdefault(scope, _Region(scope))
+        region.score += _DEFINITION_WEIGHT
+        region.lines.add(scope.node.lineno)
+
+    # Reference lines come first; full sources upgrade them; collisions and headers fill the rest.
+    ranked = sorted(regions.values(), key=lambda r: (-r.score, r.scope.id))
+    selected: Dict[Scope, tuple] = {}
+    used = 0
+    omitted = 0
+    for region in ranked:
+        line_numbers = sorted(region.lines)
+        text = _numbered(lines, line_numbers)
+        cost = estimate_tokens(text)
+        while line_numbers and used + cost > token_budget:
+            # Keep the leading references of a scope too large to show whole.
+            line_numbers = line_numbers[:len(line_numbers) // 2]
+            text = _numbered(lines, line_numbers)
+            cost = estimate_tokens(text)
+        if not line_numbers:
+            omitted += 1
+            continue
+        selected[region.scope] = ("references", line_numbers, text)
+        used += cost
+
+    for region in ranked:
+        if region.scope not in selected or region.scope.kind is ScopeKind.MODULE:
+            continue  # The module source is what the budget exists to avoid, or already shown whole.
+        first, last = _line_range(region.scope)
+        text = _numbered(lines, range(first, last + 1))
+        # The full source includes the selected scopes nested in it, which are dropped.
+        nested = [scope for scope in selected if scope is not region.scope and _encloses(region.scope, scope)]
+        extra = estimate_tokens(text) - sum(estimate_tokens(selected[scope][2]) for scope in [region.scope, *nested])
+        if used + extra <= token_budget:
+            selected[region.scope] = ("source", list(range(first, last + 1)), text)
+            for scope in nested:
+                del selected[scope]
+            used += extra
+
+    extras: List[tuple] = []
+    if replacement:
+        for key in index.names.get(replacement, ()):
+            scope = index.binding_key_to_scope[key]
+            if any(_encloses(scope, region.scope) or _encloses(region.scope, scope) for region in ranked):
+                for node in index.defs.get(key, ()):
+                    if getattr(node, "lineno", None) is not None:
+                        extras.append((_COLLISION_SCORE, "collision", node.lineno, _snippet_scope(scope)))
+    for region in ranked:
+        parent = region.scope.parent
+        while parent is not None and parent.kind is not ScopeKind.MODULE:
+            if parent.kind in (ScopeKind.FUNCTION, ScopeKind.CLASS):
+                extras.append((_HEADER_SCORE, "header", parent.node.lineno, parent.parent))
+            parent = parent.parent
+    shown = {line for _, line_numbers, _ in selected.values() for line in line_numbers}
+    snippets = [
+        {"scope": qualified_scope_name(scope), "lineno": line_numbers[0], "kind": kind, "text": text}
+        for scope, (kind, line_numbers, text) in selected.items()
+    ]
+    for _, kind, line, scope in sorted(extras, key=lambda e: (-e[0], e[2])):
+        if line in shown:
+            continue
+        text = _numbered(lines, [line])
+        cost = estimate_tokens(text)
+        if used + cost > token_budget:
+            continue
+        shown.add(line)
+        used += cost
+        snippets.append({"scope": qualified_scope_name(scope), "lineno": line, "kind": kind, "text": text})
+
+    bindings = [
+        {"scope_kind": b["scope_kind"], "scope_name": b["scope_name"], "uses": b["uses"], "definitions": b["definitions"]}
+        for b in binding_info_from_index(index, target)["bindings"]
+    ]
+    if module_definitions:
+        bindings.insert(0, {
+            "scope_kind": ScopeKind.MODULE.name,
+            "scope_name": "",
+            "uses": len(index.unresolved.get(target, ())),
+            "definitions": len(module_definitions),
+        })
+    return {
+        "target": target,
+        "replacement": replacement,
+        "bindings": bindings,
+        "snippets": sorted(snippets, key=lambda s: s["lineno"]),
+        "tokens": used,
+        "token_budget": token_budget,
+        "omitted": omitted,
+    }
+
+
+def _encloses(outer: Scope, inner: Scope) -> bool:
+    scope = inner
+    while scope is not None:
+        if scope is outer:
+            return True
+        scope = scope.parent
+    return False
+
+
+def format_rename_context(context: Dict[str, Any]) -> str:
+    """
+    Renders a build_rename_context result as plain text for a prompt.
+    """
+    parts = [f"Rename target: {context['target']}"]
+    if context.get("replacement"):
+        parts[0] += f" -> {context['replacement']}"
+    for binding in context["bindings"]:
+        parts.append(
+            f"- binding in {binding['scope_kind'].lower()} {binding['scope_name'] or '<module>'}: "
+            f"{binding['definitions']} definitions, {binding['uses']} uses"
+        )
+    for snippet in context["snippets"]:
+        parts.append(f"\n# {snippet['kind']} in {snippet['scope']}\n{snippet['text'].rstrip()}")
+    if context["omitted"]:
+        parts.append(f"\n({context['omitted']} more scopes omitted to fit the token budget)")
+    return "\n".join(parts) + "\n"
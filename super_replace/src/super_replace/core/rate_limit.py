@@ -0,0 +1,75 @@
+"""
+Module: rate_limit - asyncio rate limiting and retries for backend requests
+
+TokenBucket spaces requests to a sustained rate while allowing short bursts;
+retry_async re-runs a coroutine on transient BackendErrors with exponential
+backoff (jittered, and never shorter than a server's Retry-After).
+"""
+
+from __future__ import annotations
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from super_replace.core.llm_backends import BackendError
+
+T = TypeVar("T")
+
+
+class TokenBucket:
+    """
+    Allows `rate` acquisitions per second on average and up to `capacity` at once.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        # The lock makes waiters take tokens in arrival order.
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+
+async def retry_async(
+    call: Callable[[], Awaitable[T]],
+    max_retries: int = 3,
+    backoff: float = 0.5,
+    max_backoff: float = 30.0,
+) -> T:
+    """
+    Awaits `call()`, retrying retryable BackendErrors up to `max_retries` times.
+
+    The n-th retry waits `backoff * 2**n` seconds, jittered to 50-100% of that and capped at
+    `max_backoff`, or the server's Retry-After if longer.
+
+    Raises:
+        BackendError: The last error, once retries are exhausted or if it is not retryable.
+    """
+    attempt = 0
+    while True:
+        try:
+            return await call()
+        except BackendError as e:
+            if not e.retryable or attempt >= max_retries:
+                raise
+            delay = min(max_backoff, backoff * 2 ** attempt) * random.uniform(0.5, 1.0)
+            if e.retry_after is not None:
+                delay = max(delay, min(e.retry_after, max_backoff))
+            attempt += 1
+            await asyncio.sleep(delay)
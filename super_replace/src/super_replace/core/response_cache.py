@@ -0,0 +1,120 @@
+"""
+Module: response_cache - on-disk cache of LLM responses
+
+Responses are stored one JSON file per request, keyed by a hash of the backend
+name and the normalized request. Entries expire after a TTL and the directory is
+bounded both in entries and in bytes, evicting the least recently used entries
+first (recency is tracked through file mtimes, as in IndexCache).
+"""
+
+from __future__ import annotations
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Optional
+
+CACHE_FORMAT_VERSION = 1
+_ENTRY_SUFFIX = ".json"
+
+
+def default_response_cache_dir() -> Path:
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "super_replace" / "responses"
+
+
+class ResponseCache:
+    """
+    Persistent key -> response text cache with TTL and size-based eviction.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[Path] = None,
+        ttl: Optional[float] = 7 * 24 * 3600,
+        max_entries: int = 1024,
+        max_bytes: Optional[int] = 64 * 2**20,
+    ) -> None:
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else default_response_cache_dir()
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key_for(*parts: str) -> str:
+        digest = hashlib.sha256(f"{CACHE_FORMAT_VERSION}".encode())
+        for part in parts:
+            # Length-prefixed, so ("ab", "c") and ("a", "bc") differ.
+            data = part.encode("utf-8", "surrogatepass")
+            digest.update(f":{len(data)}:".encode())
+            digest.update(data)
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}{_ENTRY_SUFFIX}"
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Returns the cached response, or None if it is missing or expired.
+        """
+        path = self._entry_path(key)
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+            response = entry["response"]
+            created = float(entry["created"])
+        except (OSError, ValueError, KeyError, TypeError):
+            self.misses += 1
+            return None
+        if self.ttl is not None and time.time() - created > self.ttl:
+            path.unlink(missing_ok=True)
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)  # Mark the entry as recently used.
+        except OSError:
+            pass
+        self.hits += 1
+        return response
+
+    def put(self, key: str, response: str) -> None:
+        path = self._entry_path(key)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        try:
+            tmp_path.write_text(json.dumps({"created": time.time(), "response": response}), encoding="utf-8")
+            os.replace(tmp_path, path)
+        except OSError:
+            tmp_path.unlink(missing_ok=True)
+            return
+        self._evict()
+
+    def _evict(self) -> None:
+        entries = []
+        total_bytes = 0
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(_ENTRY_SUFFIX) and not entry.name.startswith("."):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total_bytes += stat.st_size
+        entries.sort()
+        count = len(entries)
+        for _, size, path in entries:
+            if count <= self.max_entries and (self.max_bytes is None or total_bytes <= self.max_bytes):
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass  # Already evicted by a concurrent process.
+            count -= 1
+            total_bytes -= size
+
+    def clear(self) -> None:
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(_ENTRY_SUFFIX):
+                Path(entry.path).unlink(missing_ok=True)
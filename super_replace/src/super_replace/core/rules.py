@@ -0,0 +1,348 @@
+"""
+Module: rules - declarative rename rules run as one pipeline
+
+A rule file lists many renames, each with the scope and function filters of
+the autonomous replacer, so a migration is one `apply-rules` run instead of
+one process per rename. TOML, YAML and JSON files share one structure:
+
+    [defaults]
+    scope = "local"
+    preserve_formatting = true
+
+    [[rules]]
+    name = "total"
+    target = "total"
+    replacement = "running"
+    functions = ["outer"]
+
+Each file is read, parsed and indexed once. The rules whose target does not
+occur in the text are dropped, and the remaining ones are applied together as
+a batch rename (see batch_replacer), in a process pool for large trees. Hits
+(renamed sites), files and binding-selection time are reported per rule.
+"""
+
+from __future__ import annotations
+import importlib
+import json
+import keyword
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from super_replace.core.autonomous_replacer import Index, build_index, tree_to_source
+from super_replace.core.batch_replacer import BatchReplaceTransformer, RenameConflictError, RenameSpec, resolve_renames
+from super_replace.core.index_cache import worker_cache
+from super_replace.core.project import FileResult
+from super_replace.core.source_patcher import apply_text_edits, edits_for_renames
+from super_replace.utils.files import atomic_write_text, iter_python_files, read_source
+from super_replace.utils.pool import MIN_PARALLEL_FILES, run_tasks
+
+RULE_SCOPES = ("local", "global", "class")
+_RULE_KEYS = {"name", "target", "replacement", "scope", "functions"}
+_DEFAULT_KEYS = {"scope", "functions", "preserve_formatting"}
+
+
+class RuleFileError(ValueError):
+    """Raised when a rule file cannot be read or does not describe valid rules."""
+
+
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    spec: RenameSpec
+
+
+@dataclass
+class RuleSet:
+    rules: List[Rule]
+    preserve_formatting: bool = False
+
+    @property
+    def specs(self) -> List[RenameSpec]:
+        return [rule.spec for rule in self.rules]
+
+
+@dataclass
+class RuleStats:
+    name: str
+    files: int = 0  # Files in which the rule renamed something.
+    hits: int = 0  # Renamed sites.
+    seconds: float = 0.0  # Time spent selecting the rule's bindings.
+
+
+def _is_identifier(name: Any) -> bool:
+    return isinstance(name, str) and name.isidentifier() and not keyword.iskeyword(name)
+
+
+def _functions(value: Any, where: str) -> Tuple[str, ...]:
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, list) or not all(isinstance(f, str) for f in value):
+        raise RuleFileError(f"{where}: 'functions' must be a list of function names")
+    return tuple(value)
+
+
+def parse_rules(data: Any, source: str = "<rules>") -> RuleSet:
+    """
+    Validates the loaded content of a rule file and converts it into a RuleSet.
+
+    Raises:
+        RuleFileError: If the structure, a key or a value is invalid.
+    """
+    if not isinstance(data, Mapping):
+        raise RuleFileError(f"{source}: expected a table with a 'rules' list")
+    unknown = set(data) - {"defaults", "rules"}
+    if unknown:
+        raise RuleFileError(f"{source}: unknown keys {sorted(unknown)}")
+    defaults = data.get("defaults") or {}
+    if not isinstance(defaults, Mapping) or set(defaults) - _DEFAULT_KEYS:
+        raise RuleFileError(f"{source}: 'defaults' accepts only {sorted(_DEFAULT_KEYS)}")
+    entries = data.get("rules")
+    if not isinstance(entries, list) or not entries:
+        raise RuleFileError(f"{source}: 'rules' must be a non-empty list")
+
+    default_scope = defaults.get("scope", "local")
+    default_functions = _functions(defaults.get("functions", []), f"{source}: defaults")
+    rules: List[Rule] = []
+    names = set()
+    for number, entry in enumerate(entries, 1):
+        where = f"{source}: rule {number}"
+        if not isinstance(entry, Mapping):
+            raise RuleFileError(f"{where}: expected a table")
+        unknown = set(entry) - _RULE_KEYS
+        if unknown:
+            raise RuleFileError(f"{where}: unknown keys {sorted(unknown)}")
+        for key in ("target", "replacement"):
+            if not _is_identifier(entry.get(key)):
+                raise RuleFileError(f"{where}: '{key}' must be a Python identifier")
+        scope = entry.get("scope", default_scope)
+        if scope not in RULE_SCOPES:
+            raise RuleFileError(f"{where}: 'scope' must be one of {', '.join(RULE_SCOPES)}")
+        functions = _functions(entry["functions"], where) if "functions" in entry else default_functions
+
+        name = entry.get("name")
+        if name is None:
+            name = f"{entry['target']}->{entry['replacement']}"
+            if name in names:
+                name = f"{name}#{number}"
+        elif not isinstance(name, str) or not name:
+            raise RuleFileError(f"{where}: 'name' must be a non-empty string")
+        if name in names:
+            raise RuleFileError(f"{where}: duplicate rule name '{name}'")
+        names.add(name)
+        rules.append(Rule(name, RenameSpec(entry["target"], entry["replacement"], scope, functions)))
+    return RuleSet(rules, bool(defaults.get("preserve_formatting", False)))
+
+
+def _import_optional(*modules: str):
+    for module in modules:
+        try:
+            return importlib.import_module(module)
+        except ImportError:
+            continue
+    return None
+
+
+def load_rules(path: Path) -> RuleSet:
+    """
+    Reads a `.toml`, `.yaml`/`.yml` or `.json` rule file.
+
+    TOML needs Python 3.11 (tomllib) or the tomli package; YAML needs PyYAML.
+
+    Raises:
+        RuleFileError: If the file cannot be read, parsed or validated.
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+    try:
+        text = path.read_text(encoding="utf-8")
+    except (OSError, UnicodeDecodeError) as e:
+        raise RuleFileError(f"Could not read {path}: {e}") from e
+    try:
+        if suffix == ".toml":
+            toml = _import_optional("tomllib", "tomli")
+            if toml is None:
+                raise RuleFileError("TOML rule files need Python 3.11 or the tomli package")
+            data = toml.loads(text)
+        elif suffix in (".yaml", ".yml"):
+            yaml = _import_optional("yaml")
+            if yaml is None:
+                raise RuleFileError("YAML rule files need the PyYAML package")
+            data = yaml.safe_load(text)
+        elif suffix == ".json":
+            data = json.loads(text)
+        else:
+            raise RuleFileError(f"{path}: unsupported rule file type '{suffix}' (use .toml, .yaml or .json)")
+    except RuleFileError:
+        raise
+    except Exception as e:  # The parsers' own error types (TOMLDecodeError, YAMLError, ...).
+        raise RuleFileError(f"Could not parse {path}: {e}") from e
+    return parse_rules(data, str(path))
+
+
+def rename_with_rules(
+    code: str,
+    tree: Any,
+    index: Index,
+    rules: Iterable[Rule],
+    preserve_formatting: bool = False,
+    timings: Optional[Dict[str, float]] = None,
+) -> Tuple[str, Dict[str, int]]:
+    """
+    Applies `rules` to an already indexed module in one traversal.
+
+    Args:
+        timings: If given, receives the time spent selecting the bindings of each rule, by name.
+
+    Returns:
+        The modified code and the number of renamed sites of each rule that renamed something.
+
+    Raises:
+        RenameConflictError: If two rules rename the same binding differently, or would give
+            two bindings of a scope the same name.
+    """
+    rule_of: Dict[RenameSpec, str] = {}
+    for rule in rules:
+        rule_of.setdefault(rule.spec, rule.name)
+    claimed_by = {}
+    spec_timings = {}
+    key_replacements = resolve_renames(tree, index, list(rule_of), claimed_by, spec_timings)
+    if timings is not None:
+        for spec, seconds in spec_timings.items():
+            timings[rule_of[spec]] = timings.get(rule_of[spec], 0.0) + seconds
+    if not key_replacements:
+        return code, {}
+
+    transformer = BatchReplaceTransformer(tree=tree, index=index, key_replacements=key_replacements)
+    new_tree = transformer.visit(tree)
+    hits: Dict[str, int] = {}
+    for key, count in transformer.hits.items():
+        name = rule_of[claimed_by[key]]
+        hits[name] = hits.get(name, 0) + count
+    if not hits:
+        return code, {}
+    if preserve_formatting:
+        return apply_text_edits(code, edits_for_renames(code, transformer.renames)), hits
+    return tree_to_source(new_tree), hits
+
+
+def apply_rules(code: str, rule_set: RuleSet, cache: Any = None) -> str:
+    """
+    Applies a rule set to `code` with a single parse and traversal.
+    """
+    rules = [rule for rule in rule_set.rules if rule.spec.target in code]
+    if not rules:
+        return code
+    tree, index = build_index(code, cache)
+    new_code, _ = rename_with_rules(code, tree, index, rules, rule_set.preserve_formatting)
+    return new_code
+
+
+@dataclass(frozen=True)
+class _RulesTask:
+    path: Path
+    rule_set: RuleSet
+    write: bool
+    keep_output: bool
+    cache_dir: Optional[Path] = None
+
+
+@dataclass
+class _RulesOutcome:
+    result: FileResult
+    hits: Dict[str, int] = field(default_factory=dict)
+    timings: Dict[str, float] = field(default_factory=dict)
+
+
+def _apply_rules_file(task: _RulesTask) -> _RulesOutcome:
+    outcome = _RulesOutcome(FileResult(path=task.path))
+    result = outcome.result
+    timings = result.timings
+    start = time.perf_counter()
+    try:
+        original_code = read_source(task.path)
+    except (OSError, UnicodeDecodeError) as e:
+        result.error = f"Could not read file: {e}"
+        return outcome
+    timings["read"] = time.perf_counter() - start
+
+    # Rules whose target never occurs in the file cannot match it.
+    rules = [rule for rule in task.rule_set.rules if rule.spec.target in original_code]
+    if not rules:
+        result.skipped = True
+        return outcome
+
+    start = time.perf_counter()
+    try:
+        tree, index = build_index(original_code, worker_cache(task.cache_dir))
+    except (SyntaxError, ValueError) as e:
+        result.error = f"Could not parse file: {e}"
+        return outcome
+    timings["index"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    try:
+        modified_code, outcome.hits = rename_with_rules(
+            original_code, tree, index, rules, task.rule_set.preserve_formatting, outcome.timings
+        )
+    except RenameConflictError as e:
+        result.error = f"Conflicting renames: {e}"
+        return outcome
+    except Exception as e:
+        result.error = f"Could not transform file: {e}"
+        return outcome
+    timings["transform"] = time.perf_counter() - start
+    result.changed = bool(outcome.hits)
+
+    if result.changed and task.keep_output:
+        result.new_code = modified_code
+    if result.changed and task.write:
+        start = time.perf_counter()
+        atomic_write_text(task.path, modified_code)
+        timings["write"] = time.perf_counter() - start
+    return outcome
+
+
+def run_rules(
+    root: Path,
+    rule_set: RuleSet,
+    *,
+    jobs: Optional[int] = None,
+    dry_run: bool = False,
+    excluded_dirs: Optional[Iterable[str]] = None,
+    paths: Optional[Iterable[Path]] = None,
+    cache_dir: Optional[Path] = None,
+) -> Tuple[List[FileResult], List[RuleStats]]:
+    """Applies a rule set to every Python file below a directory.
+
+    Args:
+        root: The directory (or single file) to process.
+        rule_set: The rules, as returned by load_rules.
+        jobs: Number of worker processes. Defaults to the number of CPUs, or inline for a
+            handful of files; 1 runs inline.
+        dry_run: If True, files are not written and FileResult.new_code holds the output.
+        excluded_dirs: Directory names to skip while walking `root`.
+        paths: An explicit list of files to process instead of walking `root`.
+        cache_dir: Directory of a persistent IndexCache shared by the workers.
+
+    Returns:
+        One FileResult per file, in path order, and one RuleStats per rule, in rule order.
+    """
+    files = list(paths) if paths is not None else list(iter_python_files(root, excluded_dirs))
+    tasks = [
+        _RulesTask(path=path, rule_set=rule_set, write=not dry_run, keep_output=dry_run, cache_dir=cache_dir)
+        for path in files
+    ]
+    if jobs is None and len(tasks) < MIN_PARALLEL_FILES:
+        jobs = 1  # Starting workers would take longer than the files themselves.
+    outcomes = run_tasks(_apply_rules_file, tasks, jobs)
+
+    stats = {rule.name: RuleStats(rule.name) for rule in rule_set.rules}
+    for outcome in outcomes:
+        for name, seconds in outcome.timings.items():
+            stats[name].seconds += seconds
+        for name, count in outcome.hits.items():
+            stats[name].files += 1
+            stats[name].hits += count
+    return [outcome.result for outcome in outcomes], list(stats.values())
@@ -0,0 +1,131 @@
+"""
+Module: session - single-parse analysis sessions
+
+An AnalysisSession parses and indexes a module once, then answers safety checks,
+binding queries and any number of renames against the same tree and Index.
+After a rename only the renamed bindings are re-keyed; the module is re-indexed
+(from the held tree, never re-parsed) only when the new name could change how
+other names resolve.
+"""
+
+from __future__ import annotations
+import ast
+from typing import Any, List, Optional, Set
+
+from super_replace.core.autonomous_replacer import (
+    BindingKey,
+    Index,
+    ScopeBuilder,
+    apply_rename,
+    binding_info_from_index,
+    build_index,
+    rename_safety_issues,
+    tree_to_source,
+)
+
+
+class AnalysisSession:
+    """
+    Holds a parsed module and its Index for repeated queries and renames.
+    """
+
+    def __init__(self, code: str, cache: Any = None) -> None:
+        self.tree, self.index = build_index(code, cache)
+        self._source: Optional[str] = code
+        self.full_reindex_count = 0
+
+    @property
+    def source(self) -> str:
+        """
+        The current source code, regenerated lazily after renames.
+        """
+        if self._source is None:
+            self._source = tree_to_source(self.tree)
+        return self._source
+
+    def binding_info(self, target: str) -> dict:
+        return binding_info_from_index(self.index, target)
+
+    def check_rename_safety(self, target: str, replacement: str, context_rules: dict) -> tuple[bool, list[str]]:
+        issues = rename_safety_issues(self.index, target, replacement, context_rules)
+        return len(issues) == 0, issues
+
+    def rename(self, target: str, replacement: str, context_rules: dict) -> str:
+        """
+        Renames `target` to `replacement` in the held tree and updates the Index.
+
+        Returns:
+            The modified source code.
+        """
+        self.tree, renamed_nodes = apply_rename(self.tree, self.index, target, replacement, context_rules)
+        if not renamed_nodes:
+            return self.source
+        self._source = None
+        renamed_keys = self._renamed_keys(renamed_nodes, target)
+        if self._rename_may_change_resolution(replacement):
+            self._reindex()
+        else:
+            for key in renamed_keys:
+                self._rekey(key, replacement)
+        return self.source
+
+    def _renamed_keys(self, renamed_nodes: List[ast.AST], target: str) -> Set[BindingKey]:
+        keys = set()
+        node2b = self.index.node_to_binding
+        for node in renamed_nodes:
+            key = node2b.get(node)
+            if key is not None:
+                keys.add(key)
+                continue
+            for key in self.index.names.get(target, ()):
+                for mapping in (self.index.global_names, self.index.nonlocal_names, self.index.except_names):
+                    if node in mapping.get(key, ()):
+                        keys.add(key)
+        return keys
+
+    def _rename_may_change_resolution(self, replacement: str) -> bool:
+        # A fresh name cannot capture or shadow anything, so re-keying is exact.
+        return replacement in self.index.unresolved or bool(self.index.names.get(replacement))
+
+    def _reindex(self) -> None:
+        builder = ScopeBuilder()
+        builder.visit(self.tree)
+        self.index = builder.index
+        self.full_reindex_count += 1
+
+    def _rekey(self, key: BindingKey, replacement: str) -> None:
+        index: Index = self.index
+        new_key = BindingKey(key.scope_id, replacement)
+        owner = index.binding_key_to_scope.pop(key)
+        index.binding_key_to_scope[new_key] = owner
+
+        # Declarations referring to the binding must be re-keyed before owner.locals changes.
+        for mapping in (index.global_names, index.nonlocal_names):
+            for decl in mapping.get(key, ()):
+                scope = index.node_scope[decl]
+                declared = scope.globals_decl if isinstance(decl, ast.Global) else scope.nonlocals_decl
+                declared.discard(key.name)
+                declared.add(replacement)
+
+        binding = owner.locals.pop(key.name)
+        binding.key = new_key
+        owner.locals[replacement] = binding
+        old_keys = index.names[key.name]
+        del old_keys[key]
+        if not old_keys:
+            del index.names[key.name]
+        index.names.setdefault(replacement, {})[new_key] = None
+
+        # member_accesses and node_member are keyed by class scope and attribute, not by binding.
+        mappings = (index.uses, index.defs, index.except_names, index.global_names, index.nonlocal_names, index.receivers)
+        for mapping in mappings:
+            if key in mapping:
+                mapping[new_key] = mapping.pop(key)
+        for node in index.defs.get(new_key, []) + index.uses.get(new_key, []):
+            index.node_to_binding[node] = new_key
+            scope = index.scope_by_node.get(node)
+            if scope is not None and getattr(node, "name", None) == replacement:
+                scope.name = replacement  # A renamed nested function or class.
+            # Synthetic except-handler names are not part of the tree.
+            if isinstance(node, ast.Name) and node.id == key.name:
+                node.id = replacement
@@ -0,0 +1,254 @@
+"""
+Module: source_patcher - token-preserving renames
+
+Turns the nodes renamed by a transformer into byte-offset edits on the original
+text, so a rename only touches the identifiers it changes. Formatting and
+comments are preserved and no regeneration of the module is needed.
+
+Positions come from the AST where they exist (`ast.Name`, `ast.arg`, import
+aliases, and the end of an `ast.Attribute`); names that carry no position of
+their own (`global`/`nonlocal` declarations, the `as` name of an except handler,
+the name of a `def` or `class`) are located by tokenizing the statement's lines.
+"""
+
+from __future__ import annotations
+import ast
+import io
+import tokenize
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+
+@dataclass(frozen=True, order=True)
+class TextEdit:
+    line: int  # 1-based line number
+    col: int  # UTF-8 byte offset within the line, like ast col_offset
+    old: str
+    new: str
+
+
+def split_lines(code: str) -> List[bytes]:
+    """
+    Splits source into UTF-8 encoded lines, keeping line endings.
+    Only \\n, \\r\\n and \\r end a line, matching the Python tokenizer.
+    """
+    return code.encode("utf-8").splitlines(keepends=True)
+
+
+def _char_to_byte_col(line: str, col: int) -> int:
+    return len(line[:col].encode("utf-8"))
+
+
+def _iter_tokens(lines: Sequence[bytes], first_line: int, last_line: int) -> Iterator[tokenize.TokenInfo]:
+    text = b"".join(lines[first_line - 1:last_line]).decode("utf-8")
+    try:
+        for tok in tokenize.generate_tokens(io.StringIO(text).readline):
+            yield tok._replace(start=(tok.start[0] + first_line - 1, tok.start[1]))
+    except (tokenize.TokenError, IndentationError):
+        return
+
+
+def _declared_name_edits(lines: Sequence[bytes], node: ast.AST, old: str, new: str) -> List[TextEdit]:
+    # Only the statement's own span: `global x; obj.x = 2` shares the line with other code.
+    start = (node.lineno, node.col_offset)
+    end_line = getattr(node, "end_lineno", None) or node.lineno
+    end = (end_line, getattr(node, "end_col_offset", None) or len(lines[end_line - 1]))
+    edits = []
+    for tok in _iter_tokens(lines, node.lineno, end_line):
+        if tok.type != tokenize.NAME or tok.string != old:
+            continue
+        line_no, col = tok.start
+        position = (line_no, _char_to_byte_col(lines[line_no - 1].decode("utf-8"), col))
+        if start <= position < end:
+            edits.append(TextEdit(*position, old, new))
+    return edits
+
+
+def except_name_edit(lines: Sequence[bytes], node: ast.ExceptHandler, old: str, new: str) -> Optional[TextEdit]:
+    last_line = node.body[0].lineno if node.body else (node.end_lineno or node.lineno)
+    previous = None
+    for tok in _iter_tokens(lines, node.lineno, last_line):
+        if tok.type == tokenize.NAME and tok.string == old and previous == "as":
+            line_no, col = tok.start
+            line_text = lines[line_no - 1].decode("utf-8")
+            return TextEdit(line_no, _char_to_byte_col(line_text, col), old, new)
+        if tok.type == tokenize.OP and tok.string == ":":
+            break
+        previous = tok.string
+    return None
+
+
+def definition_name_edit(lines: Sequence[bytes], node: ast.AST, old: str, new: str) -> Optional[TextEdit]:
+    # The name follows the `def`/`class` keyword on the node's first line (decorators come before it).
+    previous = None
+    for tok in _iter_tokens(lines, node.lineno, node.lineno):
+        if tok.type == tokenize.NAME and tok.string == old and previous in ("def", "class"):
+            line_no, col = tok.start
+            line_text = lines[line_no - 1].decode("utf-8")
+            return TextEdit(line_no, _char_to_byte_col(line_text, col), old, new)
+        previous = tok.string
+    return None
+
+
+def alias_edit(node: ast.alias, old: str, new: str) -> Optional[TextEdit]:
+    if node.asname == old:
+        # The `as` name is the last token of the alias.
+        return TextEdit(node.end_lineno, node.end_col_offset - len(old.encode("utf-8")), old, new)
+    if node.name == old:
+        return TextEdit(node.lineno, node.col_offset, old, new)
+    return None
+
+
+def edits_for_renames(code: str, renames: Iterable[Tuple[ast.AST, str, str]], lines: Optional[Sequence[bytes]] = None) -> List[TextEdit]:
+    """
+    Computes the text edits for a set of renamed nodes.
+
+    Args:
+        code: The original source code the nodes were parsed from.
+        renames: `(node, old_name, new_name)` triples, as recorded by a transformer.
+        lines: The result of split_lines(code), if already available.
+
+    Returns:
+        The edits, sorted by position and without duplicates.
+    """
+    if lines is None:
+        lines = split_lines(code)
+    edits = set()
+    for node, old, new in renames:
+        if isinstance(node, ast.Name):
+            edits.add(TextEdit(node.lineno, node.col_offset, old, new))
+        elif isinstance(node, ast.arg):
+            edits.add(TextEdit(node.lineno, node.col_offset, old, new))
+        elif isinstance(node, (ast.Global, ast.Nonlocal)):
+            edits.update(_declared_name_edits(lines, node, old, new))
+        elif isinstance(node, ast.ExceptHandler):
+            edit = except_name_edit(lines, node, old, new)
+            if edit is not None:
+                edits.add(edit)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            edit = definition_name_edit(lines, node, old, new)
+            if edit is not None:
+                edits.add(edit)
+        elif isinstance(node, ast.alias):
+            edit = alias_edit(node, old, new)
+            if edit is not None:
+                edits.add(edit)
+        elif isinstance(node, ast.Attribute):
+            # The attribute name ends the expression: `mod.old`.
+            edits.add(TextEdit(node.end_lineno, node.end_col_offset - len(old.encode("utf-8")), old, new))
+        else:
+            raise TypeError(f"Cannot compute a text edit for {type(node).__name__} nodes")
+    return sorted(edits)
+
+
+def apply_text_edits(code: str, edits: Iterable[TextEdit], lines: Optional[Sequence[bytes]] = None) -> str:
+    """
+    Applies edits to the original source code.
+
+    Raises:
+        ValueError: If an edit does not match the text at its position or overlaps another edit.
+    """
+    if lines is None:
+        lines = split_lines(code)
+    by_line = {}
+    for edit in edits:
+        by_line.setdefault(edit.line, []).append(edit)
+    if not by_line:
+        return code
+
+    new_lines = list(lines)
+    for line_no, line_edits in by_line.items():
+        new_lines[line_no - 1] = _patch_line(lines[line_no - 1], line_no, line_edits)
+    return b"".join(new_lines).decode("utf-8")
+
+
+def _patch_line(line: bytes, line_no: int, line_edits: Iterable[TextEdit]) -> bytes:
+    pieces = []
+    cursor = 0
+    for edit in sorted(line_edits):
+        old = edit.old.encode("utf-8")
+        if edit.col < cursor or line[edit.col:edit.col + len(old)] != old:
+            raise ValueError(f"Edit {edit} does not match the source at line {line_no}")
+        pieces.append(line[cursor:edit.col])
+        pieces.append(edit.new.encode("utf-8"))
+        cursor = edit.col + len(old)
+    pieces.append(line[cursor:])
+    return b"".join(pieces)
+
+
+def _unified_range(start: int, length: int) -> str:
+    # Same notation as difflib: "start,length", "start" for one line, "start-1,0" for none.
+    if length == 1:
+        return str(start)
+    if length == 0:
+        return f"{start - 1},0"
+    return f"{start},{length}"
+
+
+def iter_unified_diff(
+    code: str,
+    edits: Sequence[TextEdit],
+    lines: Optional[Sequence[bytes]] = None,
+    fromfile: str = "a/code",
+    tofile: str = "b/code",
+    context: int = 3,
+) -> Iterator[str]:
+    """
+    Yields the unified diff that applying `edits` to `code` would produce, hunk by hunk.
+
+    Edits never add or remove lines, so the hunks follow directly from the edited
+    line numbers; only the changed lines are patched and the modified text is never
+    built. The output matches difflib.unified_diff for the same change.
+
+    Args:
+        code: The original source code.
+        edits: The edits, sorted by position (as returned by edits_for_renames).
+        lines: The result of split_lines(code), if already available.
+        fromfile: The name on the `---` line.
+        tofile: The name on the `+++` line.
+        context: Number of unchanged lines shown around each change.
+
+    Yields:
+        One string per hunk, the first one preceded by the file header.
+
+    Raises:
+        ValueError: If an edit does not match the text at its position.
+    """
+    if lines is None:
+        lines = split_lines(code)
+    by_line = {}
+    for edit in edits:
+        by_line.setdefault(edit.line, []).append(edit)
+    changed_lines = sorted(by_line)
+    if not changed_lines:
+        return
+
+    header = f"--- {fromfile}\n+++ {tofile}\n"
+    position = 0
+    while position < len(changed_lines):
+        # Changes separated by at most 2 * context unchanged lines share a hunk.
+        end = position + 1
+        while end < len(changed_lines) and changed_lines[end] - changed_lines[end - 1] - 1 <= 2 * context:
+            end += 1
+        hunk_lines = changed_lines[position:end]
+        first = max(1, hunk_lines[0] - context)
+        last = min(len(lines), hunk_lines[-1] + context)
+        span = _unified_range(first, last - first + 1)
+        out = [header, f"@@ -{span} +{span} @@\n"]
+        header = ""
+        replaced = {n: _patch_line(lines[n - 1], n, by_line[n]) for n in hunk_lines}
+        line_no = first
+        while line_no <= last:
+            if line_no not in replaced:
+                out.append(" " + lines[line_no - 1].decode("utf-8"))
+                line_no += 1
+                continue
+            run_end = line_no
+            while run_end + 1 in replaced:
+                run_end += 1
+            run = range(line_no, run_end + 1)
+            out.extend("-" + lines[n - 1].decode("utf-8") for n in run)
+            out.extend("+" + replaced[n].decode("utf-8") for n in run)
+            line_no = run_end + 1
+        yield "".join(out)
+        position = end
@@ -0,0 +1,291 @@
+"""
+Module: usages - project-wide find-usages queries
+
+`usages NAME` lists every definition and use of a name across a project, with
+its file, position and scope path (`Widget.grow`, or `<module>`). The sites of
+each file are extracted from its ScopeBuilder index:
+
+- definitions: bindings (assignments, parameters, imports, except names) and
+  `def`/`class` statements, module-level ones included;
+- uses: references resolved to a binding, names bound nowhere in the module
+  (module-level definitions, builtins, star imports), and the imported name
+  of an aliased import (`from m import NAME as other`);
+- attributes: `obj.NAME` accesses, from the member index.
+
+The sites are kept in an SQLite database with one row per site and an index on
+the name, so a query is a single indexed lookup. Before each query the files
+below the root are stat'ed, and only new or modified files (by mtime and size)
+are re-indexed, in a process pool. Repeated queries over an unchanged project
+therefore answer without parsing anything.
+"""
+
+from __future__ import annotations
+import ast
+import os
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from super_replace.core.autonomous_replacer import Index, ScopeKind, build_index, qualified_scope_name
+from super_replace.core.index_cache import default_cache_dir
+from super_replace.core.source_patcher import alias_edit, definition_name_edit, except_name_edit, split_lines
+from super_replace.utils.files import iter_python_files
+from super_replace.utils.pool import run_tasks
+
+# Bump when the extracted rows change so stale databases are rebuilt.
+USAGES_FORMAT_VERSION = 2
+USAGE_KINDS = ("definition", "use", "attribute")
+
+_DEFINITION_TYPES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+
+# (name, kind, line, col, scope)
+_Row = Tuple[str, str, int, int, str]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (id INTEGER PRIMARY KEY, path TEXT UNIQUE, mtime_ns INTEGER, size INTEGER, error TEXT);
+CREATE TABLE IF NOT EXISTS usages (file INTEGER, name TEXT, kind TEXT, line INTEGER, col INTEGER, scope TEXT);
+CREATE INDEX IF NOT EXISTS usages_by_name ON usages (name);
+CREATE INDEX IF NOT EXISTS usages_by_file ON usages (file);
+"""
+
+
+def default_usage_db() -> Path:
+    return default_cache_dir() / "usages.sqlite"
+
+
+@dataclass(frozen=True)
+class Usage:
+    path: str
+    line: int
+    column: int  # 1-based; counts UTF-8 bytes, like the AST's col_offset
+    kind: str
+    name: str
+    scope: str
+
+
+@dataclass
+class RefreshStats:
+    files: int = 0
+    indexed: int = 0
+    removed: int = 0
+    errors: int = 0
+
+
+def _definition_position(lines: Sequence[bytes], node: ast.AST, name: str) -> Tuple[int, int]:
+    if isinstance(node, _DEFINITION_TYPES):
+        edit = definition_name_edit(lines, node, name, name)
+    elif isinstance(node, ast.alias):
+        edit = alias_edit(node, name, name)
+    else:
+        edit = None
+    if edit is not None:
+        return edit.line, edit.col
+    # `import os.path` binds `os` at the start of the alias.
+    return node.lineno, node.col_offset
+
+
+def usage_rows(code: str, index: Optional[Index] = None) -> List[_Row]:
+    """
+    Extracts the definition, use and attribute sites of every name in `code`, in source order.
+    """
+    if index is None:
+        _, index = build_index(code)
+    lines = split_lines(code)
+    paths = {}
+
+    def scope_path(scope) -> str:
+        if scope is None:
+            return "<module>"
+        if scope not in paths:
+            paths[scope] = qualified_scope_name(scope)
+        return paths[scope]
+
+    rows: List[_Row] = []
+    for key, nodes in index.defs.items():
+        for node in nodes:
+            if getattr(node, "lineno", None) is None:
+                continue  # The synthetic name of an except handler, located below.
+            line, col = _definition_position(lines, node, key.name)
+            rows.append((key.name, "definition", line, col, scope_path(index.node_scope.get(node))))
+            if isinstance(node, ast.alias) and node.asname and "." not in node.name:
+                # `from m import NAME as other` refers to NAME without binding it.
+                rows.append((node.name, "use", node.lineno, node.col_offset, scope_path(index.node_scope.get(node))))
+    for key, handlers in index.except_names.items():
+        for handler in handlers:
+            edit = except_name_edit(lines, handler, key.name, key.name)
+            if edit is not None:
+                rows.append((key.name, "definition", edit.line, edit.col, scope_path(index.binding_key_to_scope[key])))
+    for scope in index.scopes:
+        # Module-level definitions are not bindings (see ScopeBuilder.visit_FunctionDef).
+        if scope.kind in (ScopeKind.FUNCTION, ScopeKind.CLASS) and scope.parent.kind is ScopeKind.MODULE:
+            line, col = _definition_position(lines, scope.node, scope.name)
+            rows.append((scope.name, "definition", line, col, "<module>"))
+    for key, nodes in index.uses.items():
+        for node in nodes:
+            rows.append((key.name, "use", node.lineno, node.col_offset, scope_path(index.node_scope.get(node))))
+    for name, nodes in index.unresolved.items():
+        for node in nodes:
+            rows.append((name, "use", node.lineno, node.col_offset, scope_path(index.node_scope.get(node))))
+    for name, nodes in index.attributes.items():
+        for node in nodes:
+            col = node.end_col_offset - len(name.encode("utf-8"))
+            rows.append((name, "attribute", node.end_lineno, col, scope_path(index.node_scope.get(node))))
+    rows.sort(key=lambda row: (row[2], row[3]))
+    return rows
+
+
+def _index_file(path: str) -> Tuple[str, int, int, List[_Row], Optional[str]]:
+    try:
+        stat = os.stat(path)
+    except OSError as e:
+        return path, 0, 0, [], f"{type(e).__name__}: {e}"
+    try:
+        rows = usage_rows(Path(path).read_text(encoding="utf-8"))
+    except (OSError, UnicodeDecodeError, SyntaxError, ValueError) as e:
+        return path, stat.st_mtime_ns, stat.st_size, [], f"{type(e).__name__}: {e}"
+    return path, stat.st_mtime_ns, stat.st_size, rows, None
+
+
+def _path_range(root: Path) -> Tuple[str, str]:
+    # Every path below `root` sorts between these bounds, which the primary key can search.
+    prefix = str(root).rstrip(os.sep) + os.sep
+    return prefix, prefix[:-1] + chr(ord(os.sep) + 1)
+
+
+class UsageIndex:
+    """
+    Persistent per-file table of name sites, kept current by `refresh`.
+    """
+
+    def __init__(self, db_path: Optional[Path] = None) -> None:
+        self.db_path = Path(db_path) if db_path is not None else default_usage_db()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.db_path)
+        version = self._db.execute("PRAGMA user_version").fetchone()[0]
+        if version != USAGES_FORMAT_VERSION:
+            self._db.executescript("DROP TABLE IF EXISTS files; DROP TABLE IF EXISTS usages;")
+            self._db.execute(f"PRAGMA user_version = {USAGES_FORMAT_VERSION}")
+        self._db.executescript(_SCHEMA)
+
+    def __enter__(self) -> "UsageIndex":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._db.close()
+
+    def refresh(self, root: Path, *, jobs: Optional[int] = None, excluded_dirs: Optional[Iterable[str]] = None) -> RefreshStats:
+        """
+        Re-indexes the new and modified Python files below `root` and forgets deleted ones.
+        """
+        root = Path(root).resolve()
+        low, high = _path_range(root)
+        known = {
+            path: (file_id, mtime_ns, size)
+            for file_id, path, mtime_ns, size in self._db.execute(
+                "SELECT id, path, mtime_ns, size FROM files WHERE path >= ? AND path < ?", (low, high)
+            )
+        }
+        stats = RefreshStats()
+        stale = []
+        file_ids = {}
+        for path in iter_python_files(root, excluded_dirs):
+            path = str(path)
+            stats.files += 1
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entry = known.pop(path, None)
+            if entry is None or entry[1:] != (stat.st_mtime_ns, stat.st_size):
+                stale.append(path)
+                file_ids[path] = entry[0] if entry is not None else None
+
+        results = run_tasks(_index_file, stale, jobs)
+        with self._db:
+            # What is left in `known` was deleted, or is now excluded.
+            removed = [(entry[0],) for entry in known.values()]
+            outdated = removed + [(file_id,) for file_id in file_ids.values() if file_id is not None]
+            self._db.executemany("DELETE FROM usages WHERE file = ?", outdated)
+            self._db.executemany("DELETE FROM files WHERE id = ?", removed)
+            for path, mtime_ns, size, rows, error in results:
+                file_id = file_ids[path]
+                if file_id is None:
+                    file_id = self._db.execute(
+                        "INSERT INTO files (path, mtime_ns, size, error) VALUES (?, ?, ?, ?)", (path, mtime_ns, size, error)
+                    ).lastrowid
+                else:
+                    self._db.execute(
+                        "UPDATE files SET mtime_ns = ?, size = ?, error = ? WHERE id = ?", (mtime_ns, size, error, file_id)
+                    )
+                self._db.executemany(
+                    "INSERT INTO usages (file, name, kind, line, col, scope) VALUES (?, ?, ?, ?, ?, ?)",
+                    [(file_id, *row) for row in rows],
+                )
+                stats.errors += error is not None
+        stats.indexed = len(results)
+        stats.removed = len(known)
+        return stats
+
+    def errors(self, root: Path) -> List[Tuple[str, str]]:
+        """
+        The files below `root` that could not be indexed, with their errors.
+        """
+        low, high = _path_range(Path(root).resolve())
+        return self._db.execute(
+            "SELECT path, error FROM files WHERE path >= ? AND path < ? AND error IS NOT NULL ORDER BY path", (low, high)
+        ).fetchall()
+
+    def query(
+        self,
+        name: str,
+        root: Optional[Path] = None,
+        kinds: Optional[Iterable[str]] = None,
+        scope: Optional[str] = None,
+    ) -> List[Usage]:
+        """
+        Returns the sites of `name`, ordered by file and position.
+
+        Args:
+            root: Only report files below this directory.
+            kinds: Only report these kinds of sites (see USAGE_KINDS).
+            scope: Only report sites in this scope path or in scopes nested in it.
+        """
+        sql = "SELECT path, line, col, kind, name, scope FROM usages JOIN files ON files.id = usages.file WHERE name = ?"
+        params: list = [name]
+        if root is not None:
+            sql += " AND path >= ? AND path < ?"
+            params.extend(_path_range(Path(root).resolve()))
+        if kinds:
+            kinds = list(kinds)
+            sql += f" AND kind IN ({', '.join('?' * len(kinds))})"
+            params.extend(kinds)
+        if scope:
+            sql += " AND (scope = ? OR substr(scope, 1, ?) = ?)"
+            params.extend([scope, len(scope) + 1, scope + "."])
+        sql += " ORDER BY path, line, col"
+        return [
+            Usage(path, line, col + 1, kind, found_name, found_scope)
+            for path, line, col, kind, found_name, found_scope in self._db.execute(sql, params)
+        ]
+
+
+def find_usages(
+    root: Path,
+    name: str,
+    *,
+    kinds: Optional[Iterable[str]] = None,
+    scope: Optional[str] = None,
+    jobs: Optional[int] = None,
+    excluded_dirs: Optional[Iterable[str]] = None,
+    db_path: Optional[Path] = None,
+) -> List[Usage]:
+    """
+    Refreshes the usage index of `root` and returns the sites of `name` below it.
+    """
+    with UsageIndex(db_path) as usage_index:
+        usage_index.refresh(root, jobs=jobs, excluded_dirs=excluded_dirs)
+        return usage_index.query(name, root, kinds, scope)
@@ -0,0 +1,344 @@
+"""
+Module: watch - re-apply standing rename rules as files are saved
+
+A watcher reports the Python files written below a directory. InotifyWatcher
+uses Linux inotify through ctypes (no dependency); PollingWatcher compares
+modification times at an interval and works everywhere. debounced_batches
+groups bursts of saves (a checkout, a formatter run over the tree) into one
+batch, so each file is processed once per burst rather than once per event.
+
+RuleApplier keeps an IncrementalIndexer per file, so a save that only touches
+one function re-indexes just that function, and applies the rules as one batch
+rename that patches the file's text in place. Files that mention none of the
+rule targets are skipped without parsing, and the applier's own writes are
+recognized and ignored when they come back as events.
+"""
+
+from __future__ import annotations
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from super_replace.core.batch_replacer import RenameConflictError, RenameSpec, batch_rename_source
+from super_replace.core.incremental import IncrementalIndexer
+from super_replace.core.project import FileResult
+from super_replace.utils.files import DEFAULT_EXCLUDED_DIRS, atomic_write_text, iter_python_files, read_source
+
+WATCH_BACKENDS = ("auto", "inotify", "poll")
+
+# inotify(7) constants.
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE | _IN_ONLYDIR
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def _is_excluded(name: str, excluded: Set[str]) -> bool:
+    # The same rule as iter_python_files.
+    return name in excluded or name.endswith(".egg-info")
+
+
+class PollingWatcher:
+    """
+    Detects written Python files by comparing modification times and sizes every `interval` seconds.
+    """
+
+    def __init__(self, root: Path, excluded_dirs: Optional[Iterable[str]] = None, interval: float = 1.0) -> None:
+        self.root = Path(root)
+        self.excluded_dirs = set(DEFAULT_EXCLUDED_DIRS if excluded_dirs is None else excluded_dirs)
+        self.interval = interval
+        self._snapshot = self._scan()
+        self._next_scan = time.monotonic() + interval
+
+    def _scan(self) -> Dict[Path, Tuple[int, int]]:
+        snapshot = {}
+        for path in iter_python_files(self.root, self.excluded_dirs):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def poll(self, timeout: Optional[float] = None) -> Set[Path]:
+        """
+        Waits up to `timeout` seconds (None: until something changes) and returns the written files.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            now = time.monotonic()
+            if now < self._next_scan:
+                wait = self._next_scan - now
+                if deadline is not None and deadline < self._next_scan:
+                    time.sleep(max(0.0, deadline - now))
+                    return set()
+                time.sleep(wait)
+            self._next_scan = time.monotonic() + self.interval
+            snapshot = self._scan()
+            changed = {path for path, state in snapshot.items() if self._snapshot.get(path) != state}
+            self._snapshot = snapshot
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    """
+    Detects written Python files with inotify, watching every directory below `root`.
+
+    Raises:
+        OSError: If inotify is not available (not Linux, or out of watches).
+    """
+
+    def __init__(self, root: Path, excluded_dirs: Optional[Iterable[str]] = None) -> None:
+        self.root = Path(root)
+        self.excluded_dirs = set(DEFAULT_EXCLUDED_DIRS if excluded_dirs is None else excluded_dirs)
+        libc_name = ctypes.util.find_library("c")
+        try:
+            libc = ctypes.CDLL(libc_name, use_errno=True)
+            self._add_watch = libc.inotify_add_watch
+        except (OSError, AttributeError, TypeError) as e:
+            raise OSError(f"inotify is not available: {e}") from e
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"inotify_init1 failed: {os.strerror(errno)}")
+        self._directories: Dict[int, Path] = {}
+        try:
+            self._watch_tree(self.root)
+        except OSError:
+            self.close()
+            raise
+
+    def _watch_tree(self, top: Path) -> Set[Path]:
+        """Watches `top` and its subdirectories; returns the Python files already in them."""
+        found = set()
+        for dirpath, dirnames, filenames in os.walk(top):
+            dirnames[:] = [d for d in dirnames if not _is_excluded(d, self.excluded_dirs)]
+            wd = self._add_watch(self._fd, os.fsencode(dirpath), _WATCH_MASK)
+            if wd < 0:
+                errno = ctypes.get_errno()
+                raise OSError(errno, f"Cannot watch {dirpath}: {os.strerror(errno)}")
+            self._directories[wd] = Path(dirpath)
+            found.update(Path(dirpath) / name for name in filenames if name.endswith(".py"))
+        return found
+
+    def poll(self, timeout: Optional[float] = None) -> Set[Path]:
+        """
+        Waits up to `timeout` seconds (None: until something changes) and returns the written files.
+        """
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+        changed: Set[Path] = set()
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+                offset += length
+                changed |= self._handle(wd, mask, name)
+
+    def _handle(self, wd: int, mask: int, name: str) -> Set[Path]:
+        if mask & _IN_Q_OVERFLOW:
+            # Events were dropped: report every file, the applier skips unchanged ones.
+            return set(iter_python_files(self.root, self.excluded_dirs))
+        if mask & _IN_IGNORED:
+            self._directories.pop(wd, None)  # The directory was removed.
+            return set()
+        directory = self._directories.get(wd)
+        if directory is None:
+            return set()
+        path = directory / name
+        if mask & _IN_ISDIR:
+            if mask & (_IN_CREATE | _IN_MOVED_TO) and not _is_excluded(name, self.excluded_dirs):
+                # Files may have been written before the new directory was watched.
+                try:
+                    return self._watch_tree(path)
+                except OSError:
+                    return set()
+            return set()
+        if mask & (_IN_CLOSE_WRITE | _IN_MOVED_TO) and name.endswith(".py"):
+            return {path}
+        return set()
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def create_watcher(
+    root: Path,
+    excluded_dirs: Optional[Iterable[str]] = None,
+    backend: str = "auto",
+    poll_interval: float = 1.0,
+):
+    """
+    Returns an InotifyWatcher, or a PollingWatcher for backend "poll" or where inotify is unavailable.
+    """
+    if backend not in WATCH_BACKENDS:
+        raise ValueError(f"Unknown watch backend '{backend}'")
+    if backend != "poll":
+        try:
+            return InotifyWatcher(root, excluded_dirs)
+        except OSError:
+            if backend == "inotify":
+                raise
+    return PollingWatcher(root, excluded_dirs, poll_interval)
+
+
+def debounced_batches(
+    watcher,
+    debounce: float = 0.3,
+    max_delay: float = 2.0,
+    stop: Optional[threading.Event] = None,
+    idle_timeout: float = 0.5,
+) -> Iterator[Set[Path]]:
+    """
+    Yields the files written in each burst of saves.
+
+    A burst ends once no file was written for `debounce` seconds, or `max_delay` seconds after it
+    started, so a long-running checkout is still processed in steps. `stop` is checked every
+    `idle_timeout` seconds while nothing happens.
+    """
+    while stop is None or not stop.is_set():
+        batch = watcher.poll(idle_timeout)
+        if not batch:
+            continue
+        started = time.monotonic()
+        while True:
+            remaining = min(debounce, started + max_delay - time.monotonic())
+            if remaining <= 0:
+                break
+            more = watcher.poll(remaining)
+            if not more:
+                break
+            batch |= more
+        yield batch
+
+
+class RuleApplier:
+    """
+    Applies a fixed set of renames to files as they change, keeping an incremental index per file.
+    """
+
+    def __init__(self, specs: Iterable[RenameSpec], dry_run: bool = False) -> None:
+        self.specs: List[RenameSpec] = list(specs)
+        self.dry_run = dry_run
+        self._targets = {spec.target for spec in self.specs}
+        self._indexers: Dict[Path, IncrementalIndexer] = {}
+        # The text last written to each file, to recognize the events of our own writes.
+        self._written: Dict[Path, str] = {}
+
+    def apply(self, path: Path) -> FileResult:
+        result = FileResult(path=path)
+        timings = result.timings
+        start = time.perf_counter()
+        try:
+            code = read_source(path)
+        except (OSError, UnicodeDecodeError) as e:
+            self._indexers.pop(path, None)
+            result.error = f"Could not read file: {e}"
+            return result
+        timings["read"] = time.perf_counter() - start
+
+        if self._written.get(path) == code or not any(target in code for target in self._targets):
+            result.skipped = True
+            return result
+
+        start = time.perf_counter()
+        indexer = self._indexers.get(path)
+        try:
+            if indexer is None:
+                indexer = self._indexers[path] = IncrementalIndexer(code)
+            else:
+                indexer.update(code)
+        except (SyntaxError, ValueError) as e:
+            # Usually a save in the middle of an edit; the next save is indexed from scratch.
+            self._indexers.pop(path, None)
+            result.error = f"Could not parse file: {e}"
+            return result
+        timings["index"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        try:
+            new_code, renames = batch_rename_source(code, indexer.tree, indexer.index, self.specs, preserve_formatting=True)
+        except RenameConflictError as e:
+            result.error = f"Conflicting renames: {e}"
+            return result
+        timings["transform"] = time.perf_counter() - start
+        result.changed = bool(renames)
+        if not result.changed:
+            return result
+
+        # The renames were applied to the indexed tree in place; index the new text on the next save.
+        del self._indexers[path]
+        if self.dry_run:
+            result.new_code = new_code
+            return result
+        start = time.perf_counter()
+        atomic_write_text(path, new_code)
+        self._written[path] = new_code
+        timings["write"] = time.perf_counter() - start
+        return result
+
+    def apply_all(self, paths: Iterable[Path]) -> List[FileResult]:
+        return [self.apply(path) for path in sorted(paths)]
+
+
+def watch_and_apply(
+    root: Path,
+    specs: Iterable[RenameSpec],
+    on_batch: Callable[[List[FileResult]], None],
+    *,
+    excluded_dirs: Optional[Iterable[str]] = None,
+    backend: str = "auto",
+    debounce: float = 0.3,
+    max_delay: float = 2.0,
+    poll_interval: float = 1.0,
+    dry_run: bool = False,
+    initial: bool = False,
+    stop: Optional[threading.Event] = None,
+    ready: Optional[threading.Event] = None,
+) -> None:
+    """
+    Applies `specs` to the Python files below `root` whenever they are saved, until `stop` is set.
+
+    Args:
+        on_batch: Called with the FileResults of each burst of saves (skipped files included).
+        initial: First apply the rules to every file once.
+        ready: Set once the watcher is in place, so saves from then on are seen.
+    """
+    applier = RuleApplier(specs, dry_run=dry_run)
+    watcher = create_watcher(root, excluded_dirs, backend, poll_interval)
+    try:
+        if ready is not None:
+            ready.set()
+        if initial:
+            on_batch(applier.apply_all(iter_python_files(root, excluded_dirs)))
+        for batch in debounced_batches(watcher, debounce, max_delay, stop):
+            on_batch(applier.apply_all(path for path in batch if path.exists()))
+    finally:
+        watcher.close()
@@ -0,0 +1,87 @@
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+DEFAULT_EXCLUDED_DIRS = frozenset({
+    ".git",
+    ".hg",
+    ".mypy_cache",
+    ".pytest_cache",
+    ".ruff_cache",
+    ".tox",
+    ".nox",
+    ".venv",
+    "venv",
+    "__pycache__",
+    "build",
+    "dist",
+    "node_modules",
+})
+
+
+def iter_python_files(root: Path, excluded_dirs: Optional[Iterable[str]] = None) -> Iterator[Path]:
+    """Yields every Python file below a directory, in a stable order.
+
+    Args:
+        root: The directory to walk (a single file is yielded as-is).
+        excluded_dirs: Directory names to skip. Defaults to DEFAULT_EXCLUDED_DIRS.
+
+    Returns:
+        An iterator over the paths of the `.py` files found.
+    """
+    root = Path(root)
+    if root.is_file():
+        yield root
+        return
+    excluded = set(DEFAULT_EXCLUDED_DIRS if excluded_dirs is None else excluded_dirs)
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in excluded and not d.endswith(".egg-info"))
+        for filename in sorted(filenames):
+            if filename.endswith(".py"):
+                yield Path(dirpath) / filename
+
+
+def read_source(path: Path, encoding: str = "utf-8") -> str:
+    """Reads a source file with its line endings unchanged.
+
+    Path.read_text translates CRLF line endings to LF, so writing its result back would
+    rewrite every line of a CRLF file; atomic_write_text writes the text exactly as given.
+
+    Args:
+        path: The file to read.
+        encoding: The text encoding to use.
+
+    Returns:
+        The content of the file.
+    """
+    with open(path, encoding=encoding, newline="") as source_file:
+        return source_file.read()
+
+
+def atomic_write_text(path: Path, text: str, encoding: str = "utf-8") -> None:
+    """Writes text to a file atomically.
+
+    The content is written to a temporary file in the same directory, which then
+    replaces the destination, so readers never observe a partially written file.
+
+    Args:
+        path: The destination file.
+        text: The content to write.
+        encoding: The text encoding to use.
+    """
+    path = Path(path)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding=encoding, newline="") as tmp_file:
+            tmp_file.write(text)
+            tmp_file.flush()
+            os.fsync(tmp_file.fileno())
+        if path.exists():
+            shutil.copymode(path, tmp_name)
+        os.replace(tmp_name, path)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
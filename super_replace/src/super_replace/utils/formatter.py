@@ -1,59 +1,313 @@
+import importlib
+import json
+import os
+import shutil
 import subprocess
+import sys
 import tempfile
+import time
 from pathlib import Path
+from typing import Dict, Mapping, Optional, Sequence, Tuple
 
-def format_code_with_black(code: str) -> str:
+# Seconds spent per step ("format", "lint"), like FileResult.timings in project mode.
+Timings = Dict[str, float]
+
+_black_module = None
+_black_import_failed = False
+
+
+def _load_black():
+    """Returns the black module if it can be imported, caching the outcome."""
+    global _black_module, _black_import_failed
+    if _black_module is None and not _black_import_failed:
+        try:
+            _black_module = importlib.import_module("black")
+        except ImportError:
+            _black_import_failed = True
+    return _black_module
+
+
+def black_backend(backend: str = "auto") -> str:
+    """Returns how format_code_with_black will run Black: "api" or "subprocess"."""
+    if backend not in ("auto", "api", "subprocess"):
+        raise ValueError(f"Unknown Black backend '{backend}'")
+    if backend == "subprocess":
+        return "subprocess"
+    if _load_black() is not None:
+        return "api"
+    if backend == "api":
+        raise RuntimeError("Black is not importable; install it or use the subprocess backend")
+    return "subprocess"
+
+
+def _record(timings: Optional[Timings], step: str, started: float) -> None:
+    if timings is not None:
+        timings[step] = timings.get(step, 0.0) + time.perf_counter() - started
+
+
+# Black modes by the directory their configuration was searched from.
+_black_modes: Dict[str, object] = {}
+
+
+def _black_mode(black, filename: Optional[str]):
+    """Builds the Mode the `black` executable would use for `filename` (or the working directory)."""
+    start = str(Path(filename).resolve().parent) if filename else os.getcwd()
+    if start not in _black_modes:
+        config_path = black.find_pyproject_toml((start,))
+        config = black.parse_pyproject_toml(config_path) if config_path else {}
+        options = {}
+        if "line_length" in config:
+            options["line_length"] = int(config["line_length"])
+        if config.get("target_version"):
+            options["target_versions"] = {black.TargetVersion[v.upper()] for v in config["target_version"]}
+        if config.get("skip_string_normalization"):
+            options["string_normalization"] = False
+        if config.get("skip_magic_trailing_comma"):
+            options["magic_trailing_comma"] = False
+        if config.get("pyi"):
+            options["is_pyi"] = True
+        if config.get("preview"):
+            options["preview"] = True
+        _black_modes[start] = black.Mode(**options)
+    return _black_modes[start]
+
+
+def format_code_with_black(
+    code: str, timings: Optional[Timings] = None, backend: str = "auto", filename: Optional[str] = None
+) -> str:
     """Formats the given Python code string using Black.
 
+    Black's Python API (`black.format_str`) is used when Black is importable;
+    otherwise the `black` executable is run with the code on stdin. Both use the
+    project configuration (`[tool.black]` in pyproject.toml) found from `filename`.
+
     Args:
         code: The Python code string to format.
+        timings: If given, the time spent is added to its "format" entry.
+        backend: "auto" (default), "api" or "subprocess".
+        filename: The path of the code, which locates the configuration. Defaults to
+            the working directory.
+
+    Returns:
+        The formatted code string, or the original code if Black rejects it.
+    """
+    started = time.perf_counter()
+    try:
+        if black_backend(backend) == "api":
+            black = _load_black()
+            try:
+                return black.format_str(code, mode=_black_mode(black, filename))
+            except black.InvalidInput as e:
+                print(f"Black stderr: cannot format: {e}", file=sys.stderr)
+                return code
+        return _format_with_black_subprocess(code, filename)
+    finally:
+        _record(timings, "format", started)
+
+
+def _format_with_black_subprocess(code: str, filename: Optional[str] = None) -> str:
+    stdin_filename = ['--stdin-filename', filename] if filename else []
+    result = subprocess.run(
+        ['black', '--quiet', *stdin_filename, '-'],
+        input=code,
+        capture_output=True,
+        text=True,
+        check=False # Do not raise an exception for non-zero exit codes
+    )
+    if result.stderr:
+        print(f"Black stderr: {result.stderr}", file=sys.stderr)
+    if result.returncode != 0:
+        return code
+    return result.stdout
+
+
+# Configuration files in the order each tool looks for them in a directory, with the
+# section a pyproject.toml needs to count.
+_BLACK_CONFIG = (("pyproject.toml", "[tool.black]"),)
+_RUFF_CONFIG = ((".ruff.toml", None), ("ruff.toml", None), ("pyproject.toml", "[tool.ruff"))
+# Black only reads the configuration of the project root, the first directory holding one of these.
+_BLACK_ROOT_MARKERS = (".git", ".hg", "pyproject.toml")
+
+
+def find_config(
+    path: Path, candidates: Sequence[Tuple[str, Optional[str]]], root_markers: Sequence[str] = ()
+) -> Optional[Path]:
+    """Returns the configuration file governing `path`: the nearest one in its directory or above.
+
+    Args:
+        path: A file path; it does not need to exist.
+        candidates: `(file name, required section)` pairs, e.g. _BLACK_CONFIG or _RUFF_CONFIG.
+        root_markers: Stop searching after the first directory containing one of these names.
+    """
+    directory = Path(path).resolve().parent
+    for candidate_dir in (directory, *directory.parents):
+        for name, section in candidates:
+            config = candidate_dir / name
+            if not config.is_file():
+                continue
+            if section is None or section in config.read_text(encoding="utf-8", errors="replace"):
+                return config
+        if any((candidate_dir / marker).exists() for marker in root_markers):
+            return None
+    return None
+
+
+def _write_tree(
+    tmp_dir: str,
+    codes: Mapping[str, str],
+    config: Sequence[Tuple[str, Optional[str]]] = (),
+    root_markers: Sequence[str] = (),
+) -> Dict[str, Path]:
+    """Writes the code strings to a temporary tree, grouped by project configuration.
+
+    A file governed by a configuration file is written to `project<N>/` at its path relative
+    to that file, next to a copy of it, so the tool applies the project's settings (including
+    path-based ones such as per-file-ignores). Other files get a `default/<number>/`
+    subdirectory each, keeping their file name.
+    """
+    paths = {}
+    roots: Dict[Path, Path] = {}
+    for number, (name, code) in enumerate(codes.items()):
+        config_path = find_config(Path(name), config, root_markers) if config else None
+        if config_path is not None:
+            root = roots.get(config_path)
+            if root is None:
+                root = roots[config_path] = Path(tmp_dir) / f"project{len(roots)}"
+                root.mkdir()
+                shutil.copyfile(config_path, root / config_path.name)
+            path = root / Path(name).resolve().relative_to(config_path.parent)
+        else:
+            path = Path(tmp_dir) / "default" / str(number) / (Path(name).name or "code.py")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(code, encoding="utf-8")
+        paths[name] = path
+    return paths
+
+
+def format_codes_with_black(codes: Mapping[str, str], timings: Optional[Timings] = None, backend: str = "auto") -> Dict[str, str]:
+    """Formats many code strings with as few processes as possible.
+
+    With Black's API the strings are formatted in-process (threads would not
+    help: formatting holds the GIL). Otherwise they are written to a temporary
+    tree and formatted by one `black` run per project configuration (usually a
+    single run), which parallelizes across files itself. Each run is given its
+    project's pyproject.toml, so the settings match formatting the files in place.
+
+    Args:
+        codes: Code strings keyed by their file path, which locates the configuration.
+        timings: If given, the time spent is added to its "format" entry.
+        backend: "auto" (default), "api" or "subprocess".
 
     Returns:
-        The formatted code string.
+        The formatted code for each name; code Black cannot format is returned unchanged.
     """
-    with tempfile.NamedTemporaryFile(mode='w+', delete=False, suffix='.py') as tmp_file:
-        tmp_file.write(code)
-    tmp_file_path = Path(tmp_file.name)
+    if black_backend(backend) == "api":
+        return {name: format_code_with_black(code, timings, "api", name) for name, code in codes.items()}
 
+    started = time.perf_counter()
     try:
-        # Run Black on the temporary file
-        result = subprocess.run(
-            ['black', str(tmp_file_path)],
-            capture_output=True,
-            text=True,
-            check=False # Do not raise an exception for non-zero exit codes
-        )
-        # Read the formatted content back from the file
-        formatted_code = tmp_file_path.read_text()
-        if result.stderr:
-            print(f"Black stderr: {result.stderr}")
-        return formatted_code
+        if not codes:
+            return {}
+        with tempfile.TemporaryDirectory(prefix="super_replace-format-") as tmp_dir:
+            paths = _write_tree(tmp_dir, codes, _BLACK_CONFIG, _BLACK_ROOT_MARKERS)
+            for root in sorted(Path(tmp_dir).iterdir()):
+                config = root / "pyproject.toml"
+                config_option = ['--config', str(config)] if config.is_file() else []
+                result = subprocess.run(
+                    ['black', '--quiet', *config_option, str(root)],
+                    capture_output=True,
+                    text=True,
+                    check=False # Files Black cannot parse are reported and left as they are
+                )
+                if result.stderr:
+                    print(f"Black stderr: {result.stderr}", file=sys.stderr)
+            return {name: path.read_text(encoding="utf-8") for name, path in paths.items()}
     finally:
-        tmp_file_path.unlink() # Clean up the temporary file
+        _record(timings, "format", started)
+
 
-def lint_code_with_ruff(code: str) -> str:
+def _ruff_command() -> str:
+    """Prefers the binary shipped with the ruff Python package, then the one on PATH."""
+    try:
+        from ruff.__main__ import find_ruff_bin
+        return str(find_ruff_bin())
+    except (ImportError, FileNotFoundError):
+        return shutil.which('ruff') or 'ruff'
+
+
+def lint_code_with_ruff(code: str, timings: Optional[Timings] = None, filename: str = "code.py") -> str:
     """Lints the given Python code string using Ruff.
 
+    The code is passed on stdin, so nothing is written to disk.
+
     Args:
         code: The Python code string to lint.
+        timings: If given, the time spent is added to its "lint" entry.
+        filename: The name Ruff reports the issues under (it also selects per-file rules).
 
     Returns:
         The linting output from Ruff.
     """
-    with tempfile.NamedTemporaryFile(mode='w+', delete=False, suffix='.py') as tmp_file:
-        tmp_file.write(code)
-    tmp_file_path = Path(tmp_file.name)
-
+    started = time.perf_counter()
     try:
-        # Run Ruff on the temporary file
         result = subprocess.run(
-            ['ruff', 'check', str(tmp_file_path)],
+            [_ruff_command(), 'check', '--stdin-filename', filename, '-'],
+            input=code,
             capture_output=True,
             text=True,
             check=False # Do not raise an exception for non-zero exit codes
         )
         if result.stdout:
             return result.stdout
+        if result.returncode not in (0, 1) and result.stderr:
+            print(f"Ruff stderr: {result.stderr}", file=sys.stderr)
         return ""
     finally:
-        tmp_file_path.unlink() # Clean up the temporary file
+        _record(timings, "lint", started)
+
+
+def lint_codes_with_ruff(codes: Mapping[str, str], timings: Optional[Timings] = None) -> Dict[str, str]:
+    """Lints many code strings with a single Ruff process.
+
+    Ruff reads only one file from stdin, so the batch is written to a temporary
+    directory and checked in one run; the JSON report is mapped back to the given
+    names. Files under a Ruff configuration (ruff.toml, .ruff.toml or a pyproject.toml
+    with [tool.ruff]) are mirrored at their path relative to it, next to a copy, so
+    its rules and per-file-ignores apply as when linting the files in place.
+
+    Args:
+        codes: Code strings keyed by their file path, which locates the configuration;
+            issues are reported under these names.
+        timings: If given, the time spent is added to its "lint" entry.
+
+    Returns:
+        The linting output for each name, in Ruff's concise format ("" when clean).
+    """
+    started = time.perf_counter()
+    output = {name: [] for name in codes}
+    try:
+        if not codes:
+            return {}
+        with tempfile.TemporaryDirectory(prefix="super_replace-lint-") as tmp_dir:
+            paths = _write_tree(tmp_dir, codes, _RUFF_CONFIG)
+            names_by_path = {os.path.realpath(path): name for name, path in paths.items()}
+            result = subprocess.run(
+                [_ruff_command(), 'check', '--no-cache', '--output-format', 'json', tmp_dir],
+                capture_output=True,
+                text=True,
+                check=False # Exit code 1 only means issues were found
+            )
+        if result.returncode not in (0, 1):
+            print(f"Ruff stderr: {result.stderr}", file=sys.stderr)
+            return {name: "" for name in codes}
+        for issue in json.loads(result.stdout or "[]"):
+            name = names_by_path.get(os.path.realpath(issue["filename"]))
+            if name is None:
+                continue
+            location = issue.get("location") or {}
+            output[name].append(
+                f"{name}:{location.get('row', 0)}:{location.get('column', 0)}: {issue.get('code')} {issue.get('message')}"
+            )
+        return {name: "\n".join(lines) + ("\n" if lines else "") for name, lines in output.items()}
+    finally:
+        _record(timings, "lint", started)
@@ -0,0 +1,67 @@
+import os
+import subprocess
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from super_replace.utils.files import DEFAULT_EXCLUDED_DIRS
+
+
+class GitError(RuntimeError):
+    """A git command failed, or the directory is not inside a work tree."""
+
+
+def _git(args: List[str], cwd: Path) -> str:
+    try:
+        completed = subprocess.run(
+            ["git", *args], cwd=cwd, capture_output=True, text=True, check=False
+        )
+    except FileNotFoundError as e:
+        raise GitError("git is not installed") from e
+    if completed.returncode != 0:
+        raise GitError(completed.stderr.strip() or f"git {' '.join(args)} failed")
+    return completed.stdout
+
+
+def changed_python_files(
+    root: Path,
+    base: str,
+    excluded_dirs: Optional[Iterable[str]] = None,
+    include_untracked: bool = True,
+) -> List[Path]:
+    """Lists the Python files below a directory that differ from a git revision.
+
+    Staged and unstaged changes both count (`git diff --name-only BASE` compares the
+    working tree with BASE). Deleted files are left out, as there is nothing to rewrite.
+
+    Args:
+        root: A directory inside a git work tree; only files below it are returned.
+        base: The revision to compare against, e.g. `HEAD` or `origin/main`.
+        excluded_dirs: Directory names to skip. Defaults to DEFAULT_EXCLUDED_DIRS.
+        include_untracked: Also return new files git does not track yet (ignored files excepted).
+
+    Returns:
+        The changed `.py` files, sorted.
+
+    Raises:
+        GitError: If `root` is not in a work tree or `base` is not a valid revision.
+    """
+    root = Path(root).resolve()
+    toplevel = Path(_git(["rev-parse", "--show-toplevel"], root).strip())
+    # -z keeps unusual file names intact; paths are relative to the top level.
+    output = _git(["diff", "--name-only", "--diff-filter=d", "-z", base, "--", "."], root)
+    if include_untracked:
+        output += _git(["ls-files", "--others", "--exclude-standard", "--full-name", "-z", "--", "."], root)
+    excluded = set(DEFAULT_EXCLUDED_DIRS if excluded_dirs is None else excluded_dirs)
+    files = set()
+    for name in filter(None, output.split("\0")):
+        if not name.endswith(".py"):
+            continue
+        path = toplevel / name
+        try:
+            parts = path.relative_to(root).parts
+        except ValueError:
+            continue
+        if excluded.intersection(parts[:-1]) or not os.path.isfile(path):
+            continue
+        files.add(path)
+    return sorted(files)
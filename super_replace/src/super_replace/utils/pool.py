@@ -0,0 +1,31 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, Optional, Sequence, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Below this many files, project-wide commands process them inline by default.
+MIN_PARALLEL_FILES = 8
+
+
+def run_tasks(function: Callable[[T], R], tasks: Sequence[T], jobs: Optional[int]) -> List[R]:
+    """Applies a picklable function to every task, in a process pool when `jobs` allows.
+
+    Args:
+        function: A module-level function, run in the worker processes.
+        tasks: The picklable arguments, one per call.
+        jobs: Number of worker processes. Defaults to the number of CPUs; 1 runs inline.
+
+    Returns:
+        The results, in task order.
+    """
+    if not tasks:
+        return []
+    jobs = min(jobs or os.cpu_count() or 1, len(tasks))
+    if jobs == 1:
+        return [function(task) for task in tasks]
+    # Large chunks amortize IPC; a few chunks per worker keep the load balanced.
+    chunksize = max(1, len(tasks) // (jobs * 4))
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(function, tasks, chunksize=chunksize))
@@ -2,6 +2,7 @@ import pytest
 import ast
 from super_replace.core.autonomous_replacer import (
     super_replace_autonomous,
+    analyze_rename_safety,
     check_rename_safety,
     get_binding_info,
     ScopeKind,
@@ -171,6 +172,52 @@ def func():
     assert is_safe is False
     assert any("Name 'new_name' already exists" in issue for issue in issues)
 
+SAFETY_CODE = """
+limit = 10
+
+def helper():
+    return 1
+
+def first(value):
+    count = value
+    def inner():
+        total = 0
+        return count + total
+    return inner() + limit
+
+def second():
+    total = 5
+    return total
+
+class Config:
+    value = 3
+    def scaled(self, factor):
+        return factor * limit
+"""
+
+@pytest.mark.parametrize("target, replacement, rules, kinds", [
+    # Bound only in an unrelated function: not a conflict.
+    ("count", "total", {"functions": ["first"]}, ["capture"]),
+    ("value", "total", {"functions": ["first"]}, []),
+    # Shadows the global `limit` used in first.
+    ("value", "limit", {"functions": ["first"]}, ["shadow"]),
+    # Methods do not see class attributes, so neither direction conflicts.
+    ("value", "limit", {"scope": "class"}, []),
+    ("factor", "value", {"functions": ["scaled"]}, []),
+    # Module-level functions are module names too.
+    ("limit", "helper", {}, ["existing"]),
+])
+def test_rename_conflicts_follow_scope_visibility(target, replacement, rules, kinds):
+    result = analyze_rename_safety(SAFETY_CODE, target, replacement, rules)
+    assert [conflict.kind for conflict in result["conflicts"]] == kinds
+    assert result["safe"] is (not kinds)
+
+def test_analyze_rename_safety_suggests_alternatives():
+    result = analyze_rename_safety(SAFETY_CODE, "count", "total", {"functions": ["first"]})
+    assert "'count' at line 11 in FUNCTION 'inner'" in result["issues"][0]
+    assert result["suggestions"] == ["total_", "total2", "total3"]
+    assert analyze_rename_safety(SAFETY_CODE, "count", "total_", {"functions": ["first"]})["safe"]
+
 
 # --- Test cases for get_binding_info --- #
 
@@ -388,3 +435,22 @@ result = apply_func(my_lambda, 5)
     context = {"scope": "local", "debug": DEBUG}
     result = super_replace_autonomous(code, "x", "y", context)
     assert normalize_code(result) == normalize_code(expected)
+
+
+# --- Inverted name index ---
+
+def test_name_index_lists_every_binding_of_a_name():
+    code = """
+x = 0
+def f(x):
+    return [x for x in range(x)]
+class C:
+    x = 1
+"""
+    builder = ScopeBuilder()
+    builder.visit(ast.parse(code))
+    index = builder.index
+    kinds = [index.binding_key_to_scope[key].kind for key in index.names["x"]]
+    assert sorted(k.name for k in kinds) == ["CLASS", "COMPREHENSION", "FUNCTION", "MODULE"]
+    assert all(key.name == "x" for key in index.names["x"])
+    assert len(index.names["x"]) == sum(1 for key in index.binding_key_to_scope if key.name == "x")
@@ -0,0 +1,90 @@
+import ast
+import pytest
+from super_replace.core.autonomous_replacer import super_replace_autonomous
+from super_replace.core.batch_replacer import RenameConflictError, super_replace_batch
+
+CODE = """
+counter = 0
+
+def outer(a, b, /, c):
+    total = a + b + c
+    def inner():
+        nonlocal total
+        total += 1
+        return total
+    try:
+        inner()
+    except ValueError as err:
+        print(err)
+    return total
+
+def bump():
+    global counter
+    counter += 1
+"""
+
+
+def normalize_code(code: str) -> str:
+    return ast.unparse(ast.parse(code)).strip()
+
+
+def test_batch_matches_sequential_single_renames():
+    renames = {
+        "total": {"replacement": "running", "functions": ["outer"], "scope": "local"},
+        "counter": {"replacement": "count", "scope": "global"},
+        "err": "error",
+        "a": "first",
+    }
+    expected = CODE
+    for target, value in renames.items():
+        rules = dict(value) if isinstance(value, dict) else {"scope": "local"}
+        replacement = rules.pop("replacement", value)
+        expected = super_replace_autonomous(expected, target, replacement, rules)
+    result = super_replace_batch(CODE, renames, {"scope": "local"})
+    assert normalize_code(result) == normalize_code(expected)
+
+
+def test_batch_rejects_pairs_capturing_each_other_across_scopes():
+    code = "a = 5\ndef f():\n    b = 1\n    return a + b\n"
+    with pytest.raises(RenameConflictError) as excinfo:
+        super_replace_batch(code, {"a": "c", "b": "c"})
+    assert "'a' at line 4 would refer to 'b' (renamed 'c') in function scope 'f'" in str(excinfo.value)
+
+
+def test_batch_rejects_a_pair_capturing_an_existing_binding():
+    code = "def f():\n    x = 1\n    def g(y):\n        return x + y\n    return g\n"
+    with pytest.raises(RenameConflictError) as excinfo:
+        super_replace_batch(code, {"y": "x"})
+    assert "'x' at line 4 would refer to 'y' (renamed 'x') in function scope 'g'" in str(excinfo.value)
+    # Renaming the outer binding out of the way as well keeps every reference intact.
+    result = super_replace_batch(code, {"y": "x", "x": "outer_x"}, {"preserve_formatting": True})
+    assert "return outer_x + x" in result
+
+
+def test_batch_swaps_names_in_one_pass():
+    code = "def f(a, b):\n    return a - b\n"
+    result = super_replace_batch(code, {"a": "b", "b": "a"}, {"preserve_formatting": True})
+    assert result == "def f(b, a):\n    return b - a\n"
+
+
+def test_batch_per_pair_function_filters():
+    code = "def f():\n    x = 1\n    return x\n\ndef g():\n    x = 2\n    return x\n"
+    result = super_replace_batch(code, [
+        {"target": "x", "replacement": "fx", "functions": ["f"]},
+        {"target": "x", "replacement": "gx", "functions": ["g"]},
+    ], {"scope": "local", "preserve_formatting": True})
+    assert result == "def f():\n    fx = 1\n    return fx\n\ndef g():\n    gx = 2\n    return gx\n"
+
+
+def test_batch_detects_conflicting_pairs():
+    code = "def f(a, b):\n    return a - b\n"
+    with pytest.raises(RenameConflictError) as excinfo:
+        super_replace_batch(code, {"a": "c", "b": "c"})
+    assert "would both be named 'c'" in str(excinfo.value)
+    with pytest.raises(RenameConflictError):
+        super_replace_batch(code, [
+            {"target": "a", "replacement": "x"},
+            {"target": "a", "replacement": "y"},
+        ])
+    with pytest.raises(RenameConflictError):
+        super_replace_batch(code, {"a": "b"})
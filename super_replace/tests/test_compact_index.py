@@ -0,0 +1,61 @@
+import pickle
+
+import pytest
+
+from super_replace.core.autonomous_replacer import build_index, binding_info_from_index, get_binding_info
+from super_replace.core.compact_index import CompactIndex, build_compact_index
+
+CODE = """
+import os as system
+counter = 0
+
+class Config:
+    counter = 1
+    def read(self, counter=None):
+        return [counter for counter in range(counter or 3)]
+
+def outer(x):
+    total = x
+    def inner():
+        nonlocal total
+        total += 1
+        return lambda x: x + total
+    try:
+        inner()
+    except ValueError as err:
+        print(err, system.sep)
+    return total
+
+def bump():
+    global counter
+    counter += 1
+"""
+
+
+@pytest.mark.parametrize("target", ["counter", "total", "x", "err", "system", "inner", "missing"])
+def test_binding_info_matches_full_index(target):
+    assert get_binding_info(CODE, target, compact=True) == get_binding_info(CODE, target)
+
+
+def test_tables_mirror_the_index():
+    _, index = build_index(CODE)
+    compact = CompactIndex.from_index(index)
+    assert compact.scope_count == len(index.scopes)
+    assert compact.binding_count == len(index.binding_key_to_scope)
+    for binding_id in range(compact.binding_count):
+        key = compact.binding_key(binding_id)
+        assert compact.use_count(binding_id) == len(index.uses.get(key, ()))
+        assert compact.definition_count(binding_id) == len(index.defs.get(key, ()))
+        assert sorted(compact.uses(binding_id)) == sorted((n.lineno, n.col_offset) for n in index.uses.get(key, ()))
+    module_position = 0
+    assert compact.scope_parents[module_position] == -1
+    err_binding = compact.bindings_of("err")[0]
+    assert list(compact.definitions(err_binding)) == [(-1, -1)]  # Synthetic except-handler name.
+
+
+def test_compact_index_holds_no_ast_nodes_and_pickles_small():
+    _, index = build_index(CODE)
+    compact = build_compact_index(CODE)
+    assert b"_ast" not in pickle.dumps(compact)
+    assert len(pickle.dumps(compact)) < len(pickle.dumps(index)) / 2
+    assert compact.binding_info("total") == binding_info_from_index(index, "total")
@@ -0,0 +1,95 @@
+import ast
+
+import pytest
+
+from super_replace.core import context_analyzer
+from super_replace.core.context_analyzer import ContextAnalyzer, clear_context_cache
+
+CODE = '''
+import os, sys as system
+from typing import List
+
+class Base(object, metaclass=type):
+    """Base docstring."""
+    limit: int = 10
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def greet(self) -> str:
+        message = f"Hello, {self.name}!"
+        return message
+
+def calculate_sum(a: int, b: int) -> int:
+    from math import fsum as add
+    first = second = a + b
+    values: List[int]
+    return first
+
+x = 10
+y = calculate_sum(x, 20)
+'''
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    clear_context_cache()
+    yield
+    clear_context_cache()
+
+
+def test_all_context():
+    context = ContextAnalyzer(CODE).get_all_context()
+    assert [f["name"] for f in context["functions"]] == ["calculate_sum", "__init__", "greet"]
+    assert context["classes"] == [{
+        "name": "Base", "lineno": 5, "col_offset": 0, "bases": ["object"], "docstring": "Base docstring."
+    }]
+    assignments = {(a["name"], a["lineno"]): a for a in context["assignments"]}
+    assert assignments[("limit", 7)] == {"name": "limit", "lineno": 7, "col_offset": 4, "annotation": "int", "value": "10"}
+    assert assignments[("first", 18)]["value"] == assignments[("second", 18)]["value"] == "a + b"
+    assert assignments[("values", 19)]["value"] == ""
+    assert {"module": "sys", "asname": "system", "lineno": 2} in context["imports"]
+    assert {"module": "math", "name": "fsum", "asname": "add", "lineno": 17} in context["imports"]
+
+
+def test_repeated_analysis_skips_parse_and_walk(monkeypatch):
+    expected = ContextAnalyzer(CODE).get_all_context()
+
+    def fail(*args, **kwargs):
+        raise AssertionError("the code was parsed or walked again")
+
+    monkeypatch.setattr(context_analyzer.ast, "parse", fail)
+    monkeypatch.setattr(context_analyzer.ast, "walk", fail)
+    assert ContextAnalyzer(CODE).get_all_context() == expected
+
+
+def test_single_walk_and_lazy_unparse(monkeypatch):
+    walks, unparsed = [], []
+    real_walk, real_unparse = ast.walk, ast.unparse
+    monkeypatch.setattr(context_analyzer.ast, "walk", lambda node: walks.append(node) or real_walk(node))
+    monkeypatch.setattr(context_analyzer.ast, "unparse", lambda node: unparsed.append(node) or real_unparse(node))
+
+    analyzer = ContextAnalyzer(CODE)
+    analyzer.get_function_definitions()
+    analyzer.get_imports()
+    assert unparsed == []
+    analyzer.get_all_context()
+    assert len(walks) == 1
+    assert unparsed
+
+
+def test_returned_entries_can_be_modified():
+    ContextAnalyzer(CODE).get_function_definitions()[0]["name"] = "changed"
+    assert ContextAnalyzer(CODE).get_function_definitions()[0]["name"] == "calculate_sum"
+
+
+def test_returned_nested_lists_can_be_modified():
+    expected_args = list(ContextAnalyzer(CODE).get_function_definitions()[0]["args"])
+    ContextAnalyzer(CODE).get_function_definitions()[0]["args"].append("extra")
+    ContextAnalyzer(CODE).get_all_context()["functions"][0]["args"].clear()
+    assert ContextAnalyzer(CODE).get_function_definitions()[0]["args"] == expected_args
+
+
+def test_invalid_code_raises():
+    with pytest.raises(SyntaxError):
+        ContextAnalyzer("def f(:\n")
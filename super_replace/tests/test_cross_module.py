@@ -0,0 +1,145 @@
+import pytest
+
+from super_replace.core import cross_module
+from super_replace.core.cross_module import (
+    build_project_symbols,
+    find_importers,
+    rename_symbol_in_project,
+    resolve_import_from,
+)
+
+FILES = {
+    "pkg/__init__.py": 'from .core import helper\n\n__all__ = ["helper"]\n',
+    "pkg/core.py": (
+        "import os\n\n\n"
+        "def helper(value):  # keep this comment\n"
+        "    return value + 1\n\n\n"
+        "class Box:\n"
+        "    def run(self):\n"
+        "        return helper(2)\n\n\n"
+        "def shadow():\n"
+        "    helper = 3\n"
+        "    return helper\n\n\n"
+        "HANDLERS = [helper]\n"
+    ),
+    "pkg/sub/user.py": (
+        "from .. import core\n"
+        "from ..core import helper as h\n"
+        "import pkg.core\n"
+        "import pkg.core as pc\n"
+        "from pkg import helper\n\n\n"
+        "def use():\n"
+        "    return core.helper(1) + h(2) + pkg.core.helper(3) + pc.helper(4) + helper(5)\n"
+    ),
+    "app.py": "from pkg.core import helper, Box\n\nprint(helper(1), Box)\n",
+    "unrelated.py": "def helper():\n    return 1\n",
+}
+
+
+@pytest.fixture
+def project(tmp_path):
+    root = tmp_path / "src"
+    for name, code in FILES.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(code)
+    return root
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_module_level_rename_reaches_importers(project, jobs):
+    results = rename_symbol_in_project(project, "pkg.core", "helper", "assist", jobs=jobs)
+    changed = {r.path.relative_to(project).as_posix() for r in results if r.changed}
+    assert changed == {"pkg/__init__.py", "pkg/core.py", "pkg/sub/user.py", "app.py"}
+    # Files that import nothing renamed are not even indexed.
+    assert "unrelated.py" not in {r.path.name for r in results}
+
+    core = (project / "pkg/core.py").read_text()
+    assert "def assist(value):  # keep this comment" in core
+    assert "return assist(2)" in core
+    assert "helper = 3\n    return helper" in core  # A local shadowing binding is left alone.
+    assert "HANDLERS = [assist]" in core
+    assert (project / "pkg/__init__.py").read_text() == 'from .core import assist\n\n__all__ = ["assist"]\n'
+    assert (project / "pkg/sub/user.py").read_text().splitlines()[1:] == [
+        "from ..core import assist as h",
+        "import pkg.core",
+        "import pkg.core as pc",
+        "from pkg import assist",
+        "",
+        "",
+        "def use():",
+        "    return core.assist(1) + h(2) + pkg.core.assist(3) + pc.assist(4) + assist(5)",
+    ]
+    assert (project / "app.py").read_text() == "from pkg.core import assist, Box\n\nprint(assist(1), Box)\n"
+    assert (project / "unrelated.py").read_text() == FILES["unrelated.py"]
+
+
+def test_dry_run_and_class_rename(project):
+    results = rename_symbol_in_project(project, "pkg.core", "Box", "Crate", jobs=1, dry_run=True)
+    by_name = {r.path.name: r for r in results if r.changed}
+    assert set(by_name) == {"core.py", "app.py"}
+    assert "class Crate:" in by_name["core.py"].new_code
+    assert by_name["app.py"].new_code.startswith("from pkg.core import helper, Crate\n")
+    assert (project / "app.py").read_text() == FILES["app.py"]
+
+
+def test_summaries_are_cached_per_file(project, tmp_path, monkeypatch):
+    cache_dir = tmp_path / "cache"
+    first = build_project_symbols(project, jobs=1, cache_dir=cache_dir)
+    (project / "app.py").write_text("import pkg.core\n")
+
+    parsed = []
+    real = cross_module.summarize_module
+    monkeypatch.setattr(cross_module, "summarize_module", lambda code, *a: parsed.append(code) or real(code, *a))
+    second = build_project_symbols(project, jobs=1, cache_dir=cache_dir)
+    assert parsed == ["import pkg.core\n"]
+    assert second.importers_of("pkg.core") == first.importers_of("pkg.core")
+    # `from pkg import helper` at module level re-exports it, so pkg.sub.user:helper follows too.
+    assert set(second.affected_renames("pkg.core", "helper", "x")) == {
+        ("pkg.core", "helper"), ("pkg", "helper"), ("pkg.sub.user", "helper"),
+    }
+
+
+@pytest.mark.parametrize("module, is_package, level, target, expected", [
+    ("pkg.sub.user", False, 2, "core", "pkg.core"),
+    ("pkg.sub.user", False, 1, None, "pkg.sub"),
+    ("pkg", True, 1, "core", "pkg.core"),
+    ("pkg", True, 3, "core", None),
+    ("app", False, 0, "pkg.core", "pkg.core"),
+])
+def test_resolve_import_from(module, is_package, level, target, expected):
+    assert resolve_import_from(module, is_package, level, target) == expected
+
+
+def test_method_named_like_the_symbol_keeps_calls_to_it(tmp_path):
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg/__init__.py").write_text("")
+    (tmp_path / "pkg/mod.py").write_text(
+        "def func():\n    return 1\n\n\nclass C:\n    def func(self):\n        return func()\n"
+    )
+    rename_symbol_in_project(tmp_path, "pkg.mod", "func", "run", jobs=1)
+    assert (tmp_path / "pkg/mod.py").read_text() == (
+        "def run():\n    return 1\n\n\nclass C:\n    def func(self):\n        return run()\n"
+    )
+
+
+def test_rewrite_keeps_crlf_line_endings(tmp_path):
+    (tmp_path / "mod.py").write_bytes(b"def func():  # keep\r\n    return 1\r\n")
+    (tmp_path / "app.py").write_bytes(b"from mod import func\r\nfunc()\r\n")
+    rename_symbol_in_project(tmp_path, "mod", "func", "run", jobs=1)
+    assert (tmp_path / "mod.py").read_bytes() == b"def run():  # keep\r\n    return 1\r\n"
+    assert (tmp_path / "app.py").read_bytes() == b"from mod import run\r\nrun()\r\n"
+
+
+def test_unknown_module(project):
+    with pytest.raises(ValueError):
+        rename_symbol_in_project(project, "pkg.missing", "helper", "assist", jobs=1)
+
+
+def test_find_importers_only_summarizes_candidates(project, monkeypatch):
+    summarized = []
+    summarize = cross_module._summarize_file
+    monkeypatch.setattr(cross_module, "_summarize_file", lambda task: summarized.append(task.module) or summarize(task))
+    importers = find_importers(project, [project / "pkg" / "core.py"])
+    assert sorted(p.relative_to(project).as_posix() for p in importers) == ["app.py", "pkg/__init__.py", "pkg/sub/user.py"]
+    assert "unrelated" not in summarized
@@ -0,0 +1,94 @@
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+
+import pytest
+
+from super_replace.client import DaemonClient, DaemonError
+from super_replace.core.autonomous_replacer import get_binding_info, super_replace_autonomous
+from super_replace.core.daemon import METHOD_NOT_FOUND, RENAME_CONFLICT, SOURCE_ERROR, DaemonServer
+
+CODE = """
+def example_function(x):
+    y = x + 1
+    return y
+
+def other(x):
+    return x
+"""
+
+
+@pytest.fixture
+def server():
+    # Unix socket paths are limited to ~100 bytes, so keep the directory short.
+    socket_dir = tempfile.mkdtemp(prefix="sr-", dir="/tmp")
+    socket_path = os.path.join(socket_dir, "d.sock")
+    server = DaemonServer(socket_path)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join(timeout=5)
+    os.rmdir(socket_dir)
+
+
+def test_rename_matches_in_process_result_and_hits_cache(server):
+    rules = {"functions": ["example_function"], "scope": "local"}
+    with DaemonClient(server.socket_path) as client:
+        first = client.rename(CODE, "x", "value", rules)
+        second = client.rename(CODE, "x", "value", rules)
+        stats = client.stats()
+    assert first == second == super_replace_autonomous(CODE, "x", "value", rules)
+    assert stats["requests"] == 2  # Requests completed before the stats call.
+    assert stats["cache_hits"] >= 1
+
+
+def test_binding_info_and_safety(server):
+    with DaemonClient(server.socket_path) as client:
+        info = client.binding_info(CODE, "x")
+        safe, issues = client.check_rename_safety(CODE, "x", "y")
+        key = info["bindings"][1]["binding_key"]
+        renamed = client.rename(CODE, "x", "arg", {"target_binding_key": key})
+    expected = get_binding_info(CODE, "x")
+    assert info["total_uses"] == expected["total_uses"]
+    assert [b["scope_name"] for b in info["bindings"]] == ["example_function", "other"]
+    assert not safe and issues
+    assert "def other(arg)" in renamed and "def example_function(x)" in renamed
+
+
+def test_file_rename_writes_atomically(server, tmp_path):
+    path = tmp_path / "module.py"
+    path.write_text(CODE)
+    with DaemonClient(server.socket_path) as client:
+        result = client.rename_file(str(path), "y", "z", {"scope": "local"})
+    assert result["changed"]
+    assert path.read_text() == result["code"]
+    assert "z = x + 1" in result["code"]
+
+
+def test_errors_are_reported_and_the_connection_stays_usable(server):
+    with DaemonClient(server.socket_path) as client:
+        with pytest.raises(DaemonError) as syntax_error:
+            client.rename("def broken(:\n", "x", "y")
+        with pytest.raises(DaemonError) as conflict:
+            client.batch_rename(CODE, {"x": "z", "y": "z"}, {"scope": "local"})
+        with pytest.raises(DaemonError) as unknown:
+            client.call("no_such_method")
+        assert client.ping()["pid"] == os.getpid()
+    assert syntax_error.value.code == SOURCE_ERROR
+    assert conflict.value.code == RENAME_CONFLICT and conflict.value.data
+    assert unknown.value.code == METHOD_NOT_FOUND
+
+
+def test_second_server_on_a_live_socket_is_refused(server):
+    with pytest.raises(RuntimeError):
+        DaemonServer(server.socket_path)
+
+
+def test_client_does_not_import_the_replacer():
+    code = "import sys, super_replace.client; print(any(m.startswith(('astor', 'click', 'super_replace.core')) for m in sys.modules))"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert output.strip() == "False"
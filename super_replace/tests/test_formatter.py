@@ -0,0 +1,215 @@
+import os
+import stat
+import sys
+import tomllib
+import types
+from pathlib import Path
+
+import pytest
+
+from super_replace.utils import formatter
+
+
+@pytest.fixture
+def fake_black(monkeypatch):
+    module = types.ModuleType("black")
+
+    class InvalidInput(ValueError):
+        pass
+
+    def format_str(code, mode):
+        if "(:" in code:
+            raise InvalidInput("bad syntax")
+        code = code.replace("x=1", "x = 1")
+        return code + f"# line length {mode['line_length']}\n" if "line_length" in mode else code
+
+    def find_pyproject_toml(path_search_start):
+        directory = Path(path_search_start[0])
+        for candidate in (directory, *directory.parents):
+            if (candidate / "pyproject.toml").is_file():
+                return str(candidate / "pyproject.toml")
+        return None
+
+    def parse_pyproject_toml(path):
+        return tomllib.loads(Path(path).read_text())["tool"]["black"]
+
+    module.InvalidInput = InvalidInput
+    module.Mode = lambda **options: options
+    module.format_str = format_str
+    module.find_pyproject_toml = find_pyproject_toml
+    module.parse_pyproject_toml = parse_pyproject_toml
+    monkeypatch.setattr(formatter, "_black_module", module)
+    monkeypatch.setattr(formatter, "_black_modes", {})
+    monkeypatch.setattr(formatter, "_black_import_failed", False)
+    return module
+
+
+@pytest.fixture
+def bin_dir(tmp_path, monkeypatch):
+    """A directory on PATH for fake black/ruff executables."""
+    directory = tmp_path / "bin"
+    directory.mkdir()
+    monkeypatch.setenv("PATH", f"{directory}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setattr(formatter, "_ruff_command", lambda: str(directory / "ruff"))
+    return directory
+
+
+def _executable(directory, name, body):
+    path = directory / name
+    path.write_text(f"#!{sys.executable}\nimport json, os, sys\n{body}\n")
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+
+
+def test_black_api_is_used_in_process(fake_black, monkeypatch):
+    monkeypatch.setattr(formatter.subprocess, "run", lambda *a, **k: pytest.fail("spawned a process"))
+    timings = {}
+    assert formatter.format_code_with_black("x=1\n", timings=timings) == "x = 1\n"
+    assert formatter.black_backend() == "api"
+    assert timings["format"] > 0
+
+
+def test_black_api_keeps_code_it_cannot_parse(fake_black):
+    assert formatter.format_code_with_black("def f(:\n") == "def f(:\n"
+
+
+def test_black_api_uses_the_project_configuration(fake_black, tmp_path):
+    (tmp_path / "pyproject.toml").write_text("[tool.black]\nline_length = 100\n")
+    (tmp_path / "pkg").mkdir()
+    formatted = formatter.format_code_with_black("x=1\n", filename=str(tmp_path / "pkg" / "mod.py"))
+    assert formatted == "x = 1\n# line length 100\n"
+    assert formatter.format_code_with_black("x=1\n") == "x = 1\n"
+
+
+def test_black_api_reports_unparsable_code_on_stderr(fake_black, capsys):
+    formatter.format_code_with_black("def f(:\n")
+    captured = capsys.readouterr()
+    assert captured.out == "" and "cannot format" in captured.err
+
+
+def test_black_subprocess_fallback_reads_stdin(bin_dir, monkeypatch):
+    monkeypatch.setattr(formatter, "_black_module", None)
+    monkeypatch.setattr(formatter, "_black_import_failed", True)
+    _executable(bin_dir, "black", "assert sys.argv[1:] == ['--quiet', '-']\nsys.stdout.write(sys.stdin.read().upper())")
+    assert formatter.black_backend() == "subprocess"
+    assert formatter.format_code_with_black("x=1\n") == "X=1\n"
+    with pytest.raises(RuntimeError):
+        formatter.black_backend("api")
+
+
+def test_ruff_lints_from_stdin(bin_dir):
+    _executable(bin_dir, "ruff", "name = sys.argv[sys.argv.index('--stdin-filename') + 1]\n"
+                                 "print(f'{name}:1:1: F401 {len(sys.stdin.read())} chars')\nsys.exit(1)")
+    timings = {}
+    output = formatter.lint_code_with_ruff("import os\n", timings=timings, filename="mod.py")
+    assert output.strip() == "mod.py:1:1: F401 10 chars"
+    assert "lint" in timings
+
+
+def test_ruff_batch_uses_one_process_and_maps_issues_back(bin_dir, tmp_path):
+    log = tmp_path / "calls.log"
+    _executable(bin_dir, "ruff", (
+        f"open({str(log)!r}, 'a').write('call\\n')\n"
+        "root = sys.argv[-1]\n"
+        "issues = []\n"
+        "for dirpath, _, files in os.walk(root):\n"
+        "    for f in files:\n"
+        "        path = os.path.join(dirpath, f)\n"
+        "        if 'import os' in open(path).read():\n"
+        "            issues.append({'filename': path, 'code': 'F401', 'message': 'unused', 'location': {'row': 1, 'column': 1}})\n"
+        "print(json.dumps(issues))\nsys.exit(1 if issues else 0)"
+    ))
+    codes = {"pkg/a.py": "import os\n", "pkg/b.py": "x = 1\n", "other/a.py": "import os\nimport os\n"}
+    output = formatter.lint_codes_with_ruff(codes)
+    assert output == {
+        "pkg/a.py": "pkg/a.py:1:1: F401 unused\n",
+        "pkg/b.py": "",
+        "other/a.py": "other/a.py:1:1: F401 unused\n",
+    }
+    assert log.read_text().count("call") == 1
+
+
+def test_black_batch_subprocess_formats_a_tree_in_one_process(bin_dir, tmp_path, monkeypatch):
+    monkeypatch.setattr(formatter, "_black_module", None)
+    monkeypatch.setattr(formatter, "_black_import_failed", True)
+    log = tmp_path / "calls.log"
+    _executable(bin_dir, "black", (
+        f"open({str(log)!r}, 'a').write('call\\n')\n"
+        "for dirpath, _, files in os.walk(sys.argv[-1]):\n"
+        "    for f in files:\n"
+        "        path = os.path.join(dirpath, f)\n"
+        "        code = open(path).read()\n"
+        "        if '(:' not in code:\n"
+        "            open(path, 'w').write(code.replace('x=1', 'x = 1'))"
+    ))
+    codes = {"pkg/a.py": "x=1\n", "other/a.py": "y=x=1\n", "bad.py": "def f(:\n"}
+    timings = {}
+    assert formatter.format_codes_with_black(codes, timings) == {
+        "pkg/a.py": "x = 1\n", "other/a.py": "y=x = 1\n", "bad.py": "def f(:\n",
+    }
+    assert log.read_text().count("call") == 1
+    assert "format" in timings
+
+
+def test_ruff_batch_applies_the_project_configuration(bin_dir, tmp_path):
+    # A fake Ruff that honours line-length and per-file-ignores of the nearest ruff.toml.
+    _executable(bin_dir, "ruff", (
+        "import tomllib\n"
+        "issues = []\n"
+        "for dirpath, _, files in os.walk(sys.argv[-1]):\n"
+        "    for f in files:\n"
+        "        if not f.endswith('.py'):\n"
+        "            continue\n"
+        "        path = os.path.join(dirpath, f)\n"
+        "        config, directory = {}, dirpath\n"
+        "        while directory != os.path.dirname(directory):\n"
+        "            if os.path.exists(os.path.join(directory, 'ruff.toml')):\n"
+        "                config = tomllib.load(open(os.path.join(directory, 'ruff.toml'), 'rb'))\n"
+        "                break\n"
+        "            directory = os.path.dirname(directory)\n"
+        "        ignored = config.get('per-file-ignores', {}).get(os.path.relpath(path, directory), [])\n"
+        "        for row, line in enumerate(open(path), 1):\n"
+        "            if len(line.rstrip()) > config.get('line-length', 88) and 'E501' not in ignored:\n"
+        "                issues.append({'filename': path, 'code': 'E501', 'message': 'long', 'location': {'row': row, 'column': 1}})\n"
+        "print(json.dumps(issues))\nsys.exit(1 if issues else 0)"
+    ))
+    project = tmp_path / "project"
+    (project / "pkg").mkdir(parents=True)
+    (project / "ruff.toml").write_text('line-length = 20\n[per-file-ignores]\n"pkg/generated.py" = ["E501"]\n')
+    long_line = "value = 'a fairly long line'\n"
+    codes = {
+        str(project / "pkg" / "mod.py"): long_line,
+        str(project / "pkg" / "generated.py"): long_line,
+        str(tmp_path / "elsewhere" / "mod.py"): long_line,
+    }
+    output = formatter.lint_codes_with_ruff(codes)
+    assert output == {
+        str(project / "pkg" / "mod.py"): f"{project / 'pkg' / 'mod.py'}:1:1: E501 long\n",
+        str(project / "pkg" / "generated.py"): "",
+        str(tmp_path / "elsewhere" / "mod.py"): "",
+    }
+
+
+def test_black_batch_subprocess_passes_the_project_configuration(bin_dir, tmp_path, monkeypatch):
+    monkeypatch.setattr(formatter, "_black_module", None)
+    monkeypatch.setattr(formatter, "_black_import_failed", True)
+    # A fake Black appending the line length of the --config file it was given.
+    _executable(bin_dir, "black", (
+        "import tomllib\n"
+        "length = 88\n"
+        "if '--config' in sys.argv:\n"
+        "    config = tomllib.load(open(sys.argv[sys.argv.index('--config') + 1], 'rb'))\n"
+        "    length = config['tool']['black']['line-length']\n"
+        "for dirpath, _, files in os.walk(sys.argv[-1]):\n"
+        "    for f in files:\n"
+        "        if f.endswith('.py'):\n"
+        "            path = os.path.join(dirpath, f)\n"
+        "            open(path, 'a').write(f'# {length}\\n')"
+    ))
+    project = tmp_path / "project"
+    project.mkdir()
+    (project / "pyproject.toml").write_text("[tool.black]\nline-length = 100\n")
+    codes = {str(project / "pkg" / "mod.py"): "x = 1\n", str(tmp_path / "other.py"): "y = 2\n"}
+    assert formatter.format_codes_with_black(codes) == {
+        str(project / "pkg" / "mod.py"): "x = 1\n# 100\n",
+        str(tmp_path / "other.py"): "y = 2\n# 88\n",
+    }
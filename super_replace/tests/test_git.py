@@ -0,0 +1,74 @@
+import subprocess
+
+import pytest
+
+from super_replace.core.project import super_replace_project
+from super_replace.core.cross_module import find_importers
+from super_replace.utils.git import GitError, changed_python_files
+
+
+def _git(repo, *args):
+    subprocess.run(["git", *args], cwd=repo, check=True, capture_output=True)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    files = {
+        "src/pkg/__init__.py": "",
+        "src/pkg/core.py": "def helper(value):\n    value = value + 1\n    return value\n",
+        "src/pkg/user.py": "from pkg.core import helper\n\n\ndef use(value):\n    return helper(value)\n",
+        "src/pkg/other.py": "def untouched(value):\n    return value\n",
+        "src/build/generated.py": "value = 1\n",
+        "README.md": "docs\n",
+    }
+    for name, code in files.items():
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(code)
+    _git(tmp_path, "init", "-q")
+    _git(tmp_path, "add", ".")
+    _git(tmp_path, "-c", "user.name=test", "-c", "user.email=test@example.com", "commit", "-q", "-m", "init")
+    return tmp_path
+
+
+def test_changed_python_files(repo):
+    src = repo / "src"
+    assert changed_python_files(src, "HEAD") == []
+    (src / "pkg" / "core.py").write_text("def helper(value):\n    return value\n")
+    (src / "pkg" / "new.py").write_text("value = 2\n")
+    (src / "build" / "generated.py").write_text("value = 2\n")
+    (repo / "README.md").write_text("changed\n")
+    _git(repo, "add", "src/pkg/new.py")
+    (src / "pkg" / "scratch.py").write_text("value = 3\n")
+    assert changed_python_files(src, "HEAD") == [src / "pkg" / "core.py", src / "pkg" / "new.py", src / "pkg" / "scratch.py"]
+    assert changed_python_files(src, "HEAD", include_untracked=False) == [src / "pkg" / "core.py", src / "pkg" / "new.py"]
+    (src / "pkg" / "scratch.py").unlink()
+    (src / "pkg" / "other.py").unlink()
+    assert changed_python_files(src / "pkg", "HEAD") == [src / "pkg" / "core.py", src / "pkg" / "new.py"]
+
+
+def test_changed_files_and_importers_limit_project_mode(repo):
+    src = repo / "src"
+    (src / "pkg" / "core.py").write_text("def helper(value):\n    value = value * 2\n    return value\n")
+    changed = changed_python_files(src, "HEAD")
+    paths = sorted(set(changed) | set(find_importers(src, changed)))
+    assert paths == [src / "pkg" / "core.py", src / "pkg" / "user.py"]
+    results = super_replace_project(src, "value", "amount", {"scope": "local"}, paths=paths)
+    assert [r.path.name for r in results if r.changed] == ["core.py", "user.py"]
+    assert "value" in (src / "pkg" / "other.py").read_text()
+
+
+def test_git_errors(tmp_path, repo):
+    with pytest.raises(GitError):
+        changed_python_files(repo, "no-such-revision")
+    outside = tmp_path.parent / (tmp_path.name + "-plain")
+    outside.mkdir()
+    with pytest.raises(GitError):
+        changed_python_files(outside, "HEAD")
+
+
+def test_importers_are_found_from_the_repository_root(repo):
+    # `from pkg.core import ...` names the module relative to src/, not to the repository.
+    (repo / "src" / "pkg" / "core.py").write_text("def helper(value):\n    return value\n")
+    changed = changed_python_files(repo, "HEAD")
+    assert find_importers(repo, changed) == [repo / "src" / "pkg" / "user.py"]
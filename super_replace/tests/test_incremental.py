@@ -0,0 +1,128 @@
+import ast
+import pytest
+from super_replace.core.autonomous_replacer import ScopeBuilder
+from super_replace.core.incremental import IncrementalIndexer
+
+CODE = '''import os
+
+LIMIT = 10
+
+def first(a, b=LIMIT):
+    total = a + b
+    def inner():
+        nonlocal total
+        total += 1
+        return total
+    return [inner() for _ in range(total)]
+
+
+class Widget:
+    size = 3
+
+    def grow(self, step):
+        try:
+            self.size += step
+        except TypeError as err:
+            print(err, later)
+        return self.size
+
+    def shrink(self):
+        return lambda n: n - self.size
+
+
+def last():
+    return os.path.join(LIMIT, later)
+
+later = first(1)
+'''
+
+
+def _scope_path(scope):
+    parts = []
+    while scope is not None:
+        parts.append(f"{scope.kind.name}:{scope.name}")
+        scope = scope.parent
+    return "/".join(reversed(parts))
+
+
+def _signature(index):
+    bindings = sorted(
+        (_scope_path(scope), key.name, len(index.defs.get(key, [])), len(index.uses.get(key, [])))
+        for key, scope in index.binding_key_to_scope.items()
+    )
+    unresolved = sorted((name, len(nodes)) for name, nodes in index.unresolved.items())
+    names = sorted((name, len(keys)) for name, keys in index.names.items())
+    scope_paths = {s.id: _scope_path(s) for s in index.scopes}
+    attributes = sorted((name, len(nodes)) for name, nodes in index.attributes.items())
+    members = sorted((scope_paths[key.class_scope_id], key.name, len(nodes)) for key, nodes in index.member_accesses.items())
+    receivers = sorted((scope_paths[key.scope_id], key.name, scope_paths[class_id]) for key, class_id in index.receivers.items())
+    return bindings, unresolved, names, sorted(scope_paths.values()), attributes, members, receivers
+
+
+def _full_signature(code):
+    builder = ScopeBuilder()
+    builder.visit(ast.parse(code))
+    return _signature(builder.index)
+
+
+def _replace_line(code, old, new):
+    assert old in code
+    return code.replace(old, new, 1)
+
+
+@pytest.mark.parametrize("old, new", [
+    ("    total = a + b\n", "    total = a + b + LIMIT\n    extra = [total for total in range(2)]\n"),
+    ("            print(err, later)\n", "            print(err)\n"),
+    ("        return lambda n: n - self.size\n", "        return lambda n, m=later: n - m\n"),
+    ("    return os.path.join(LIMIT, later)\n", "    value = later\n    return value\n"),
+    ("        return self.size\n", "        return self.size\n        unreachable = lambda: step\n"),
+])
+def test_function_edits_are_incremental_and_match_full_rebuild(old, new):
+    indexer = IncrementalIndexer(CODE)
+    new_code = _replace_line(CODE, old, new)
+    assert indexer.update(new_code) is True
+    assert indexer.full_rebuilds == 0
+    assert indexer.code == new_code
+    assert _signature(indexer.index) == _full_signature(new_code)
+
+
+def test_successive_edits_keep_positions_in_sync():
+    indexer = IncrementalIndexer(CODE)
+    code = CODE
+    edits = [
+        ("    total = a + b\n", "    total = a + b\n    total *= 2\n    total -= 1\n"),
+        ("        return self.size\n", "        size = self.size\n        return size\n"),
+        ("    return os.path.join(LIMIT, later)\n", "    return LIMIT\n"),
+        ("        return lambda n: n - self.size\n", "        return 0\n"),
+    ]
+    for old, new in edits:
+        code = _replace_line(code, old, new)
+        assert indexer.update(code) is True
+    assert indexer.full_rebuilds == 0
+    assert ast.dump(indexer.tree, include_attributes=True) == ast.dump(ast.parse(code), include_attributes=True)
+    assert _signature(indexer.index) == _full_signature(code)
+
+
+@pytest.mark.parametrize("old, new", [
+    ("LIMIT = 10\n", "LIMIT = 11\n"),  # Module-level statement.
+    ("    size = 3\n", "    size = 4\n"),  # Class body.
+    ("def last():\n", "def renamed():\n"),  # Renamed definition.
+    ("    return os.path.join(LIMIT, later)\n", "    global LIMIT\n    LIMIT = 1\n"),
+    ("        return lambda n: n - self.size\n", "        return 0\nsize = 3\n"),  # Leaves the class.
+])
+def test_structural_edits_fall_back_to_full_rebuild(old, new):
+    indexer = IncrementalIndexer(CODE)
+    new_code = _replace_line(CODE, old, new)
+    assert indexer.update(new_code) is False
+    assert indexer.full_rebuilds == 1
+    assert _signature(indexer.index) == _full_signature(new_code)
+
+
+def test_syntax_error_keeps_last_index_and_recovers():
+    indexer = IncrementalIndexer(CODE)
+    broken = _replace_line(CODE, "    total = a + b\n", "    total = (a +\n")
+    with pytest.raises(SyntaxError):
+        indexer.update(broken)
+    fixed = _replace_line(CODE, "    total = a + b\n", "    total = a\n")
+    assert indexer.update(fixed) is False
+    assert _signature(indexer.index) == _full_signature(fixed)
@@ -0,0 +1,54 @@
+import ast
+import os
+from super_replace.core.autonomous_replacer import build_index, get_binding_info, super_replace_autonomous
+from super_replace.core.index_cache import IndexCache
+
+CODE = """
+def func():
+    x = 1
+    print(x)
+"""
+
+
+def test_cache_hit_returns_equivalent_index(tmp_path):
+    cache = IndexCache(tmp_path)
+    build_index(CODE, cache)
+    assert cache.misses == 1
+    tree, index = build_index(CODE, cache)
+    assert cache.hits == 1
+    assert [s.name for s in index.scopes] == ["module", "func"]
+    # Identity between tree nodes and index entries survives the round trip.
+    tree_nodes = {id(n) for n in ast.walk(tree)}
+    name_nodes = [n for n in index.node_to_binding if getattr(n, "id", None) == "x"]
+    assert name_nodes and all(id(n) in tree_nodes for n in name_nodes)
+
+
+def test_cache_persists_across_instances(tmp_path):
+    IndexCache(tmp_path).store(CODE, build_index(CODE))
+    cache = IndexCache(tmp_path)
+    assert cache.load(CODE) is not None
+    assert cache.load(CODE + "\n# changed") is None
+
+
+def test_cached_results_match_uncached(tmp_path):
+    cache = IndexCache(tmp_path)
+    context = {"scope": "local", "functions": ["func"]}
+    for _ in range(2):
+        assert super_replace_autonomous(CODE, "x", "y", context, cache=cache) == super_replace_autonomous(CODE, "x", "y", context)
+        assert get_binding_info(CODE, "x", cache=cache)["total_uses"] == 1
+    assert cache.hits >= 2
+
+
+def test_lru_eviction_keeps_recent_entries(tmp_path):
+    codes = [f"x = {i}\n" for i in range(3)]
+    for i, code in enumerate(codes):
+        IndexCache(tmp_path).store(code, build_index(code))
+        os.utime(tmp_path / f"{IndexCache.key_for(code)}.idx", (i, i))
+    cache = IndexCache(tmp_path, max_entries=2)
+    cache.load(codes[0])  # Touch the oldest entry.
+    newest = "y = 1\n"
+    cache.store(newest, build_index(newest))
+    remaining = {p.name for p in tmp_path.iterdir()}
+    assert f"{cache.key_for(codes[0])}.idx" in remaining
+    assert f"{cache.key_for(newest)}.idx" in remaining
+    assert len(remaining) == 2
@@ -0,0 +1,144 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from super_replace.core.llm_backends import BackendError, FakeBackend, HTTPBackend
+from super_replace.core.llm_integrator import LLMIntegrator
+from super_replace.core.response_cache import ResponseCache
+
+CONTEXT = {"functions": [{"name": "f", "lineno": 1}], "imports": []}
+
+
+def test_responses_are_cached_on_disk(tmp_path):
+    backend = FakeBackend()
+    first = LLMIntegrator(backend=backend, cache=ResponseCache(tmp_path))
+    answer = first.get_refactoring_suggestion(CONTEXT, "Rename f.")
+    # A new integrator, a reordered context and extra whitespace hit the same entry.
+    second = LLMIntegrator(backend=backend, cache=ResponseCache(tmp_path))
+    reordered = {"imports": [], "functions": [{"lineno": 1, "name": "f"}]}
+    assert second.get_refactoring_suggestion(reordered, "  Rename   f. ") == answer
+    assert len(backend.calls) == 1
+    assert second.cache.hits == 1
+
+
+def test_batch_sends_uncached_requests_together(tmp_path):
+    backend = FakeBackend(max_batch_size=2)
+    integrator = LLMIntegrator(backend=backend, cache=ResponseCache(tmp_path))
+    integrator.get_refactoring_suggestion(CONTEXT, "cached")
+    backend.calls.clear()
+
+    prompts = ["cached", "a", "b", "a", "c"]
+    answers = integrator.get_refactoring_suggestions([(CONTEXT, p) for p in prompts])
+    assert answers[1] == answers[3]
+    assert len(set(answers)) == 4
+    # "cached" comes from disk, the duplicate "a" is sent once, and batches hold at most two prompts.
+    assert [len(call) for call in backend.calls] == [2, 1]
+
+
+def test_backend_without_batching_gets_one_call_per_request():
+    backend = FakeBackend(supports_batching=False)
+    LLMIntegrator(backend=backend).get_refactoring_suggestions([(CONTEXT, "a"), (CONTEXT, "b")])
+    assert [len(call) for call in backend.calls] == [1, 1]
+
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = ResponseCache(tmp_path, ttl=60)
+    cache.put("key", "answer")
+    assert cache.get("key") == "answer"
+    path = tmp_path / "key.json"
+    path.write_text('{"created": %f, "response": "answer"}' % (time.time() - 120), encoding="utf-8")
+    assert cache.get("key") is None
+    assert not path.exists()
+
+
+@pytest.mark.parametrize("limits", [{"max_entries": 2}, {"max_bytes": 200}])
+def test_least_recently_used_entries_are_evicted(tmp_path, limits):
+    cache = ResponseCache(tmp_path, **limits)
+    for number, key in enumerate(["a", "b"]):
+        cache.put(key, "x" * 40)
+        os.utime(tmp_path / f"{key}.json", (number, number))
+    assert cache.get("a") is not None  # Now more recent than "b".
+    cache.put("c", "x" * 40)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+
+
+@pytest.fixture
+def stub_server():
+    """A local HTTP model: answers after `delay` seconds, with 429 for prompts containing "busy" once."""
+    state = {"in_flight": 0, "max_in_flight": 0, "requests": 0, "busy_seen": set()}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            prompt = json.loads(self.rfile.read(int(self.headers["Content-Length"])))["prompt"]
+            with lock:
+                state["requests"] += 1
+                state["in_flight"] += 1
+                state["max_in_flight"] = max(state["max_in_flight"], state["in_flight"])
+                reject = "busy" in prompt and prompt not in state["busy_seen"]
+                state["busy_seen"].add(prompt)
+            try:
+                time.sleep(0.3 if "slow" in prompt else 0.05)
+                if reject or "broken" in prompt:
+                    self.send_response(429 if reject else 400)
+                    self.send_header("Retry-After", "0")
+                    self.end_headers()
+                    return
+                body = json.dumps({"response": "answer to " + prompt.split("\n")[-2]}).encode()
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            finally:
+                with lock:
+                    state["in_flight"] -= 1
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/", state
+    server.shutdown()
+    server.server_close()
+
+
+def test_async_fan_out_streams_results_as_they_complete(stub_server, tmp_path):
+    url, state = stub_server
+    integrator = LLMIntegrator(backend=HTTPBackend(url), cache=ResponseCache(tmp_path))
+    integrator.get_refactoring_suggestion(CONTEXT, "cached")
+    state["requests"] = 0
+    prompts = ["slow"] + [f"p{i}" for i in range(11)] + ["busy", "cached", "p1"]
+
+    async def collect():
+        return [r async for r in integrator.stream_refactoring_suggestions(
+            [(CONTEXT, p) for p in prompts], concurrency=4, backoff=0.01
+        )]
+
+    results = asyncio.run(collect())
+    assert sorted(r.index for r in results) == list(range(len(prompts)))
+    assert all(r.error is None and r.response == f"answer to {prompts[r.index]}" for r in results)
+    assert results[0].cached and results[0].index == prompts.index("cached")
+    assert results[-1].index == 0  # The slow request finishes last.
+    assert state["max_in_flight"] <= 4
+    assert state["requests"] == 14  # 13 unique prompts, plus one retry of "busy".
+
+
+def test_async_fan_out_rate_limit_and_errors(stub_server):
+    url, state = stub_server
+    integrator = LLMIntegrator(backend=HTTPBackend(url))
+    requests = [(CONTEXT, p) for p in ["a", "b", "c", "d", "broken"]]
+    started = time.monotonic()
+    with pytest.raises(BackendError, match="HTTP 400"):
+        asyncio.run(integrator.aget_refactoring_suggestions(requests, concurrency=5, rate=20, burst=1))
+    # One request every 50 ms.
+    assert time.monotonic() - started >= 0.2
+    assert state["requests"] == 5  # Client errors are not retried.
@@ -0,0 +1,79 @@
+import pytest
+from super_replace.core.autonomous_replacer import build_index
+from super_replace.core.members import class_hierarchy, class_scopes, find_member_references, rename_member
+
+CODE = '''class Base:
+    size = 1
+    double = size * 2
+
+    def grow(self, step):
+        self.size += step
+        return self.size
+
+
+class Widget(Base):
+    def __init__(self):
+        self.size = 3
+
+    def grow(self, step):
+        helper = lambda: self.size
+        return super().grow(step) + helper()
+
+
+class Other:
+    def __init__(self):
+        self.size = 0
+
+    @staticmethod
+    def make(self):
+        return self.size
+
+
+def use(widget):
+    return Widget.size + Other.size + widget.size
+'''
+
+
+def test_member_index_records_receiver_accesses():
+    _, index = build_index(CODE)
+    widget = class_scopes(index, "Widget")[0]
+    assert [s.name for s in class_hierarchy(index, [widget])] == ["Base", "Widget"]
+    references = find_member_references(index, "Widget", "size")
+    assert [(n.lineno, n.col_offset) for n in references.definitions] == [(2, 4), (6, 8), (12, 8)]
+    assert [(n.lineno, n.col_offset) for n in references.uses] == [(3, 13), (7, 15), (15, 25), (29, 11)]
+    # The static method's first parameter is not an instance; Other.size is another class.
+    assert [(n.lineno, n.col_offset) for n in references.unresolved] == [(25, 15), (29, 38)]
+
+
+def test_rename_member_across_hierarchy():
+    result = rename_member(CODE, "Base", "grow", "extend")
+    assert "    def extend(self, step):\n        self.size" in result
+    assert "    def extend(self, step):\n        helper" in result
+    assert "super().extend(step)" in result
+    assert "size" in result and result.count("extend") == 3
+
+
+def test_rename_member_leaves_unrelated_classes():
+    result = rename_member(CODE, "Widget", "size", "length")
+    assert "    length = 1\n    double = length * 2\n" in result
+    assert "self.length = 3" in result and "lambda: self.length" in result
+    assert "self.size = 0" in result
+    assert "Widget.length + Other.size + widget.size" in result
+    with_unresolved = rename_member(CODE, "Widget", "size", "length", include_unresolved=True)
+    assert "Widget.length + Other.size + widget.length" in with_unresolved
+
+
+def test_methods_do_not_see_class_attributes():
+    code = (
+        "def size():\n    return 2\n\n\n"
+        "class Box:\n    size = 3\n\n    def area(self):\n        return size() * self.size\n"
+    )
+    result = rename_member(code, "Box", "size", "capacity")
+    assert "    capacity = 3\n" in result
+    assert "return size() * self.capacity" in result
+    assert result.startswith("def size():")
+
+
+def test_unknown_class():
+    with pytest.raises(ValueError, match="No class named 'Missing'"):
+        rename_member(CODE, "Missing", "size", "length")
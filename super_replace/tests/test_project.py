@@ -0,0 +1,75 @@
+import pytest
+from super_replace.core.project import super_replace_project
+
+
+@pytest.fixture
+def sample_tree(tmp_path):
+    pkg = tmp_path / "pkg"
+    pkg.mkdir()
+    (pkg / "a.py").write_text("def func():\n    x = 1\n    print(x)\n")
+    (pkg / "b.py").write_text("def other():\n    return 2\n")
+    (pkg / "broken.py").write_text("def x(:\n")
+    cache = tmp_path / "__pycache__"
+    cache.mkdir()
+    (cache / "c.py").write_text("x = 1\n")
+    return tmp_path
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_project_rename_writes_changed_files(sample_tree, jobs):
+    results = super_replace_project(sample_tree, "x", "y", {"scope": "local"}, jobs=jobs)
+    by_name = {r.path.name: r for r in results}
+    assert set(by_name) == {"a.py", "b.py", "broken.py"}
+    assert by_name["a.py"].changed
+    assert "index" in by_name["a.py"].timings
+    assert by_name["b.py"].skipped
+    assert by_name["broken.py"].error
+    assert "y = 1" in (sample_tree / "pkg" / "a.py").read_text()
+    assert (sample_tree / "__pycache__" / "c.py").read_text() == "x = 1\n"
+
+
+def test_project_dry_run_does_not_write(sample_tree):
+    original = (sample_tree / "pkg" / "a.py").read_text()
+    results = super_replace_project(sample_tree, "x", "y", {"scope": "local"}, jobs=1, dry_run=True)
+    changed = [r for r in results if r.changed]
+    assert len(changed) == 1
+    assert "print(y)" in changed[0].new_code
+    assert (sample_tree / "pkg" / "a.py").read_text() == original
+
+
+def test_preserve_formatting_keeps_crlf_line_endings(tmp_path):
+    (tmp_path / "mod.py").write_bytes(b"def func():\r\n    y = 1\r\n    print(y)  # keep\r\n")
+    results = super_replace_project(tmp_path, "y", "z", {"scope": "local", "preserve_formatting": True}, jobs=1)
+    assert results[0].changed
+    assert (tmp_path / "mod.py").read_bytes() == b"def func():\r\n    z = 1\r\n    print(z)  # keep\r\n"
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_project_formats_and_lints_changed_files_in_one_batch(sample_tree, jobs, monkeypatch):
+    from super_replace.core import project
+
+    calls = []
+
+    def fake_format(codes, timings, backend):
+        calls.append(("format", sorted(codes)))
+        return {name: "# formatted\n" + code for name, code in codes.items()}
+
+    def fake_lint(codes, timings):
+        calls.append(("lint", sorted(codes)))
+        timings["lint"] = 0.0
+        return {name: f"{name}:1:1: E000 issue\n" for name in codes}
+
+    monkeypatch.setattr(project, "format_codes_with_black", fake_format)
+    monkeypatch.setattr(project, "lint_codes_with_ruff", fake_lint)
+    batch_timings = {}
+    results = super_replace_project(
+        sample_tree, "x", "y", {"scope": "local"}, jobs=jobs,
+        format=True, lint=True, black_backend_name="subprocess", batch_timings=batch_timings
+    )
+    a_path = str(sample_tree / "pkg" / "a.py")
+    assert calls == [("format", [a_path]), ("lint", [a_path])]
+    by_name = {r.path.name: r for r in results}
+    assert by_name["a.py"].lint_output == f"{a_path}:1:1: E000 issue\n"
+    assert by_name["a.py"].new_code is None
+    assert (sample_tree / "pkg" / "a.py").read_text().startswith("# formatted\n")
+    assert "lint" in batch_timings
@@ -0,0 +1,89 @@
+import logging
+
+from super_replace.core.llm_integrator import LLMIntegrator
+from super_replace.core.prompt_context import build_rename_context, estimate_tokens, format_rename_context
+
+CODE = '''import os
+
+class Config:
+    limit = 3
+
+    def load(self, path):
+        total = 0
+        for line in open(path):
+            total += len(line)
+        return [total for _ in range(self.limit)]
+
+def helper(total):
+    count = 1
+    return total + count
+
+def unrelated():
+    return os.getcwd()
+'''
+
+
+def test_only_scopes_referencing_the_target_are_included():
+    context = build_rename_context(CODE, "total", "count", token_budget=1000)
+    kinds = {(s["kind"], s["scope"]) for s in context["snippets"]}
+    assert ("source", "Config.load") in kinds
+    assert ("source", "helper") in kinds
+    assert ("header", "<module>") in kinds
+    assert "unrelated" not in format_rename_context(context)
+    assert context["omitted"] == 0
+    assert [b["scope_name"] for b in context["bindings"]] == ["load", "helper"]
+
+
+def test_budget_keeps_highest_ranked_reference_lines():
+    context = build_rename_context(CODE, "total", "count", token_budget=40)
+    assert context["tokens"] <= 40
+    by_scope = {s["scope"]: s for s in context["snippets"]}
+    # load has the most references and is shown whole; helper only gets its first reference.
+    assert by_scope["Config.load"]["kind"] == "references"
+    assert "total += len(line)" in by_scope["Config.load"]["text"]
+    assert by_scope["helper"]["text"].strip() == "12| def helper(total):"
+    assert context["omitted"] == 0
+    assert sum(estimate_tokens(s["text"]) for s in context["snippets"]) == context["tokens"]
+
+
+def test_large_scope_is_truncated_rather_than_dropped():
+    code = "".join(f"value = {i}\n" for i in range(1000))
+    context = build_rename_context(code, "value", token_budget=100)
+    assert len(context["snippets"]) == 1
+    assert context["snippets"][0]["lineno"] == 1
+    assert 0 < context["tokens"] <= 100
+
+
+def test_integrator_sends_budgeted_context(caplog):
+    integrator = LLMIntegrator(token_budget=60)
+    with caplog.at_level(logging.DEBUG, logger="super_replace.core.llm_integrator"):
+        integrator.get_rename_suggestion(CODE + "\n" * 10 + "x = 1\n" * 5000, "total", "count")
+    tokens = int(caplog.messages[0].split("Prompt: ")[1].split()[0])
+    assert tokens < 150
+
+
+def test_module_level_definition_is_shown():
+    code = (
+        "def total(xs):\n    return sum(xs)\n\n\n"
+        + "".join(f"X{i} = {i}\n" for i in range(50))
+        + "\n\ndef report(xs):\n    print(total(xs))\n"
+    )
+    context = build_rename_context(code, "total", "count", token_budget=1000)
+    by_scope = {s["scope"]: s for s in context["snippets"]}
+    assert by_scope["total"]["kind"] == "source"
+    assert "def total(xs):" in by_scope["total"]["text"]
+    assert "print(total(xs))" in by_scope["report"]["text"]
+    assert context["bindings"] == [{"scope_kind": "MODULE", "scope_name": "", "uses": 1, "definitions": 1}]
+
+
+def test_nested_scopes_are_not_shown_twice():
+    code = (
+        "def report(total):\n"
+        "    def inner():\n"
+        "        return total * 2\n"
+        "    return inner() + total\n"
+    )
+    context = build_rename_context(code, "total", token_budget=1000)
+    assert [(s["kind"], s["scope"]) for s in context["snippets"]] == [("source", "report")]
+    assert context["snippets"][0]["text"].count("return total * 2") == 1
+    assert sum(estimate_tokens(s["text"]) for s in context["snippets"]) == context["tokens"]
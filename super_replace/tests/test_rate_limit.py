@@ -0,0 +1,45 @@
+import asyncio
+import time
+
+import pytest
+
+from super_replace.core.llm_backends import BackendError
+from super_replace.core.rate_limit import TokenBucket, retry_async
+
+
+def test_token_bucket_allows_a_burst_then_the_rate():
+    async def run():
+        bucket = TokenBucket(rate=50, capacity=5)
+        started = time.monotonic()
+        for _ in range(10):
+            await bucket.acquire()
+        return time.monotonic() - started
+
+    # 5 tokens are available at once; the other 5 arrive at 50/s.
+    assert 0.08 <= asyncio.run(run()) < 0.5
+
+
+def test_retry_async_retries_transient_errors():
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise BackendError("busy", retryable=True)
+        return "ok"
+
+    assert asyncio.run(retry_async(flaky, max_retries=3, backoff=0.001)) == "ok"
+    assert len(attempts) == 3
+
+
+@pytest.mark.parametrize("retryable, expected_attempts", [(False, 1), (True, 3)])
+def test_retry_async_gives_up(retryable, expected_attempts):
+    attempts = []
+
+    async def failing():
+        attempts.append(1)
+        raise BackendError("nope", retryable=retryable)
+
+    with pytest.raises(BackendError):
+        asyncio.run(retry_async(failing, max_retries=2, backoff=0.001))
+    assert len(attempts) == expected_attempts
@@ -0,0 +1,180 @@
+import json
+
+import pytest
+
+from super_replace.core.autonomous_replacer import build_index
+from super_replace.core.batch_replacer import super_replace_batch
+from super_replace.core.rules import RuleFileError, apply_rules, load_rules, parse_rules, rename_with_rules, run_rules
+
+CODE = """counter = 0
+
+def outer(a, b):
+    total = a + b  # sum
+    try:
+        total += 1
+    except ValueError as err:
+        print(err)
+    return total
+
+def bump():
+    global counter
+    counter += 1
+"""
+
+TOML = """
+[defaults]
+scope = "local"
+preserve_formatting = true
+
+[[rules]]
+target = "total"
+replacement = "running"
+functions = ["outer"]
+
+[[rules]]
+name = "counter"
+target = "counter"
+replacement = "count"
+scope = "global"
+
+[[rules]]
+target = "err"
+replacement = "error"
+"""
+
+YAML = """
+defaults:
+  scope: local
+  preserve_formatting: true
+rules:
+  - target: total
+    replacement: running
+    functions: [outer]
+  - name: counter
+    target: counter
+    replacement: count
+    scope: global
+  - target: err
+    replacement: error
+"""
+
+
+def test_rule_files_share_one_structure(tmp_path):
+    (tmp_path / "rules.toml").write_text(TOML)
+    loaded = [load_rules(tmp_path / "rules.toml")]
+    (tmp_path / "rules.json").write_text(json.dumps({
+        "defaults": {"scope": "local", "preserve_formatting": True},
+        "rules": [
+            {"target": "total", "replacement": "running", "functions": ["outer"]},
+            {"name": "counter", "target": "counter", "replacement": "count", "scope": "global"},
+            {"target": "err", "replacement": "error"},
+        ],
+    }))
+    loaded.append(load_rules(tmp_path / "rules.json"))
+
+    first = loaded[0]
+    assert [rule.name for rule in first.rules] == ["total->running", "counter", "err->error"]
+    assert first.rules[0].spec.functions == ("outer",)
+    assert first.rules[2].spec.scope == "local"
+    assert first.preserve_formatting
+    assert all(rule_set == first for rule_set in loaded)
+
+
+def test_yaml_rule_files_match_toml(tmp_path):
+    pytest.importorskip("yaml")
+    (tmp_path / "rules.toml").write_text(TOML)
+    (tmp_path / "rules.yml").write_text(YAML)
+    assert load_rules(tmp_path / "rules.yml") == load_rules(tmp_path / "rules.toml")
+
+
+@pytest.mark.parametrize("data, message", [
+    ({"rules": []}, "non-empty list"),
+    ({"rules": [{"target": "a"}]}, "'replacement' must be a Python identifier"),
+    ({"rules": [{"target": "a", "replacement": "class"}]}, "'replacement' must be a Python identifier"),
+    ({"rules": [{"target": "a", "replacement": "b", "scope": "module"}]}, "'scope' must be one of"),
+    ({"rules": [{"target": "a", "replacement": "b", "funcs": ["f"]}]}, "rule 1: unknown keys ['funcs']"),
+    ({"rules": [{"name": "x", "target": "a", "replacement": "b"}, {"name": "x", "target": "c", "replacement": "d"}]},
+     "rule 2: duplicate rule name 'x'"),
+    ({"defaults": {"jobs": 2}, "rules": [{"target": "a", "replacement": "b"}]}, "'defaults' accepts only"),
+])
+def test_parse_rules_rejects_invalid_rules(data, message):
+    with pytest.raises(RuleFileError) as excinfo:
+        parse_rules(data)
+    assert message in str(excinfo.value)
+
+
+def test_load_rules_reports_syntax_errors_and_unknown_types(tmp_path):
+    (tmp_path / "rules.toml").write_text("[[rules]\n")
+    with pytest.raises(RuleFileError, match="Could not parse"):
+        load_rules(tmp_path / "rules.toml")
+    (tmp_path / "rules.ini").write_text("")
+    with pytest.raises(RuleFileError, match="unsupported rule file type"):
+        load_rules(tmp_path / "rules.ini")
+
+
+def test_apply_rules_matches_batch_rename():
+    rule_set = parse_rules({"rules": [
+        {"target": "total", "replacement": "running", "functions": ["outer"]},
+        {"target": "counter", "replacement": "count", "scope": "global"},
+        {"target": "err", "replacement": "error"},
+    ]})
+    expected = super_replace_batch(CODE, rule_set.specs, {"preserve_formatting": True})
+    rule_set.preserve_formatting = True
+    assert apply_rules(CODE, rule_set) == expected
+    assert "running = a + b  # sum" in expected
+
+
+def test_rename_with_rules_counts_hits_per_rule():
+    rule_set = parse_rules({"rules": [
+        {"target": "total", "replacement": "running"},
+        {"name": "again", "target": "total", "replacement": "running", "functions": ["outer"]},
+        {"target": "counter", "replacement": "count", "scope": "global"},
+        {"target": "missing", "replacement": "found"},
+    ]})
+    tree, index = build_index(CODE)
+    timings = {}
+    new_code, hits = rename_with_rules(CODE, tree, index, rule_set.rules, True, timings)
+    # A binding selected by two rules counts for the first one.
+    assert hits == {"total->running": 3, "counter->count": 3}
+    assert set(timings) == {"total->running", "again", "counter->count", "missing->found"}
+    assert new_code.count("running") == 3
+
+
+def test_run_rules_reports_files_and_rule_stats(tmp_path):
+    (tmp_path / "a.py").write_text(CODE)
+    (tmp_path / "b.py").write_text("def outer():\n    total = 1\n    return total\n")
+    (tmp_path / "c.py").write_text("x = 1\n")
+    (tmp_path / "d.py").write_text("def outer(:\n    total = 1\n")
+    rule_set = parse_rules({"defaults": {"preserve_formatting": True}, "rules": [
+        {"target": "total", "replacement": "running"},
+        {"target": "err", "replacement": "error"},
+        {"target": "unused", "replacement": "other"},
+    ]})
+
+    results, stats = run_rules(tmp_path, rule_set, dry_run=True)
+    by_name = {result.path.name: result for result in results}
+    assert by_name["a.py"].changed and by_name["b.py"].changed
+    assert by_name["c.py"].skipped
+    assert by_name["d.py"].error.startswith("Could not parse file")
+    assert [(s.name, s.files, s.hits) for s in stats] == [
+        ("total->running", 2, 5), ("err->error", 1, 2), ("unused->other", 0, 0)
+    ]
+    assert (tmp_path / "b.py").read_text() == "def outer():\n    total = 1\n    return total\n"
+
+    results, _ = run_rules(tmp_path, rule_set, jobs=2)
+    assert (tmp_path / "b.py").read_text() == "def outer():\n    running = 1\n    return running\n"
+
+
+def test_run_rules_keeps_crlf_line_endings(tmp_path):
+    (tmp_path / "a.py").write_bytes(b"def outer():\r\n    total = 1  # keep\r\n    return total\r\n")
+    rule_set = parse_rules({"defaults": {"preserve_formatting": True}, "rules": [{"target": "total", "replacement": "running"}]})
+    run_rules(tmp_path, rule_set)
+    assert (tmp_path / "a.py").read_bytes() == b"def outer():\r\n    running = 1  # keep\r\n    return running\r\n"
+
+
+def test_run_rules_reports_conflicting_rules_per_file(tmp_path):
+    (tmp_path / "a.py").write_text("def f(a, b):\n    return a + b\n")
+    rule_set = parse_rules({"rules": [{"target": "a", "replacement": "b"}]})
+    results, stats = run_rules(tmp_path, rule_set)
+    assert results[0].error.startswith("Conflicting renames")
+    assert stats[0].hits == 0
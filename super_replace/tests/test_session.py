@@ -0,0 +1,79 @@
+import ast
+from super_replace.core.autonomous_replacer import build_index, get_binding_info
+from super_replace.core.members import find_member_references
+from super_replace.core.session import AnalysisSession
+
+CODE = """
+counter = 0
+
+def outer(x):
+    total = x
+    def inner():
+        nonlocal total
+        total += 1
+        return total
+    try:
+        inner()
+    except ValueError as err:
+        print(err)
+    return total
+
+def bump():
+    global counter
+    counter += 1
+"""
+
+
+def normalize_code(code: str) -> str:
+    return ast.unparse(ast.parse(code)).strip()
+
+
+def _summary(info):
+    return sorted((b["scope_name"], b["uses"], b["definitions"]) for b in info["bindings"])
+
+
+def test_session_renames_match_one_shot_api():
+    session = AnalysisSession(CODE)
+    assert session.check_rename_safety("total", "running", {"scope": "local"})[0]
+    session.rename("total", "running", {"functions": ["outer"], "scope": "local"})
+    session.rename("counter", "count", {"scope": "global"})
+    result = session.rename("err", "error", {"scope": "local"})
+
+    assert "nonlocal running" in result
+    assert "global count" in result
+    assert "except ValueError as error" in result
+    assert session.full_reindex_count == 0
+    for name in ("running", "count", "error", "total", "counter", "err"):
+        assert _summary(session.binding_info(name)) == _summary(get_binding_info(result, name))
+
+
+def test_session_reindexes_when_new_name_already_bound():
+    session = AnalysisSession(CODE)
+    session.rename("total", "x", {"functions": ["outer"], "scope": "local"})
+    assert session.full_reindex_count == 1
+    assert _summary(session.binding_info("x")) == _summary(get_binding_info(session.source, "x"))
+
+
+def test_session_source_unchanged_without_matches():
+    session = AnalysisSession(CODE)
+    assert session.rename("missing", "other", {"scope": "local"}) == CODE
+
+
+def test_session_keeps_the_member_index_current():
+    code = (
+        "def make():\n"
+        "    class Box:\n"
+        "        size = 1\n\n"
+        "        def area(self):\n"
+        "            return self.size\n"
+        "    return Box\n"
+    )
+    session = AnalysisSession(code)
+    session.rename("self", "box", {"scope": "local"})
+    session.rename("area", "surface", {"scope": "class"})
+    assert session.full_reindex_count == 0
+    _, fresh = build_index(session.source)
+    assert session.index.receivers == fresh.receivers
+    assert sorted(s.name for s in session.index.scopes) == sorted(s.name for s in fresh.scopes)
+    references = find_member_references(session.index, "Box", "size")
+    assert [node.lineno for node in references.uses] == [6]
@@ -0,0 +1,87 @@
+import ast
+import pytest
+import difflib
+from super_replace.core.autonomous_replacer import rename_edits, super_replace_autonomous
+from super_replace.core.source_patcher import TextEdit, apply_text_edits, iter_unified_diff
+
+CODE = '''
+counter = 0  # module counter
+
+def outer(counter_arg,   step=1):
+    """Keep   this docstring."""
+    total = counter_arg
+    def inner():
+        nonlocal total
+        total += step
+        return total
+    try:
+        inner()
+    except (ValueError,
+            TypeError) as total_err:
+        print(total_err)
+    return lambda total: total + 1
+
+def bump():
+    global counter, other
+    counter += 1
+'''
+
+
+def normalize_code(code: str) -> str:
+    return ast.unparse(ast.parse(code)).strip()
+
+
+@pytest.mark.parametrize("target, replacement, rules", [
+    ("total", "running", {"functions": ["outer"], "scope": "local"}),
+    ("counter", "count", {"scope": "global"}),
+    ("total_err", "error", {"scope": "local"}),
+    ("counter_arg", "value", {"scope": "local"}),
+])
+def test_patched_output_matches_regenerated_output(target, replacement, rules):
+    regenerated = super_replace_autonomous(CODE, target, replacement, dict(rules))
+    patched = super_replace_autonomous(CODE, target, replacement, dict(rules, preserve_formatting=True))
+    assert normalize_code(patched) == normalize_code(regenerated)
+    # Everything but the renamed identifiers is left byte-for-byte intact.
+    assert "# module counter" in patched
+    assert '"""Keep   this docstring."""' in patched
+    assert "(ValueError,\n            TypeError)" in patched
+
+
+def test_patching_handles_non_ascii_columns():
+    code = "def f():\n    s = 'é'; x = 1; print(s, x)\n"
+    patched = super_replace_autonomous(code, "x", "ÿ", {"scope": "local", "preserve_formatting": True})
+    assert patched == "def f():\n    s = 'é'; ÿ = 1; print(s, ÿ)\n"
+
+
+def test_declaration_edits_stay_inside_the_statement():
+    code = "def f(obj):\n    global x; obj.x = 2\n    x = 3\n"
+    patched = super_replace_autonomous(code, "x", "y", {"scope": "global", "preserve_formatting": True})
+    assert patched == "def f(obj):\n    global y; obj.x = 2\n    y = 3\n"
+
+
+def test_apply_text_edits_rejects_mismatched_edit():
+    with pytest.raises(ValueError):
+        apply_text_edits("x = 1\n", [TextEdit(1, 0, "y", "z")])
+
+
+GENERATED = "".join(f"def f{i}():\n    x = {i}  # é\n    print(x, x)\n\n" for i in range(20)) + "x = 1\nprint(x)"
+
+
+@pytest.mark.parametrize("rules", [
+    {"scope": "local"},
+    {"scope": "local", "functions": ["f3", "f5", "f19"]},
+    {"scope": "global"},
+])
+def test_streamed_diff_matches_difflib(rules):
+    rules = dict(rules, preserve_formatting=True)
+    new_code = super_replace_autonomous(GENERATED, "x", "renamed", rules)
+    expected = "".join(difflib.unified_diff(
+        GENERATED.splitlines(keepends=True), new_code.splitlines(keepends=True), "a/code", "b/code"
+    ))
+    hunks = list(iter_unified_diff(GENERATED, rename_edits(GENERATED, "x", "renamed", rules)))
+    assert "".join(hunks) == expected
+    assert len(hunks) == expected.count("\n@@") + expected.startswith("@@")
+
+
+def test_streamed_diff_is_empty_without_edits():
+    assert list(iter_unified_diff(GENERATED, [])) == []
@@ -0,0 +1,85 @@
+import os
+from super_replace.core.usages import UsageIndex, find_usages, usage_rows
+
+CORE = '''import os
+
+
+def helper(value):
+    return value + 1
+
+
+class Widget:
+    def grow(self, step):
+        try:
+            return helper(step)
+        except ValueError as helper_error:
+            raise helper_error
+'''
+
+USER = '''from pkg.core import helper as assist, Widget
+
+
+def run(widget):
+    widget.helper = assist
+    return assist(1) + helper(2)
+'''
+
+
+def _write_project(root):
+    (root / "pkg").mkdir()
+    (root / "pkg" / "core.py").write_text(CORE)
+    (root / "pkg" / "user.py").write_text(USER)
+
+
+def _sites(usages, root):
+    return [(os.path.relpath(u.path, root), u.line, u.column, u.kind, u.scope) for u in usages]
+
+
+def test_usage_rows_cover_definitions_uses_and_attributes():
+    rows = usage_rows(CORE)
+    assert [row for row in rows if row[0] == "helper"] == [
+        ("helper", "definition", 4, 4, "<module>"),
+        ("helper", "use", 11, 19, "Widget.grow"),
+    ]
+    assert ("helper_error", "definition", 12, 29, "Widget.grow") in rows
+    assert ("helper_error", "use", 13, 18, "Widget.grow") in rows
+
+
+def test_find_usages_across_files(tmp_path):
+    root = tmp_path / "project"
+    root.mkdir()
+    _write_project(root)
+    db = tmp_path / "usages.sqlite"
+    assert _sites(find_usages(root, "helper", db_path=db, jobs=2), root) == [
+        ("pkg/core.py", 4, 5, "definition", "<module>"),
+        ("pkg/core.py", 11, 20, "use", "Widget.grow"),
+        ("pkg/user.py", 1, 22, "use", "<module>"),
+        ("pkg/user.py", 5, 12, "attribute", "run"),
+        ("pkg/user.py", 6, 24, "use", "run"),
+    ]
+    assert _sites(find_usages(root, "helper", db_path=db, kinds=["use"], scope="Widget"), root) == [
+        ("pkg/core.py", 11, 20, "use", "Widget.grow"),
+    ]
+
+
+def test_refresh_only_reindexes_changed_files(tmp_path):
+    root = tmp_path / "project"
+    root.mkdir()
+    _write_project(root)
+    with UsageIndex(tmp_path / "usages.sqlite") as usage_index:
+        assert usage_index.refresh(root, jobs=1).indexed == 2
+        assert usage_index.refresh(root, jobs=1).indexed == 0
+
+        user = root / "pkg" / "user.py"
+        user.write_text(USER.replace("helper(2)", "helper(2) + helper(3)"))
+        os.utime(user, ns=(0, 10**9))
+        (root / "pkg" / "broken.py").write_text("def broken(:\n")
+        stats = usage_index.refresh(root, jobs=1)
+        assert (stats.files, stats.indexed, stats.errors) == (3, 2, 1)
+        assert [path.endswith("broken.py") for path, _ in usage_index.errors(root)] == [True]
+        assert len(usage_index.query("helper", root, kinds=["use"])) == 4
+
+        (root / "pkg" / "core.py").unlink()
+        stats = usage_index.refresh(root, jobs=1)
+        assert (stats.indexed, stats.removed) == (0, 1)
+        assert {os.path.basename(u.path) for u in usage_index.query("helper", root)} == {"user.py"}
@@ -0,0 +1,163 @@
+import threading
+import time
+
+import pytest
+
+from super_replace.core.batch_replacer import normalize_renames
+from super_replace.core.watch import (
+    InotifyWatcher,
+    PollingWatcher,
+    RuleApplier,
+    create_watcher,
+    debounced_batches,
+    watch_and_apply,
+)
+
+CODE = "def scale(value):\n    factor = 2  # keep\n    return value * factor\n"
+RENAMED = "def scale(value):\n    multiplier = 2  # keep\n    return value * multiplier\n"
+SPECS = normalize_renames({"factor": "multiplier"}, {"scope": "local"})
+
+
+def _wait_for(watcher, path, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    seen = set()
+    while path not in seen and time.monotonic() < deadline:
+        seen |= watcher.poll(0.1)
+    return seen
+
+
+def test_rule_applier_renames_in_place(tmp_path):
+    path = tmp_path / "mod.py"
+    path.write_text(CODE)
+    applier = RuleApplier(SPECS)
+
+    result = applier.apply(path)
+    assert result.changed and result.error is None
+    assert path.read_text() == RENAMED
+    # The event of our own write is ignored, as are files without a rule target.
+    assert applier.apply(path).skipped
+    other = tmp_path / "other.py"
+    other.write_text("x = 1\n")
+    assert applier.apply(other).skipped
+
+
+def test_rule_applier_keeps_crlf_line_endings(tmp_path):
+    path = tmp_path / "mod.py"
+    path.write_bytes(CODE.replace("\n", "\r\n").encode())
+    assert RuleApplier(SPECS).apply(path).changed
+    assert path.read_bytes() == RENAMED.replace("\n", "\r\n").encode()
+
+
+def test_rule_applier_reuses_the_index_of_unchanged_files(tmp_path):
+    path = tmp_path / "mod.py"
+    path.write_text("def keep(factor):\n    return factor\n\n\ndef edited(x):\n    return x\n")
+    applier = RuleApplier(normalize_renames({"factor": "multiplier"}, {"scope": "local", "functions": ["edited"]}))
+    assert not applier.apply(path).changed
+    indexer = applier._indexers[path]
+
+    path.write_text("def keep(factor):\n    return factor\n\n\ndef edited(x):\n    return x + 1\n")
+    assert not applier.apply(path).changed
+    assert applier._indexers[path] is indexer
+
+    path.write_text("def keep(factor):\n    return factor\n\n\ndef edited(x):\n    factor = x\n    return factor\n")
+    assert applier.apply(path).changed
+    assert path.read_text() == (
+        "def keep(factor):\n    return factor\n\n\ndef edited(x):\n    multiplier = x\n    return multiplier\n"
+    )
+
+
+def test_rule_applier_reports_unparsable_saves_and_recovers(tmp_path):
+    path = tmp_path / "mod.py"
+    path.write_text("def scale(value):\n    factor = (\n")
+    applier = RuleApplier(SPECS)
+    result = applier.apply(path)
+    assert result.error.startswith("Could not parse file")
+
+    path.write_text(CODE)
+    assert applier.apply(path).changed
+
+
+def test_rule_applier_dry_run_leaves_files_alone(tmp_path):
+    path = tmp_path / "mod.py"
+    path.write_text(CODE)
+    result = RuleApplier(SPECS, dry_run=True).apply(path)
+    assert result.changed and result.new_code == RENAMED
+    assert path.read_text() == CODE
+
+
+def test_polling_watcher_reports_written_files(tmp_path):
+    (tmp_path / "build").mkdir()
+    path = tmp_path / "mod.py"
+    path.write_text("x = 1\n")
+    watcher = PollingWatcher(tmp_path, interval=0.05)
+    assert watcher.poll(0.1) == set()
+
+    (tmp_path / "build" / "generated.py").write_text("y = 2\n")
+    path.write_text("x = 22\n")
+    assert _wait_for(watcher, path) == {path}
+
+
+def test_inotify_watcher_follows_new_directories(tmp_path):
+    try:
+        watcher = InotifyWatcher(tmp_path)
+    except OSError:
+        pytest.skip("inotify is not available")
+    try:
+        (tmp_path / "notes.txt").write_text("ignored\n")
+        package = tmp_path / "pkg"
+        package.mkdir()
+        assert watcher.poll(1.0) == set()
+
+        path = package / "mod.py"
+        path.write_text("x = 1\n")
+        assert _wait_for(watcher, path) == {path}
+    finally:
+        watcher.close()
+
+
+def test_create_watcher_rejects_unknown_backends(tmp_path):
+    assert isinstance(create_watcher(tmp_path, backend="poll"), PollingWatcher)
+    with pytest.raises(ValueError):
+        create_watcher(tmp_path, backend="fsevents")
+
+
+class _ScriptedWatcher:
+    def __init__(self, events):
+        self.events = list(events)
+
+    def poll(self, timeout=None):
+        return self.events.pop(0) if self.events else set()
+
+
+def test_debounced_batches_merge_bursts():
+    events = [{"a"}, {"b"}, {"a"}, set(), {"c"}, set()]
+    batches = debounced_batches(_ScriptedWatcher(events), debounce=0.01, max_delay=1.0)
+    assert next(batches) == {"a", "b"}
+    assert next(batches) == {"c"}
+
+
+@pytest.mark.parametrize("backend", ["poll", "auto"])
+def test_watch_and_apply_processes_saves(tmp_path, backend):
+    path = tmp_path / "mod.py"
+    path.write_text("x = 1\n")
+    stop, ready = threading.Event(), threading.Event()
+    batches = []
+
+    def on_batch(results):
+        batches.append(results)
+        if any(result.changed for result in results):
+            stop.set()
+
+    thread = threading.Thread(target=watch_and_apply, args=(tmp_path, SPECS, on_batch), kwargs={
+        "backend": backend, "debounce": 0.05, "poll_interval": 0.05, "stop": stop, "ready": ready,
+    })
+    thread.start()
+    try:
+        assert ready.wait(5)
+        path.write_text(CODE)
+        thread.join(10)
+    finally:
+        stop.set()
+        thread.join()
+    assert path.read_text() == RENAMED
+    assert [result.path for result in batches[-1] if result.changed] == [path]